@@ -32,7 +32,15 @@ from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DatasetMetadata, DatasetMetadataBinding, DocumentSegment
+from models.dataset import (
+    Dataset,
+    DatasetCollectionBinding,
+    DatasetKeywordTable,
+    DatasetMetadata,
+    DatasetMetadataBinding,
+    DocumentSegment,
+    Embedding,
+)
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation, UploadFile
 from models.oauth import DatasourceOauthParamConfig, DatasourceProvider
@@ -643,6 +651,94 @@ def old_metadata_migration():
     click.echo(click.style("Old metadata migration completed.", fg="green"))
 
 
+@click.command("migrate-embedding-cache-format", help="Convert pickled embedding cache rows to the compact format.")
+@click.option("--batch-size", default=500, help="Number of embedding cache rows to process per batch.")
+@click.option("--limit", default=None, type=int, help="Maximum number of rows to convert (default: no limit).")
+def migrate_embedding_cache_format(batch_size: int, limit: int | None):
+    """
+    Rewrite legacy pickled rows of the embeddings table in the compact binary format.
+
+    Rows are walked in primary key order and committed per batch, so the command can run
+    against a live database and be interrupted and restarted at any time.
+    """
+    click.echo(click.style("Starting embedding cache format migration.", fg="green"))
+
+    last_id = None
+    scanned_count = 0
+    converted_count = 0
+    while limit is None or converted_count < limit:
+        stmt = select(Embedding).order_by(Embedding.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(Embedding.id > last_id)
+        embeddings = db.session.scalars(stmt).all()
+        if not embeddings:
+            break
+
+        for embedding in embeddings:
+            if limit is not None and converted_count >= limit:
+                break
+            if Embedding.is_compact_embedding(embedding.embedding):
+                continue
+            try:
+                embedding.set_embedding(embedding.get_embedding_array())
+                converted_count += 1
+            except Exception:
+                logger.exception("Failed to convert embedding cache row %s", embedding.id)
+
+        scanned_count += len(embeddings)
+        last_id = embeddings[-1].id
+        db.session.commit()
+        click.echo(f"Scanned {scanned_count} rows, converted {converted_count}.")
+
+    click.echo(
+        click.style(
+            f"Embedding cache format migration completed. Converted {converted_count} of {scanned_count} rows.",
+            fg="green",
+        )
+    )
+
+
+@click.command("migrate-keyword-table-to-postings", help="Copy dataset keyword tables into the inverted keyword index.")
+def migrate_keyword_table_to_postings():
+    """
+    Populate the `jieba_inverted_index` keyword store from the existing per-dataset keyword tables.
+
+    Run before switching KEYWORD_STORE to `jieba_inverted_index`. Existing postings are kept, so the
+    command is safe to re-run.
+    """
+    from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+    click.echo(click.style("Starting keyword table migration.", fg="green"))
+
+    migrated_count = 0
+    dataset_ids = db.session.scalars(select(DatasetKeywordTable.dataset_id)).all()
+    for dataset_id in dataset_ids:
+        try:
+            dataset = db.session.get(Dataset, dataset_id)
+            dataset_keyword_table = db.session.scalar(
+                select(DatasetKeywordTable).where(DatasetKeywordTable.dataset_id == dataset_id)
+            )
+            if not dataset or not dataset_keyword_table:
+                continue
+            keyword_table_dict = dataset_keyword_table.keyword_table_dict
+            if not keyword_table_dict:
+                continue
+
+            node_keywords: dict[str, list[str]] = {}
+            for keyword, node_ids in keyword_table_dict["__data__"]["table"].items():
+                for node_id in node_ids:
+                    node_keywords.setdefault(node_id, []).append(keyword)
+
+            JiebaInvertedIndex(dataset)._add_postings(node_keywords)
+            migrated_count += 1
+            click.echo(f"Migrated keyword table of dataset {dataset_id} ({len(node_keywords)} segments).")
+        except Exception:
+            db.session.rollback()
+            logger.exception("Failed to migrate keyword table of dataset %s", dataset_id)
+
+    click.echo(click.style(f"Keyword table migration completed. Migrated {migrated_count} datasets.", fg="green"))
+
+
 @click.command("create-tenant", help="Create account and tenant.")
 @click.option("--email", prompt=True, help="Tenant account email.")
 @click.option("--name", prompt=True, help="Workspace name.")
@@ -6,6 +6,7 @@ from pydantic import (
     Field,
     HttpUrl,
     NegativeInt,
+    NonNegativeFloat,
     NonNegativeInt,
     PositiveFloat,
     PositiveInt,
@@ -81,6 +82,21 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of requests per app per day",
         default=5000,
     )
+    APP_STOP_FLAG_POLL_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds at which running apps poll their stop flag as a fallback"
+        " for stop signals missed by the Redis pub/sub subscriber",
+        default=10,
+    )
+    APP_STREAM_TEXT_COALESCE_WINDOW_MS: NonNegativeInt = Field(
+        description="Time window in milliseconds within which consecutive streamed text chunks are merged"
+        " into one event before being sent to the client, 0 to disable",
+        default=0,
+    )
+    APP_STREAM_TEXT_COALESCE_MAX_BYTES: PositiveInt = Field(
+        description="Maximum size in bytes of merged streamed text before it is sent without waiting"
+        " for the rest of the coalesce window",
+        default=256,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -620,6 +636,31 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         description="Storage backend for WorkflowNodeExecution. Options: 'rdbms', 'hybrid'",
     )
 
+    WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE: PositiveInt = Field(
+        description="Number of node executions the Celery node execution repository buffers before"
+        " sending them to the workers as one batch",
+        default=50,
+    )
+
+    WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL: NonNegativeFloat = Field(
+        description="Seconds after the oldest buffered save at which a timer sends the buffered node executions,"
+        " 0 sends every save immediately. They are always sent when the workflow run ends",
+        default=1.0,
+    )
+
+    WORKFLOW_NODE_EXECUTION_OFFLOAD_STORAGE: str = Field(
+        default="upload_file",
+        description="Storage for node inputs, process_data and outputs that are too large to keep in the row."
+        " Options: 'upload_file', 'blob'",
+    )
+
+    WORKFLOW_NODE_EXECUTION_OFFLOAD_THRESHOLD: PositiveInt = Field(
+        # 10KB
+        default=10240,
+        description="Serialized size in bytes above which node inputs, process_data and outputs are offloaded"
+        " to compressed blobs, only used when WORKFLOW_NODE_EXECUTION_OFFLOAD_STORAGE is 'blob'",
+    )
+
 
 class RepositoryConfig(BaseSettings):
     """
@@ -905,6 +946,28 @@ class DataSetConfig(BaseSettings):
         default=True,
     )
 
+    QUERY_EMBEDDING_LOCAL_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of query embeddings kept in the per-process cache in front of Redis, 0 to disable",
+        default=1024,
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_TTL: PositiveInt = Field(
+        description="Time in seconds a query embedding stays in the per-process cache",
+        default=600,
+    )
+
+    RETRIEVAL_CACHE_DEFAULT_TTL: PositiveInt = Field(
+        description="Time in seconds retrieval results stay cached for datasets that enable the retrieval cache"
+        " without setting their own TTL",
+        default=600,
+    )
+
+    RETRIEVAL_CACHE_DEFAULT_MAX_ENTRIES: PositiveInt = Field(
+        description="Maximum number of cached queries per dataset for datasets that enable the retrieval cache"
+        " without setting their own limit",
+        default=1000,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -932,6 +995,11 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    EMBEDDING_CACHE_STORAGE_DTYPE: Literal["float32", "float16"] = Field(
+        description="Float type used to store cached document embeddings ('float32' or 'float16'), default is float32",
+        default="float32",
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
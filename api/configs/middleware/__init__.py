@@ -94,14 +94,27 @@ class VectorStoreConfig(BaseSettings):
         default="Vector_index",
     )
 
+    VECTOR_CREATE_PIPELINE_DEPTH: NonNegativeInt = Field(
+        description="Number of embedded batches that may wait for the vector store while indexing, so embedding"
+        " the next batch overlaps with writing the current one. Set to 0 to embed and write sequentially.",
+        default=1,
+    )
+
 
 class KeywordStoreConfig(BaseSettings):
     KEYWORD_STORE: str = Field(
         description="Method for keyword extraction and storage."
-        " Default is 'jieba', a Chinese text segmentation library.",
+        " Default is 'jieba', a Chinese text segmentation library."
+        " 'jieba_inverted_index' stores keyword postings per row instead of one keyword table per dataset.",
         default="jieba",
     )
 
+    KEYWORD_TABLE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of parsed dataset keyword tables cached per process for keyword search,"
+        " 0 to disable",
+        default=32,
+    )
+
 
 class DatabaseConfig(BaseSettings):
     DB_HOST: str = Field(
@@ -193,10 +206,16 @@ class DatabaseConfig(BaseSettings):
     )
 
     RETRIEVAL_SERVICE_EXECUTORS: NonNegativeInt = Field(
-        description="Number of processes for the retrieval service, default to CPU cores.",
+        description="Deprecated, retrieval searches run on the shared executor sized by RETRIEVAL_SERVICE_MAX_WORKERS.",
         default=os.cpu_count() or 1,
     )
 
+    RETRIEVAL_SERVICE_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of keyword, vector and full-text searches run concurrently per process,"
+        " shared fairly between tenants.",
+        default=32,
+    )
+
     @computed_field  # type: ignore[misc]
     @property
     def SQLALCHEMY_ENGINE_OPTIONS(self) -> dict[str, Any]:
@@ -425,7 +425,7 @@ class AdvancedChatAppGenerateTaskPipeline:
         if tts_publisher and queue_message:
             tts_publisher.publish(queue_message)
 
-        self._task_state.answer += delta_text
+        self._task_state.append_answer(delta_text)
         yield self._message_cycle_manager.message_to_stream_response(
             answer=delta_text, message_id=self._message_id, from_variable_selector=event.from_variable_selector
         )
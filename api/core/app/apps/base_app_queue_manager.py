@@ -1,5 +1,6 @@
 import queue
 import time
+import weakref
 from abc import abstractmethod
 from enum import IntEnum, auto
 from typing import Any
@@ -7,6 +8,7 @@ from typing import Any
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_signal import TASK_STOP_SIGNAL_CHANNEL, task_stop_signals
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
@@ -14,6 +16,7 @@ from core.app.entities.queue_entities import (
     QueueErrorEvent,
     QueuePingEvent,
     QueueStopEvent,
+    QueueTextChunkEvent,
     WorkflowQueueMessage,
 )
 from extensions.ext_redis import redis_client
@@ -43,6 +46,12 @@ class AppQueueManager:
 
         self._q = q
 
+        # stop signals are pushed by the per-process subscriber, the stop flag key is only
+        # polled as a fallback for signals published while the subscription was down
+        self._stop_event = task_stop_signals.register(self._task_id)
+        weakref.finalize(self, task_stop_signals.unregister, self._task_id, self._stop_event)
+        self._last_stop_flag_check: float | None = None
+
     def listen(self):
         """
         Listen to queue
@@ -50,14 +59,20 @@ class AppQueueManager:
         """
         # wait for APP_MAX_EXECUTION_TIME seconds to stop listen
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
+        coalesce_window = dify_config.APP_STREAM_TEXT_COALESCE_WINDOW_MS / 1000
         start_time = time.time()
         last_ping_time: int | float = 0
+        # message read ahead while coalescing text chunks, delivered before reading the queue again
+        held: list[WorkflowQueueMessage | MessageQueueMessage | None] = []
         while True:
             try:
-                message = self._q.get(timeout=1)
+                message = held.pop() if held else self._q.get(timeout=1)
                 if message is None:
                     break
 
+                if coalesce_window > 0 and isinstance(message.event, QueueTextChunkEvent):
+                    message = self._coalesce_text_chunks(message, coalesce_window, held)
+
                 yield message
             except queue.Empty:
                 continue
@@ -74,6 +89,50 @@ class AppQueueManager:
                     self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
                     last_ping_time = elapsed_time // 10
 
+    def _coalesce_text_chunks(
+        self,
+        message: WorkflowQueueMessage | MessageQueueMessage,
+        window: float,
+        held: list[WorkflowQueueMessage | MessageQueueMessage | None],
+    ) -> WorkflowQueueMessage | MessageQueueMessage:
+        """
+        Merge the text chunks that follow the given one from the same source into a single message,
+        for at most `window` seconds or until APP_STREAM_TEXT_COALESCE_MAX_BYTES is reached.
+        The first message that can not be merged is appended to `held` to keep the event order.
+        """
+        event = message.event
+        assert isinstance(event, QueueTextChunkEvent)
+        max_bytes = dify_config.APP_STREAM_TEXT_COALESCE_MAX_BYTES
+        texts = [event.text]
+        size = len(event.text.encode())
+        deadline = time.monotonic() + window
+        while size < max_bytes:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                next_message = self._q.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            next_event = next_message.event if next_message is not None else None
+            if not (
+                isinstance(next_event, QueueTextChunkEvent)
+                and next_event.from_variable_selector == event.from_variable_selector
+                and next_event.node_type == event.node_type
+                and next_event.in_iteration_id == event.in_iteration_id
+                and next_event.in_loop_id == event.in_loop_id
+            ):
+                held.append(next_message)
+                break
+
+            texts.append(next_event.text)
+            size += len(next_event.text.encode())
+
+        if len(texts) == 1:
+            return message
+        return message.model_copy(update={"event": event.model_copy(update={"text": "".join(texts)})})
+
     def stop_listen(self):
         """
         Stop listen to queue
@@ -124,8 +183,7 @@ class AppQueueManager:
         if result.decode("utf-8") != f"{user_prefix}-{user_id}":
             return
 
-        stopped_cache_key = cls._generate_stopped_cache_key(task_id)
-        redis_client.setex(stopped_cache_key, 600, 1)
+        cls._send_stop_signal(task_id)
 
     @classmethod
     def set_stop_flag_no_user_check(cls, task_id: str) -> None:
@@ -139,17 +197,42 @@ class AppQueueManager:
         if not task_id:
             return
 
+        cls._send_stop_signal(task_id)
+
+    @classmethod
+    def _send_stop_signal(cls, task_id: str):
+        """
+        Set the stop flag and notify the process running the task
+        :param task_id: task id
+        :return:
+        """
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        redis_client.publish(TASK_STOP_SIGNAL_CHANNEL, task_id)
 
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
         :return:
         """
+        if self._stop_event.is_set():
+            return True
+
+        # poll the stop flag on the first check, on every check while the subscription is down,
+        # and otherwise only every APP_STOP_FLAG_POLL_INTERVAL seconds
+        now = time.monotonic()
+        if (
+            task_stop_signals.listening
+            and self._last_stop_flag_check is not None
+            and now - self._last_stop_flag_check < dify_config.APP_STOP_FLAG_POLL_INTERVAL
+        ):
+            return False
+        self._last_stop_flag_check = now
+
         stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
         result = redis_client.get(stopped_cache_key)
         if result is not None:
+            self._stop_event.set()
             return True
 
         return False
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Redis channel stop signals are published to, the message data is the task id
+TASK_STOP_SIGNAL_CHANNEL = "generate_task_stop_signals"
+
+# Seconds to wait before re-subscribing after the subscription is lost
+RESUBSCRIBE_INTERVAL = 1
+
+
+class TaskStopSignalSubscriber:
+    """
+    Per-process subscriber delivering task stop signals published on Redis to local events.
+
+    One daemon thread holds a single pub/sub subscription for the whole process and sets the
+    events of the tasks registered here, so running tasks do not have to poll Redis for their
+    stop flag. `listening` tells whether the subscription is currently up; while it is not,
+    stop signals may be missed and callers have to fall back to the stop flag key.
+    """
+
+    def __init__(self, channel: str = TASK_STOP_SIGNAL_CHANNEL):
+        self._channel = channel
+        self._events: dict[str, set[threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._listening = False
+
+    @property
+    def listening(self) -> bool:
+        return self._listening
+
+    def register(self, task_id: str) -> threading.Event:
+        """
+        Register a task, the returned event is set once a stop signal for the task is received
+        """
+        event = threading.Event()
+        with self._lock:
+            self._events.setdefault(task_id, set()).add(event)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="task-stop-signal-subscriber", daemon=True)
+                self._thread.start()
+        return event
+
+    def unregister(self, task_id: str, event: threading.Event):
+        with self._lock:
+            events = self._events.get(task_id)
+            if events is None:
+                return
+            events.discard(event)
+            if not events:
+                del self._events[task_id]
+
+    def notify(self, task_id: str):
+        """
+        Set the events of a locally registered task
+        """
+        with self._lock:
+            events = list(self._events.get(task_id, ()))
+        for event in events:
+            event.set()
+
+    def _run(self):
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.subscribe(self._channel)
+                    self._listening = True
+                    for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        data = message["data"]
+                        self.notify(data.decode("utf-8") if isinstance(data, bytes) else str(data))
+                finally:
+                    self._listening = False
+                    pubsub.close()
+            except Exception:
+                logger.exception("Task stop signal subscription failed, resubscribing")
+            time.sleep(RESUBSCRIBE_INTERVAL)
+
+
+task_stop_signals = TaskStopSignalSubscriber()
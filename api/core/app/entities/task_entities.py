@@ -1,6 +1,6 @@
 from collections.abc import Mapping, Sequence
 from enum import StrEnum
-from typing import Any
+from typing import Any, cast
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -26,6 +26,10 @@ class TaskStateMetadata(BaseModel):
     usage: LLMUsage | None = None
 
 
+# number of streamed deltas after which they are joined, bounds the memory held by the chunk list
+ANSWER_CHUNKS_JOIN_SIZE = 1024
+
+
 class TaskState(BaseModel):
     """
     TaskState entity
@@ -41,13 +45,48 @@ class EasyUITaskState(TaskState):
 
     llm_result: LLMResult
 
+    # streamed deltas not yet joined into llm_result.message.content
+    answer_chunks: list[str] = Field(default_factory=list, exclude=True)
+
+    def append_answer(self, text: str):
+        self.answer_chunks.append(text)
+        if len(self.answer_chunks) >= ANSWER_CHUNKS_JOIN_SIZE:
+            self.flush_answer()
+
+    def flush_answer(self):
+        """
+        Join the streamed deltas into llm_result.message.content,
+        must be called before it is read or replaced.
+        """
+        if self.answer_chunks:
+            content = cast(str, self.llm_result.message.content or "")
+            self.llm_result.message.content = content + "".join(self.answer_chunks)
+            self.answer_chunks.clear()
+
 
 class WorkflowTaskState(TaskState):
     """
     WorkflowTaskState entity
     """
 
-    answer: str = ""
+    # streamed deltas are kept in a list and only joined when the answer is read,
+    # appending to a str attribute copies the whole answer on every token
+    answer_chunks: list[str] = Field(default_factory=list, exclude=True)
+
+    @property
+    def answer(self) -> str:
+        if len(self.answer_chunks) > 1:
+            self.answer_chunks[:] = ["".join(self.answer_chunks)]
+        return self.answer_chunks[0] if self.answer_chunks else ""
+
+    @answer.setter
+    def answer(self, value: str):
+        self.answer_chunks = [value] if value else []
+
+    def append_answer(self, text: str):
+        self.answer_chunks.append(text)
+        if len(self.answer_chunks) >= ANSWER_CHUNKS_JOIN_SIZE:
+            self.answer_chunks[:] = ["".join(self.answer_chunks)]
 
 
 class StreamEvent(StrEnum):
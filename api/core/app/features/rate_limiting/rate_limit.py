@@ -10,13 +10,50 @@ from extensions.ext_redis import redis_client
 
 logger = logging.getLogger(__name__)
 
+# KEYS: active requests, max active requests
+# ARGV: now, max alive time, local max active requests, use local max active requests, ttl
+# returns the max active requests in effect
+_FLUSH_SCRIPT = """
+local max_active_requests = redis.call('GET', KEYS[2])
+if ARGV[4] == '1' or not max_active_requests then
+    max_active_requests = ARGV[3]
+    redis.call('SET', KEYS[2], max_active_requests, 'EX', ARGV[5])
+else
+    redis.call('EXPIRE', KEYS[2], ARGV[5])
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return tonumber(max_active_requests)
+"""
+
+# KEYS: active requests, max active requests
+# ARGV: now, max alive time, request id, local max active requests, ttl
+# the local max active requests is the app's current limit, it replaces a different published value
+# returns {1 if the request is admitted else 0, max active requests in effect}
+_ENTER_SCRIPT = """
+local max_active_requests = ARGV[4]
+if redis.call('GET', KEYS[2]) ~= max_active_requests then
+    redis.call('SET', KEYS[2], max_active_requests, 'EX', ARGV[5])
+end
+max_active_requests = tonumber(max_active_requests)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= max_active_requests then
+    return {0, max_active_requests}
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return {1, max_active_requests}
+"""
+
 
 class RateLimit:
-    _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:max_active_requests"
-    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{}:active_requests"
+    # both keys share the client id as hash tag, so the scripts can use them on Redis Cluster
+    _MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{{{}}}:max_active_requests"
+    # sorted set of the in-transit requests scored by the time they entered
+    _ACTIVE_REQUESTS_KEY = "dify:rate_limit:{{{}}}:active_requests"
     _UNLIMITED_REQUEST_ID = "unlimited_request_id"
     _REQUEST_MAX_ALIVE_TIME = 10 * 60  # 10 minutes
-    _ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL = 5 * 60  # recalculate request_count from request_detail every 5 minutes
+    _KEY_TTL = int(timedelta(days=1).total_seconds())
     _instance_dict: dict[str, "RateLimit"] = {}
 
     def __new__(cls, client_id: str, max_active_requests: int):
@@ -36,54 +73,60 @@ class RateLimit:
         self.client_id = client_id
         self.active_requests_key = self._ACTIVE_REQUESTS_KEY.format(client_id)
         self.max_active_requests_key = self._MAX_ACTIVE_REQUESTS_KEY.format(client_id)
-        self.last_recalculate_time = float("-inf")
+        self._flush_script = redis_client.register_script(_FLUSH_SCRIPT)
+        self._enter_script = redis_client.register_script(_ENTER_SCRIPT)
         self.flush_cache(use_local_value=True)
 
     def flush_cache(self, use_local_value=False):
+        """
+        Publish (or with use_local_value=False, sync) the max active requests and drop
+        requests that outlived the max alive time
+        """
         if self.disabled():
             return
-        self.last_recalculate_time = time.time()
-        # flush max active requests
-        if use_local_value or not redis_client.exists(self.max_active_requests_key):
-            redis_client.setex(self.max_active_requests_key, timedelta(days=1), self.max_active_requests)
-        else:
-            self.max_active_requests = int(redis_client.get(self.max_active_requests_key).decode("utf-8"))
-            redis_client.expire(self.max_active_requests_key, timedelta(days=1))
-
-        # flush max active requests (in-transit request list)
-        if not redis_client.exists(self.active_requests_key):
-            return
-        request_details = redis_client.hgetall(self.active_requests_key)
-        redis_client.expire(self.active_requests_key, timedelta(days=1))
-        timeout_requests = [
-            k
-            for k, v in request_details.items()
-            if time.time() - float(v.decode("utf-8")) > RateLimit._REQUEST_MAX_ALIVE_TIME
-        ]
-        if timeout_requests:
-            redis_client.hdel(self.active_requests_key, *timeout_requests)
+        self.max_active_requests = int(
+            self._flush_script(
+                keys=[self.active_requests_key, self.max_active_requests_key],
+                args=[
+                    time.time(),
+                    RateLimit._REQUEST_MAX_ALIVE_TIME,
+                    self.max_active_requests,
+                    1 if use_local_value else 0,
+                    RateLimit._KEY_TTL,
+                ],
+            )
+        )
 
     def enter(self, request_id: str | None = None) -> str:
         if self.disabled():
             return RateLimit._UNLIMITED_REQUEST_ID
-        if time.time() - self.last_recalculate_time > RateLimit._ACTIVE_REQUESTS_COUNT_FLUSH_INTERVAL:
-            self.flush_cache()
         if not request_id:
             request_id = RateLimit.gen_request_key()
 
-        active_requests_count = redis_client.hlen(self.active_requests_key)
-        if active_requests_count >= self.max_active_requests:
+        # expiring stale requests, counting and admitting run as one script, so concurrent
+        # requests can not be admitted over the limit
+        admitted, max_active_requests = self._enter_script(
+            keys=[self.active_requests_key, self.max_active_requests_key],
+            args=[
+                time.time(),
+                RateLimit._REQUEST_MAX_ALIVE_TIME,
+                request_id,
+                self.max_active_requests,
+                RateLimit._KEY_TTL,
+            ],
+        )
+        self.max_active_requests = int(max_active_requests)
+        if not admitted:
             raise AppInvokeQuotaExceededError(
                 f"Too many requests. Please try again later. The current maximum concurrent requests allowed "
                 f"for {self.client_id} is {self.max_active_requests}."
             )
-        redis_client.hset(self.active_requests_key, request_id, str(time.time()))
         return request_id
 
     def exit(self, request_id: str):
         if request_id == RateLimit._UNLIMITED_REQUEST_ID:
             return
-        redis_client.hdel(self.active_requests_key, request_id)
+        redis_client.zrem(self.active_requests_key, request_id)
 
     def disabled(self):
         return self.max_active_requests <= 0
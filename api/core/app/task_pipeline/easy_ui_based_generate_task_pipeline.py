@@ -271,6 +271,7 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
                 yield self.error_to_stream_response(err)
                 break
             elif isinstance(event, QueueStopEvent | QueueMessageEndEvent):
+                self._task_state.flush_answer()
                 if isinstance(event, QueueMessageEndEvent):
                     if event.llm_result:
                         self._task_state.llm_result = event.llm_result
@@ -298,6 +299,7 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
             elif isinstance(event, QueueAnnotationReplyEvent):
                 annotation = self._message_cycle_manager.handle_annotation_reply(event)
                 if annotation:
+                    self._task_state.flush_answer()
                     self._task_state.llm_result.message.content = annotation.content
             elif isinstance(event, QueueAgentThoughtEvent):
                 agent_thought_response = self._agent_thought_to_stream_response(event)
@@ -338,9 +340,7 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
                 if should_direct_answer:
                     continue
 
-                current_content = cast(str, self._task_state.llm_result.message.content)
-                current_content += cast(str, delta_text)
-                self._task_state.llm_result.message.content = current_content
+                self._task_state.append_answer(cast(str, delta_text))
 
                 if isinstance(event, QueueLLMChunkEvent):
                     yield self._message_cycle_manager.message_to_stream_response(
@@ -502,6 +502,7 @@ class EasyUIBasedGenerateTaskPipeline(BasedGenerateTaskPipeline):
         if self.output_moderation_handler:
             if self.output_moderation_handler.should_direct_output():
                 # stop subscribe new token when output moderation should direct output
+                self._task_state.flush_answer()
                 self._task_state.llm_result.message.content = self.output_moderation_handler.get_final_output()
                 self.queue_manager.publish(
                     QueueLLMChunkEvent(
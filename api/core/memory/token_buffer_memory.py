@@ -1,6 +1,10 @@
+import logging
 from collections.abc import Sequence
 
+import sqlalchemy as sa
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
 from core.file import file_manager
@@ -17,9 +21,12 @@ from core.model_runtime.entities.message_entities import PromptMessageContentUni
 from core.prompt.utils.extract_thread_messages import extract_thread_messages
 from extensions.ext_database import db
 from factories import file_factory
-from models.model import AppMode, Conversation, Message, MessageFile
+from models.enums import MessageStatus
+from models.model import AppMode, Conversation, Message, MessageFile, MessageTokenCount
 from models.workflow import Workflow, WorkflowRun
 
+logger = logging.getLogger(__name__)
+
 
 class TokenBufferMemory:
     def __init__(
@@ -103,10 +110,25 @@ class TokenBufferMemory:
         :param message_limit: message limit
         """
         app_record = self.conversation.app
+        tokenizer = f"{self.model_instance.provider}/{self.model_instance.model}"
 
-        # fetch limited messages, and return reversed
+        # fetch limited messages, with only the columns needed to extract the thread (the first
+        # character of the answer is enough to tell whether it is empty) and the stored token counts
         stmt = (
-            select(Message).where(Message.conversation_id == self.conversation.id).order_by(Message.created_at.desc())
+            select(
+                Message.id,
+                Message.parent_message_id,
+                sa.func.substr(Message.answer, 1, 1).label("answer"),
+                Message.answer_tokens,
+                MessageTokenCount.query_tokens.label("stored_query_tokens"),
+                MessageTokenCount.answer_tokens.label("stored_answer_tokens"),
+            )
+            .outerjoin(
+                MessageTokenCount,
+                sa.and_(MessageTokenCount.message_id == Message.id, MessageTokenCount.tokenizer == tokenizer),
+            )
+            .where(Message.conversation_id == self.conversation.id)
+            .order_by(Message.created_at.desc())
         )
 
         if message_limit and message_limit > 0:
@@ -116,70 +138,125 @@ class TokenBufferMemory:
 
         msg_limit_stmt = stmt.limit(message_limit)
 
-        messages = db.session.scalars(msg_limit_stmt).all()
+        messages = db.session.execute(msg_limit_stmt).all()
 
         # instead of all messages from the conversation, we only need to extract messages
         # that belong to the thread of last message
-        thread_messages = extract_thread_messages(messages)
+        thread_messages = extract_thread_messages(messages)  # type: ignore[arg-type]
 
         # for newly created message, its answer is temporarily empty, we don't need to add it to memory
         if thread_messages and not thread_messages[0].answer and thread_messages[0].answer_tokens == 0:
             thread_messages.pop(0)
 
-        messages = list(reversed(thread_messages))
-
+        # walk backwards from the newest message summing up the token counts of each message, only
+        # messages without stored counts for this tokenizer are built and counted, and their counts
+        # are stored, so every message is tokenized once per tokenizer
         curr_message_tokens = 0
+        selected: list[tuple[str, bool]] = []  # message id, whether the query is kept too
+        built_prompt_messages: dict[str, tuple[PromptMessage, PromptMessage]] = {}
+        new_token_counts: list[dict] = []
+        for thread_message in thread_messages:
+            query_tokens = thread_message.stored_query_tokens
+            answer_tokens = thread_message.stored_answer_tokens
+            if query_tokens is None or answer_tokens is None:
+                message = db.session.get_one(Message, thread_message.id)
+                user_prompt_message, assistant_prompt_message = self._build_prompt_messages(message, app_record)
+                built_prompt_messages[message.id] = (user_prompt_message, assistant_prompt_message)
+                query_tokens = self.model_instance.get_llm_num_tokens([user_prompt_message])
+                answer_tokens = self.model_instance.get_llm_num_tokens([assistant_prompt_message])
+                # stored counts are never updated, so only store them for messages whose answer is
+                # final, a message still being generated has no answer yet and a failed one may
+                # have a partial answer
+                if message.answer and message.status == MessageStatus.NORMAL:
+                    new_token_counts.append(
+                        {
+                            "conversation_id": self.conversation.id,
+                            "message_id": message.id,
+                            "tokenizer": tokenizer,
+                            "query_tokens": query_tokens,
+                            "answer_tokens": answer_tokens,
+                        }
+                    )
+
+            if curr_message_tokens + query_tokens + answer_tokens <= max_token_limit:
+                selected.append((thread_message.id, True))
+                curr_message_tokens += query_tokens + answer_tokens
+                continue
+
+            # the newest answer is always kept, an older one only if it fits on its own
+            if not selected or curr_message_tokens + answer_tokens <= max_token_limit:
+                selected.append((thread_message.id, False))
+            break
+
+        self._save_token_counts(new_token_counts)
+
+        # build the selected messages which were not built for counting
+        unbuilt_message_ids = [message_id for message_id, _ in selected if message_id not in built_prompt_messages]
+        if unbuilt_message_ids:
+            for message in db.session.scalars(select(Message).where(Message.id.in_(unbuilt_message_ids))):
+                built_prompt_messages[message.id] = self._build_prompt_messages(message, app_record)
+
         prompt_messages: list[PromptMessage] = []
-        for message in messages:
-            # Process user message with files
-            user_files = db.session.scalars(
-                select(MessageFile).where(
-                    MessageFile.message_id == message.id,
-                    (MessageFile.belongs_to == "user") | (MessageFile.belongs_to.is_(None)),
-                )
-            ).all()
-
-            if user_files:
-                user_prompt_message = self._build_prompt_message_with_files(
-                    message_files=user_files,
-                    text_content=message.query,
-                    message=message,
-                    app_record=app_record,
-                    is_user_message=True,
-                )
+        for message_id, keep_query in reversed(selected):
+            user_prompt_message, assistant_prompt_message = built_prompt_messages[message_id]
+            if keep_query:
                 prompt_messages.append(user_prompt_message)
-            else:
-                prompt_messages.append(UserPromptMessage(content=message.query))
-
-            # Process assistant message with files
-            assistant_files = db.session.scalars(
-                select(MessageFile).where(MessageFile.message_id == message.id, MessageFile.belongs_to == "assistant")
-            ).all()
-
-            if assistant_files:
-                assistant_prompt_message = self._build_prompt_message_with_files(
-                    message_files=assistant_files,
-                    text_content=message.answer,
-                    message=message,
-                    app_record=app_record,
-                    is_user_message=False,
-                )
-                prompt_messages.append(assistant_prompt_message)
-            else:
-                prompt_messages.append(AssistantPromptMessage(content=message.answer))
+            prompt_messages.append(assistant_prompt_message)
 
-        if not prompt_messages:
-            return []
+        return prompt_messages
+
+    @staticmethod
+    def _save_token_counts(token_counts: list[dict]):
+        """
+        Store the token counts of messages, counts stored concurrently for the same message are kept.
+        :param token_counts: message token count rows
+        """
+        if not token_counts:
+            return
+        try:
+            with Session(db.engine) as session:
+                stmt = insert(MessageTokenCount).values(token_counts)
+                session.execute(stmt.on_conflict_do_nothing(index_elements=["message_id", "tokenizer"]))
+                session.commit()
+        except Exception:
+            logger.exception("Failed to save message token counts")
+
+    def _build_prompt_messages(self, message: Message, app_record) -> tuple[PromptMessage, PromptMessage]:
+        """
+        Build the user and assistant prompt messages of a message.
+        :param message: Message object
+        :param app_record: app record
+        :return: user prompt message, assistant prompt message
+        """
+        message_files = db.session.scalars(select(MessageFile).where(MessageFile.message_id == message.id)).all()
+        user_files = [message_file for message_file in message_files if message_file.belongs_to in {None, "user"}]
+        assistant_files = [message_file for message_file in message_files if message_file.belongs_to == "assistant"]
 
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        user_prompt_message: PromptMessage
+        if user_files:
+            user_prompt_message = self._build_prompt_message_with_files(
+                message_files=user_files,
+                text_content=message.query,
+                message=message,
+                app_record=app_record,
+                is_user_message=True,
+            )
+        else:
+            user_prompt_message = UserPromptMessage(content=message.query)
 
-        if curr_message_tokens > max_token_limit:
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                prompt_messages.pop(0)
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+        assistant_prompt_message: PromptMessage
+        if assistant_files:
+            assistant_prompt_message = self._build_prompt_message_with_files(
+                message_files=assistant_files,
+                text_content=message.answer,
+                message=message,
+                app_record=app_record,
+                is_user_message=False,
+            )
+        else:
+            assistant_prompt_message = AssistantPromptMessage(content=message.answer)
 
-        return prompt_messages
+        return user_prompt_message, assistant_prompt_message
 
     def get_history_prompt_text(
         self,
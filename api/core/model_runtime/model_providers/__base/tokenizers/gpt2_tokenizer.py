@@ -1,12 +1,25 @@
+import hashlib
 import logging
 from threading import Lock
 from typing import Any
 
+from cachetools import LRUCache
+
 logger = logging.getLogger(__name__)
 
 _tokenizer: Any | None = None
 _lock = Lock()
 
+# token counts of recently seen texts, keyed by the digest of the text, the same prompt fragments
+# (history messages, context chunks) are counted over and over again
+TOKEN_COUNT_CACHE_SIZE = 8192
+_token_count_cache: LRUCache[bytes, int] = LRUCache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+_token_count_cache_lock = Lock()
+
+# threads used by tiktoken to encode a batch, smaller batches are not worth starting the thread pool for
+BATCH_ENCODE_THREADS = 8
+BATCH_ENCODE_MIN_SIZE = 16
+
 
 class GPT2Tokenizer:
     @staticmethod
@@ -25,7 +38,41 @@ class GPT2Tokenizer:
         # future = _executor.submit(GPT2Tokenizer._get_num_tokens_by_gpt2, text)
         # result = future.result()
         # return cast(int, result)
-        return GPT2Tokenizer._get_num_tokens_by_gpt2(text)
+        key = GPT2Tokenizer._token_count_key(text)
+        with _token_count_cache_lock:
+            num_tokens = _token_count_cache.get(key)
+        if num_tokens is None:
+            num_tokens = GPT2Tokenizer._get_num_tokens_by_gpt2(text)
+            with _token_count_cache_lock:
+                _token_count_cache[key] = num_tokens
+        return num_tokens
+
+    @staticmethod
+    def get_num_tokens_batch(texts: list[str]) -> list[int]:
+        """
+        Get num tokens of each text, the texts missing from the token count cache are encoded as one batch
+        """
+        keys = [GPT2Tokenizer._token_count_key(text) for text in texts]
+        with _token_count_cache_lock:
+            num_tokens: dict[bytes, int] = {key: n for key in keys if (n := _token_count_cache.get(key)) is not None}
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in num_tokens}
+        if missing:
+            tokenizer = GPT2Tokenizer.get_encoder()
+            if len(missing) >= BATCH_ENCODE_MIN_SIZE and hasattr(tokenizer, "encode_batch"):
+                encoded = tokenizer.encode_batch(list(missing.values()), num_threads=BATCH_ENCODE_THREADS)
+            else:
+                encoded = [tokenizer.encode(text) for text in missing.values()]
+            missing_num_tokens = {key: len(tokens) for key, tokens in zip(missing, encoded)}
+            with _token_count_cache_lock:
+                _token_count_cache.update(missing_num_tokens)
+            num_tokens.update(missing_num_tokens)
+
+        return [num_tokens[key] for key in keys]
+
+    @staticmethod
+    def _token_count_key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
 
     @staticmethod
     def get_encoder():
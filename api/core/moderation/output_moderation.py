@@ -4,7 +4,7 @@ import time
 from typing import Any
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
@@ -29,11 +29,18 @@ class OutputModeration(BaseModel):
 
     thread: threading.Thread | None = None
     thread_running: bool = True
-    buffer: str = ""
     is_final_chunk: bool = False
     final_output: str | None = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # tokens are appended by the task pipeline and only joined when the worker moderates them
+    buffer_chunks: list[str] = Field(default_factory=list)
+    buffer_length: int = 0
+
+    @property
+    def buffer(self) -> str:
+        return "".join(self.buffer_chunks)
+
     def should_direct_output(self) -> bool:
         return self.final_output is not None
 
@@ -41,13 +48,15 @@ class OutputModeration(BaseModel):
         return self.final_output or ""
 
     def append_new_token(self, token: str):
-        self.buffer += token
+        self.buffer_chunks.append(token)
+        self.buffer_length += len(token)
 
         if not self.thread:
             self.thread = self.start_thread()
 
     def moderation_completion(self, completion: str, public_event: bool = False) -> tuple[str, bool]:
-        self.buffer = completion
+        self.buffer_chunks = [completion]
+        self.buffer_length = len(completion)
         self.is_final_chunk = True
 
         result = self.moderation(tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=completion)
@@ -92,15 +101,14 @@ class OutputModeration(BaseModel):
         with flask_app.app_context():
             current_length = 0
             while self.thread_running:
-                moderation_buffer = self.buffer
-                buffer_length = len(moderation_buffer)
                 if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
+                    chunk_length = self.buffer_length - current_length
                     if 0 <= chunk_length < buffer_size:
                         time.sleep(1)
                         continue
 
-                current_length = buffer_length
+                moderation_buffer = self.buffer
+                current_length = len(moderation_buffer)
 
                 result = self.moderation(
                     tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
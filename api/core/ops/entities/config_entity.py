@@ -196,4 +196,5 @@ class AliyunConfig(BaseTracingConfig):
 
 
 OPS_FILE_PATH = "ops_trace/"
+OPS_TRACE_BATCH_KEY_PREFIX = "ops_trace_batch:"
 OPS_TRACE_FAILED_KEY = "FAILED_OPS_TRACE"
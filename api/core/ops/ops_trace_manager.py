@@ -5,18 +5,22 @@ import os
 import queue
 import threading
 import time
+import zlib
 from datetime import timedelta
 from typing import TYPE_CHECKING, Any, Optional, Union
 from uuid import UUID, uuid4
 
 from cachetools import LRUCache
 from flask import current_app
+from opentelemetry.metrics import get_meter
+from pydantic import TypeAdapter
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
 from core.ops.entities.config_entity import (
     OPS_FILE_PATH,
+    OPS_TRACE_BATCH_KEY_PREFIX,
     TracingProviderEnum,
 )
 from core.ops.entities.trace_entity import (
@@ -32,6 +36,7 @@ from core.ops.entities.trace_entity import (
 )
 from core.ops.utils import get_message_data
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
@@ -827,9 +832,33 @@ class TraceTask:
 
 
 trace_manager_timer: threading.Timer | None = None
-trace_manager_queue: queue.Queue = queue.Queue()
 trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
 trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
+trace_manager_max_size = int(os.getenv("TRACE_QUEUE_MANAGER_MAX_SIZE", 10000))
+# hand a whole batch over as one compressed Redis entry and one celery task instead of
+# one storage file and one celery task per trace. Off by default, since ops_trace workers
+# running older code cannot process batches; enable it once all workers are upgraded.
+trace_manager_batched = os.getenv("TRACE_QUEUE_MANAGER_BATCHED", "false").lower() == "true"
+trace_manager_queue: queue.Queue = queue.Queue(maxsize=trace_manager_max_size)
+
+# seconds a batch is kept in Redis for the ops_trace workers to pick it up
+TRACE_BATCH_TTL = 24 * 60 * 60
+
+_task_data_list_adapter = TypeAdapter(list[TaskData])
+
+_meter = get_meter("ops_trace")
+_dropped_trace_tasks = _meter.create_counter(
+    "trace_queue.dropped",
+    description="Trace tasks dropped because the trace queue was full",
+)
+_sent_trace_tasks = _meter.create_counter(
+    "trace_queue.sent",
+    description="Trace tasks handed over to the ops_trace workers",
+)
+_sent_trace_batches = _meter.create_counter(
+    "trace_queue.batches",
+    description="Celery tasks sent for trace tasks",
+)
 
 
 class TraceQueueManager:
@@ -848,7 +877,10 @@ class TraceQueueManager:
         try:
             if self.trace_instance:
                 trace_task.app_id = self.app_id
-                trace_manager_queue.put(trace_task)
+                trace_manager_queue.put_nowait(trace_task)
+        except queue.Full:
+            _dropped_trace_tasks.add(1)
+            logger.warning("Trace queue is full, dropping trace task, trace_type %s", trace_task.trace_type)
         except Exception:
             logger.exception("Error adding trace task, trace_type %s", trace_task.trace_type)
         finally:
@@ -865,8 +897,8 @@ class TraceQueueManager:
 
     def run(self):
         try:
-            tasks = self.collect_tasks()
-            if tasks:
+            # drain the queue, so the throughput is not limited to one batch per interval
+            while tasks := self.collect_tasks():
                 self.send_to_celery(tasks)
         except Exception:
             logger.exception("Error processing trace tasks")
@@ -880,6 +912,10 @@ class TraceQueueManager:
             trace_manager_timer.start()
 
     def send_to_celery(self, tasks: list[TraceTask]):
+        if trace_manager_batched:
+            self.send_batch_to_celery(tasks)
+            return
+
         with self.flask_app.app_context():
             for task in tasks:
                 if task.app_id is None:
@@ -898,3 +934,33 @@ class TraceQueueManager:
                     "app_id": task.app_id,
                 }
                 process_trace_tasks.delay(file_info)
+                _sent_trace_tasks.add(1)
+                _sent_trace_batches.add(1)
+
+    def send_batch_to_celery(self, tasks: list[TraceTask]):
+        with self.flask_app.app_context():
+            task_data_list = []
+            for task in tasks:
+                if task.app_id is None:
+                    continue
+                try:
+                    trace_info = task.execute()
+                except Exception:
+                    logger.exception("Error executing trace task, trace_type %s", task.trace_type)
+                    continue
+                task_data_list.append(
+                    TaskData(
+                        app_id=task.app_id,
+                        trace_info_type=type(trace_info).__name__,
+                        trace_info=trace_info.model_dump() if trace_info else None,
+                    )
+                )
+            if not task_data_list:
+                return
+
+            batch_id = uuid4().hex
+            payload = zlib.compress(_task_data_list_adapter.dump_json(task_data_list))
+            redis_client.setex(f"{OPS_TRACE_BATCH_KEY_PREFIX}{batch_id}", TRACE_BATCH_TTL, payload)
+            process_trace_tasks.delay({"batch_id": batch_id})
+            _sent_trace_tasks.add(len(task_data_list))
+            _sent_trace_batches.add(1)
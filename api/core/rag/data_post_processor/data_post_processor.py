@@ -2,6 +2,7 @@ from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.errors.invoke import InvokeAuthorizationError
 from core.rag.data_post_processor.reorder import ReorderRunner
+from core.rag.embedding.query_embeddings import QueryEmbeddings
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
 from core.rag.rerank.rerank_base import BaseRerankRunner
@@ -19,8 +20,11 @@ class DataPostProcessor:
         reranking_model: dict | None = None,
         weights: dict | None = None,
         reorder_enabled: bool = False,
+        query_embeddings: QueryEmbeddings | None = None,
     ):
-        self.rerank_runner = self._get_rerank_runner(reranking_mode, tenant_id, reranking_model, weights)
+        self.rerank_runner = self._get_rerank_runner(
+            reranking_mode, tenant_id, reranking_model, weights, query_embeddings
+        )
         self.reorder_runner = self._get_reorder_runner(reorder_enabled)
 
     def invoke(
@@ -45,6 +49,7 @@ class DataPostProcessor:
         tenant_id: str,
         reranking_model: dict | None = None,
         weights: dict | None = None,
+        query_embeddings: QueryEmbeddings | None = None,
     ) -> BaseRerankRunner | None:
         if reranking_mode == RerankMode.WEIGHTED_SCORE.value and weights:
             runner = RerankRunnerFactory.create_rerank_runner(
@@ -60,6 +65,7 @@ class DataPostProcessor:
                         keyword_weight=weights["keyword_setting"]["keyword_weight"],
                     ),
                 ),
+                query_embeddings=query_embeddings,
             )
             return runner
         elif reranking_mode == RerankMode.RERANKING_MODEL.value:
@@ -1,7 +1,10 @@
+import threading
+import uuid
 from collections import defaultdict
 from typing import Any
 
 import orjson
+from cachetools import LRUCache
 from pydantic import BaseModel
 from sqlalchemy import select
 
@@ -19,6 +22,15 @@ class KeywordTableConfig(BaseModel):
     max_keywords_per_chunk: int = 10
 
 
+# Parsed keyword tables used by search, keyed by dataset id and stored with the version stamp
+# they were loaded at. The stamp lives in Redis and changes on every save, so all processes
+# drop their copy as soon as any of them writes the table.
+_keyword_table_cache: LRUCache[str, tuple[str, dict[str, set[str]]]] = LRUCache(
+    maxsize=max(dify_config.KEYWORD_TABLE_CACHE_SIZE, 1)
+)
+_keyword_table_cache_lock = threading.Lock()
+
+
 class Jieba(BaseKeyword):
     def __init__(self, dataset: Dataset):
         super().__init__(dataset)
@@ -68,10 +80,10 @@ class Jieba(BaseKeyword):
             self._save_dataset_keyword_table(keyword_table)
 
     def text_exists(self, id: str) -> bool:
-        keyword_table = self._get_dataset_keyword_table()
-        if keyword_table is None:
+        keyword_table = self._get_cached_dataset_keyword_table()
+        if not keyword_table:
             return False
-        return id in set.union(*keyword_table.values())
+        return any(id in node_idxs for node_idxs in keyword_table.values())
 
     def delete_by_ids(self, ids: list[str]):
         lock_name = f"keyword_indexing_lock_{self.dataset.id}"
@@ -83,7 +95,7 @@ class Jieba(BaseKeyword):
             self._save_dataset_keyword_table(keyword_table)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
-        keyword_table = self._get_dataset_keyword_table()
+        keyword_table = self._get_cached_dataset_keyword_table()
 
         k = kwargs.get("top_k", 4)
         document_ids_filter = kwargs.get("document_ids_filter")
@@ -120,6 +132,7 @@ class Jieba(BaseKeyword):
             if dataset_keyword_table:
                 db.session.delete(dataset_keyword_table)
                 db.session.commit()
+                self._bump_keyword_table_version()
                 if dataset_keyword_table.data_source_type != "database":
                     file_key = "keyword_files/" + self.dataset.tenant_id + "/" + self.dataset.id + ".txt"
                     storage.delete(file_key)
@@ -139,6 +152,49 @@ class Jieba(BaseKeyword):
             if storage.exists(file_key):
                 storage.delete(file_key)
             storage.save(file_key, dumps_with_sets(keyword_table_dict).encode("utf-8"))
+        self._bump_keyword_table_version()
+
+    def _keyword_table_version_key(self) -> str:
+        return f"keyword_table_version:{self.dataset.id}"
+
+    def _bump_keyword_table_version(self):
+        redis_client.set(self._keyword_table_version_key(), uuid.uuid4().hex)
+
+    def _get_keyword_table_version(self) -> str | None:
+        version_key = self._keyword_table_version_key()
+        version = redis_client.get(version_key)
+        if version is None:
+            # Stamp missing (first read or Redis was flushed), start a new version
+            redis_client.set(version_key, uuid.uuid4().hex, nx=True)
+            version = redis_client.get(version_key)
+        if isinstance(version, bytes):
+            return version.decode("utf-8")
+        return version
+
+    def _get_cached_dataset_keyword_table(self) -> dict | None:
+        """
+        Read-only variant of `_get_dataset_keyword_table` for search.
+
+        Returns the process-wide parsed table while its version stamp is current. The result
+        is shared between callers and must not be modified.
+        """
+        if dify_config.KEYWORD_TABLE_CACHE_SIZE <= 0:
+            return self._get_dataset_keyword_table()
+
+        version = self._get_keyword_table_version()
+        if version is None:
+            return self._get_dataset_keyword_table()
+
+        with _keyword_table_cache_lock:
+            cached = _keyword_table_cache.get(self.dataset.id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        keyword_table = self._get_dataset_keyword_table()
+        if keyword_table is not None:
+            with _keyword_table_cache_lock:
+                _keyword_table_cache[self.dataset.id] = (version, keyword_table)
+        return keyword_table
 
     def _get_dataset_keyword_table(self) -> dict | None:
         dataset_keyword_table = self.dataset.dataset_keyword_table
@@ -195,7 +251,7 @@ class Jieba(BaseKeyword):
 
         # go through text chunks in order of most matching keywords
         chunk_indices_count: dict[str, int] = defaultdict(int)
-        keywords_list = [keyword for keyword in keywords if keyword in set(keyword_table.keys())]
+        keywords_list = [keyword for keyword in keywords if keyword in keyword_table]
         for keyword in keywords_list:
             for node_id in keyword_table[keyword]:
                 chunk_indices_count[node_id] += 1
@@ -0,0 +1,152 @@
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import DatasetKeywordPosting, DocumentSegment
+
+# Max number of postings written by one INSERT statement
+POSTINGS_INSERT_BATCH_SIZE = 1000
+
+
+class JiebaInvertedIndex(Jieba):
+    """
+    Jieba keyword index stored as one row per (keyword, segment) posting.
+
+    Unlike `Jieba`, which keeps the whole dataset keyword table in a single JSON blob that
+    is loaded and rewritten on every change, adding or deleting segments only touches
+    their own postings, and a search only reads the postings of the query keywords.
+    """
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get("keywords_list")
+        keyword_number = self.dataset.keyword_number or self._config.max_keywords_per_chunk
+
+        node_keywords: dict[str, list[str]] = {}
+        for i, text in enumerate(texts):
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(text.page_content, keyword_number)
+            if text.metadata is not None:
+                self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                node_keywords[text.metadata["doc_id"]] = list(keywords)
+
+        self._add_postings(node_keywords)
+
+    def text_exists(self, id: str) -> bool:
+        stmt = select(DatasetKeywordPosting.id).where(
+            DatasetKeywordPosting.dataset_id == self.dataset.id,
+            DatasetKeywordPosting.index_node_id == id,
+        )
+        return db.session.scalar(stmt.limit(1)) is not None
+
+    def delete_by_ids(self, ids: list[str]):
+        if not ids:
+            return
+        db.session.execute(
+            delete(DatasetKeywordPosting).where(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.index_node_id.in_(ids),
+            )
+        )
+        db.session.commit()
+
+    def delete(self):
+        db.session.execute(delete(DatasetKeywordPosting).where(DatasetKeywordPosting.dataset_id == self.dataset.id))
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        document_ids_filter = kwargs.get("document_ids_filter")
+        sorted_chunk_indices = self._retrieve_ids_by_keywords(query, k)
+        if not sorted_chunk_indices:
+            return []
+
+        segment_stmt = select(DocumentSegment).where(
+            DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(sorted_chunk_indices)
+        )
+        if document_ids_filter:
+            segment_stmt = segment_stmt.where(DocumentSegment.document_id.in_(document_ids_filter))
+        segments = {segment.index_node_id: segment for segment in db.session.scalars(segment_stmt)}
+
+        documents = []
+        for chunk_index in sorted_chunk_indices:
+            segment = segments.get(chunk_index)
+            if segment:
+                documents.append(
+                    Document(
+                        page_content=segment.content,
+                        metadata={
+                            "doc_id": chunk_index,
+                            "doc_hash": segment.index_node_hash,
+                            "document_id": segment.document_id,
+                            "dataset_id": segment.dataset_id,
+                        },
+                    )
+                )
+
+        return documents
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segment_keywords(self.dataset.id, node_id, keywords)
+        self._add_postings({node_id: keywords})
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keyword_number = self.dataset.keyword_number or self._config.max_keywords_per_chunk
+
+        node_keywords: dict[str, list[str]] = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data["segment"]
+            keywords = pre_segment_data["keywords"]
+            if not keywords:
+                keywords = list(keyword_table_handler.extract_keywords(segment.content, keyword_number))
+            segment.keywords = keywords
+            node_keywords[segment.index_node_id] = keywords
+
+        self._add_postings(node_keywords)
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        self._add_postings({node_id: keywords})
+
+    def _add_postings(self, node_keywords: dict[str, list[str]]):
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in node_keywords.items()
+            for keyword in set(keywords)
+        ]
+        for i in range(0, len(rows), POSTINGS_INSERT_BATCH_SIZE):
+            stmt = insert(DatasetKeywordPosting).values(rows[i : i + POSTINGS_INSERT_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            db.session.execute(stmt)
+        db.session.commit()
+
+    def _retrieve_ids_by_keywords(self, query: str, k: int = 4) -> list[str]:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = keyword_table_handler.extract_keywords(query)
+        if not keywords:
+            return []
+
+        # go through text chunks in order of most matching keywords
+        match_count = func.count(DatasetKeywordPosting.keyword)
+        stmt = (
+            select(DatasetKeywordPosting.index_node_id)
+            .where(
+                DatasetKeywordPosting.dataset_id == self.dataset.id,
+                DatasetKeywordPosting.keyword.in_(keywords),
+            )
+            .group_by(DatasetKeywordPosting.index_node_id)
+            .order_by(match_count.desc())
+            .limit(k)
+        )
+        return list(db.session.scalars(stmt))
@@ -3,6 +3,7 @@ from typing import Any
 from configs import dify_config
 from core.rag.datasource.keyword.keyword_base import BaseKeyword
 from core.rag.datasource.keyword.keyword_type import KeyWordType
+from core.rag.datasource.retrieval_cache import invalidate_retrieval_cache
 from core.rag.models.document import Document
 from models.dataset import Dataset
 
@@ -24,23 +25,31 @@ class Keyword:
                 from core.rag.datasource.keyword.jieba.jieba import Jieba
 
                 return Jieba
+            case KeyWordType.JIEBA_INVERTED_INDEX:
+                from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+                return JiebaInvertedIndex
             case _:
                 raise ValueError(f"Keyword store {keyword_type} is not supported.")
 
     def create(self, texts: list[Document], **kwargs):
         self._keyword_processor.create(texts, **kwargs)
+        invalidate_retrieval_cache(self._dataset.id)
 
     def add_texts(self, texts: list[Document], **kwargs):
         self._keyword_processor.add_texts(texts, **kwargs)
+        invalidate_retrieval_cache(self._dataset.id)
 
     def text_exists(self, id: str) -> bool:
         return self._keyword_processor.text_exists(id)
 
     def delete_by_ids(self, ids: list[str]):
         self._keyword_processor.delete_by_ids(ids)
+        invalidate_retrieval_cache(self._dataset.id)
 
     def delete(self):
         self._keyword_processor.delete()
+        invalidate_retrieval_cache(self._dataset.id)
 
     def search(self, query: str, **kwargs: Any) -> list[Document]:
         return self._keyword_processor.search(query, **kwargs)
@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any
+
+from opentelemetry.metrics import get_meter
+from sqlalchemy import select
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import ChildChunk, Dataset, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+_retrieval_cache_counter = get_meter("retrieval").create_counter(
+    "retrieval.cache.lookups",
+    description="Retrieval result cache lookups by result",
+    unit="{lookup}",
+)
+
+
+def _version_key(dataset_id: str) -> str:
+    return f"retrieval_cache_version:{dataset_id}"
+
+
+def invalidate_retrieval_cache(dataset_id: str):
+    """
+    Start a new content version for the dataset, results cached for older versions are no
+    longer read and expire with their TTL.
+    """
+    try:
+        redis_client.set(_version_key(dataset_id), uuid.uuid4().hex)
+    except Exception:
+        logger.exception("Failed to invalidate retrieval cache of dataset %s", dataset_id)
+
+
+class RetrievalCacheEntry:
+    """
+    Cached ranked result of one retrieval, stored as (segment index node id, score) pairs in a
+    Redis hash per dataset content version.
+
+    A sorted set next to the hash records when each field was written, once the hash holds
+    `max_entries` results the oldest ones are evicted to make room for new ones.
+    """
+
+    def __init__(self, dataset_id: str, version: str, field: str, ttl: int, max_entries: int):
+        self.dataset_id = dataset_id
+        self.entries_key = f"retrieval_cache:{dataset_id}:{version}"
+        self.order_key = f"retrieval_cache_order:{dataset_id}:{version}"
+        self.field = field
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def load(self) -> list[Document] | None:
+        try:
+            cached = redis_client.hget(self.entries_key, self.field)
+        except Exception:
+            logger.exception("Failed to read retrieval cache of dataset %s", self.dataset_id)
+            cached = None
+
+        documents = self._load_documents(json.loads(cached)) if cached else None
+        _retrieval_cache_counter.add(1, {"result": "miss" if documents is None else "hit"})
+        return documents
+
+    def save(self, documents: list[Document]):
+        hits = []
+        for document in documents:
+            if document.provider != "dify" or not document.metadata or not document.metadata.get("doc_id"):
+                # only results that can be loaded back from the dataset segments are cached
+                return
+            score = document.metadata.get("score")
+            hits.append((document.metadata["doc_id"], float(score) if score is not None else None))
+
+        try:
+            redis_client.hset(self.entries_key, self.field, json.dumps(hits))
+            redis_client.zadd(self.order_key, {self.field: time.time()})
+            overflow = redis_client.zcard(self.order_key) - self.max_entries
+            if overflow > 0:
+                evicted = [field for field, _ in redis_client.zpopmin(self.order_key, overflow)]
+                if evicted:
+                    redis_client.hdel(self.entries_key, *evicted)
+            if redis_client.ttl(self.entries_key) < 0:
+                redis_client.expire(self.entries_key, self.ttl)
+                redis_client.expire(self.order_key, self.ttl)
+        except Exception:
+            logger.exception("Failed to save retrieval cache of dataset %s", self.dataset_id)
+
+    def _load_documents(self, hits: list[list[Any]]) -> list[Document] | None:
+        index_node_ids = [index_node_id for index_node_id, _ in hits]
+        nodes: dict[str, DocumentSegment | ChildChunk] = {}
+        if index_node_ids:
+            segment_stmt = select(DocumentSegment).where(
+                DocumentSegment.dataset_id == self.dataset_id, DocumentSegment.index_node_id.in_(index_node_ids)
+            )
+            nodes.update((segment.index_node_id, segment) for segment in db.session.scalars(segment_stmt))
+        child_index_node_ids = [index_node_id for index_node_id in index_node_ids if index_node_id not in nodes]
+        if child_index_node_ids:
+            child_chunk_stmt = select(ChildChunk).where(
+                ChildChunk.dataset_id == self.dataset_id, ChildChunk.index_node_id.in_(child_index_node_ids)
+            )
+            nodes.update(
+                (child_chunk.index_node_id, child_chunk) for child_chunk in db.session.scalars(child_chunk_stmt)
+            )
+
+        documents = []
+        for index_node_id, score in hits:
+            node = nodes.get(index_node_id)
+            if node is None:
+                # removed without going through the index, treat the entry as stale
+                return None
+            metadata = {
+                "doc_id": index_node_id,
+                "doc_hash": node.index_node_hash,
+                "document_id": node.document_id,
+                "dataset_id": node.dataset_id,
+            }
+            if score is not None:
+                metadata["score"] = score
+            documents.append(Document(page_content=node.content, metadata=metadata))
+        return documents
+
+
+def get_retrieval_cache_entry(dataset: Dataset, query: str, **retrieval_config: Any) -> RetrievalCacheEntry | None:
+    """
+    Return the cache entry of a retrieval on the dataset, or None if the dataset doesn't
+    enable the retrieval cache in its retrieval settings.
+
+    The entry is bound to the content version current at lookup, results of a search that
+    runs while the dataset is re-indexed are saved under the old version and never read.
+    """
+    cache_setting = (dataset.retrieval_model or {}).get("retrieval_cache") or {}
+    if not cache_setting.get("enabled"):
+        return None
+
+    try:
+        version_key = _version_key(dataset.id)
+        version = redis_client.get(version_key)
+        if version is None:
+            redis_client.set(version_key, uuid.uuid4().hex, nx=True)
+            version = redis_client.get(version_key)
+    except Exception:
+        logger.exception("Failed to read retrieval cache version of dataset %s", dataset.id)
+        return None
+    if version is None:
+        return None
+    if isinstance(version, bytes):
+        version = version.decode("utf-8")
+
+    normalized_query = " ".join(query.split())
+    key_source = json.dumps({"query": normalized_query, **retrieval_config}, sort_keys=True, default=str)
+    return RetrievalCacheEntry(
+        dataset_id=dataset.id,
+        version=version,
+        field=hashlib.sha256(key_source.encode("utf-8")).hexdigest(),
+        ttl=cache_setting.get("ttl") or dify_config.RETRIEVAL_CACHE_DEFAULT_TTL,
+        max_entries=cache_setting.get("max_entries") or dify_config.RETRIEVAL_CACHE_DEFAULT_MAX_ENTRIES,
+    )
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+from opentelemetry.metrics import get_meter
+
+from configs import dify_config
+
+_meter = get_meter("retrieval")
+_queue_depth = _meter.create_up_down_counter(
+    "retrieval.executor.queue_depth",
+    description="Retrieval searches waiting for a worker",
+    unit="{search}",
+)
+_wait_time = _meter.create_histogram(
+    "retrieval.executor.wait_time",
+    description="Time retrieval searches spend queued before a worker picks them up",
+    unit="s",
+)
+_timed_out = _meter.create_counter(
+    "retrieval.executor.timed_out",
+    description="Retrieval searches still pending (cancelled) or running (abandoned) when the caller stopped waiting",
+    unit="{search}",
+)
+
+
+@dataclass
+class _WorkItem:
+    future: Future
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded executor for retrieval searches.
+
+    Workers are started on demand up to `max_workers` and kept for the life of the process.
+    Work is queued per tenant and idle workers serve the tenants in turn, so a tenant
+    running many searches can't keep every worker busy while others wait. Under gevent,
+    `threading` is monkey-patched and the workers are greenlets.
+    """
+
+    def __init__(self, max_workers: int):
+        self._max_workers = max_workers
+        self._queues: OrderedDict[str, deque[_WorkItem]] = OrderedDict()
+        self._condition = threading.Condition()
+        self._workers: list[threading.Thread] = []
+        self._idle_workers = 0
+
+    def submit(self, tenant_id: str, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        with self._condition:
+            self._queues.setdefault(tenant_id, deque()).append(_WorkItem(future, fn, args, kwargs))
+            if self._idle_workers > 0:
+                # the woken worker is no longer idle, so further submits start or wake another one
+                self._idle_workers -= 1
+                self._condition.notify()
+            elif len(self._workers) < self._max_workers:
+                worker = threading.Thread(target=self._work, name=f"retrieval-worker-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+        _queue_depth.add(1)
+        return future
+
+    def cancel(self, futures: Iterable[Future]) -> int:
+        """
+        Cancel searches the caller no longer waits for, returns how many were cancelled.
+
+        Pending searches never run. Running ones can't be interrupted and finish in the
+        background, their results are discarded by the caller.
+        """
+        cancelled = 0
+        abandoned = 0
+        for future in futures:
+            if future.done():
+                continue
+            if future.cancel():
+                cancelled += 1
+            else:
+                abandoned += 1
+        if cancelled:
+            _timed_out.add(cancelled, {"state": "cancelled"})
+        if abandoned:
+            _timed_out.add(abandoned, {"state": "abandoned"})
+        return cancelled
+
+    def _next_item(self) -> _WorkItem:
+        with self._condition:
+            while not self._queues:
+                self._idle_workers += 1
+                self._condition.wait()
+            tenant_id, items = next(iter(self._queues.items()))
+            item = items.popleft()
+            if items:
+                # serve the other tenants before this one again
+                self._queues.move_to_end(tenant_id)
+            else:
+                del self._queues[tenant_id]
+        _queue_depth.add(-1)
+        return item
+
+    def _work(self):
+        while True:
+            item = self._next_item()
+            if not item.future.set_running_or_notify_cancel():
+                continue
+            _wait_time.record(time.perf_counter() - item.submitted_at)
+            try:
+                result = item.fn(*item.args, **item.kwargs)
+            except BaseException as e:
+                item.future.set_exception(e)
+            else:
+                item.future.set_result(result)
+
+
+retrieval_executor = RetrievalExecutor(max_workers=dify_config.RETRIEVAL_SERVICE_MAX_WORKERS)
@@ -1,14 +1,19 @@
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor
+import logging
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
 
 from flask import Flask, current_app
 from sqlalchemy import select
 from sqlalchemy.orm import Session, load_only
 
-from configs import dify_config
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.retrieval_cache import get_retrieval_cache_entry
+from core.rag.datasource.retrieval_executor import retrieval_executor
 from core.rag.datasource.vdb.vector_factory import Vector
+from core.rag.embedding.query_embeddings import QueryEmbeddings
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.entities.metadata_entities import MetadataCondition
 from core.rag.index_processor.constant.index_type import IndexType
@@ -20,6 +25,11 @@ from models.dataset import ChildChunk, Dataset, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the searches of one retrieval before returning what has finished
+RETRIEVAL_TIMEOUT = 30
+
 default_retrieval_model = {
     "search_method": RetrievalMethod.SEMANTIC_SEARCH.value,
     "reranking_enable": False,
@@ -43,6 +53,7 @@ class RetrievalService:
         reranking_mode: str = "reranking_model",
         weights: dict | None = None,
         document_ids_filter: list[str] | None = None,
+        query_embeddings: QueryEmbeddings | None = None,
     ):
         if not query:
             return []
@@ -50,65 +61,95 @@ class RetrievalService:
         if not dataset:
             return []
 
+        cache_entry = get_retrieval_cache_entry(
+            dataset,
+            query,
+            retrieval_method=retrieval_method,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            reranking_model=reranking_model,
+            reranking_mode=reranking_mode,
+            weights=weights,
+            document_ids_filter=sorted(document_ids_filter) if document_ids_filter else None,
+        )
+        if cache_entry is not None:
+            cached_documents = cache_entry.load()
+            if cached_documents is not None:
+                return cached_documents
+
+        # embedding search and weighted rerank embed the same query, share it within this call
+        # when the caller doesn't share one across datasets
+        if query_embeddings is None:
+            query_embeddings = QueryEmbeddings()
+
+        flask_app = current_app._get_current_object()  # type: ignore
+        tenant_id = str(dataset.tenant_id)
+        # every search writes to its own lists, so a search still running after the timeout can't
+        # change the result after it has been returned
+        searches: list[tuple[Future, list[Document], list[str]]] = []
+
+        def submit_search(search: Callable[..., None], **kwargs: Any):
+            documents: list[Document] = []
+            search_exceptions: list[str] = []
+            future = retrieval_executor.submit(
+                tenant_id,
+                search,
+                flask_app=flask_app,
+                dataset_id=dataset_id,
+                query=query,
+                top_k=top_k,
+                all_documents=documents,
+                exceptions=search_exceptions,
+                document_ids_filter=document_ids_filter,
+                **kwargs,
+            )
+            searches.append((future, documents, search_exceptions))
+
+        if retrieval_method == RetrievalMethod.KEYWORD_SEARCH:
+            submit_search(cls.keyword_search)
+        if RetrievalMethod.is_support_semantic_search(retrieval_method):
+            submit_search(
+                cls.embedding_search,
+                score_threshold=score_threshold,
+                reranking_model=reranking_model,
+                retrieval_method=retrieval_method,
+                query_embeddings=query_embeddings,
+            )
+        if RetrievalMethod.is_support_fulltext_search(retrieval_method):
+            submit_search(
+                cls.full_text_index_search,
+                score_threshold=score_threshold,
+                reranking_model=reranking_model,
+                retrieval_method=retrieval_method,
+            )
+
+        futures = [future for future, _, _ in searches]
+        _, not_done = concurrent.futures.wait(
+            futures, timeout=RETRIEVAL_TIMEOUT, return_when=concurrent.futures.ALL_COMPLETED
+        )
+        if not_done:
+            retrieval_executor.cancel(not_done)
+            logger.warning(
+                "Retrieval on dataset %s timed out after %ss, %s search(es) skipped",
+                dataset_id,
+                RETRIEVAL_TIMEOUT,
+                len(not_done),
+            )
+
         all_documents: list[Document] = []
         exceptions: list[str] = []
-
-        # Optimize multithreading with thread pools
-        with ThreadPoolExecutor(max_workers=dify_config.RETRIEVAL_SERVICE_EXECUTORS) as executor:  # type: ignore
-            futures = []
-            if retrieval_method == RetrievalMethod.KEYWORD_SEARCH:
-                futures.append(
-                    executor.submit(
-                        cls.keyword_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        all_documents=all_documents,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
-                )
-            if RetrievalMethod.is_support_semantic_search(retrieval_method):
-                futures.append(
-                    executor.submit(
-                        cls.embedding_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        score_threshold=score_threshold,
-                        reranking_model=reranking_model,
-                        all_documents=all_documents,
-                        retrieval_method=retrieval_method,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
-                )
-            if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-                futures.append(
-                    executor.submit(
-                        cls.full_text_index_search,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        dataset_id=dataset_id,
-                        query=query,
-                        top_k=top_k,
-                        score_threshold=score_threshold,
-                        reranking_model=reranking_model,
-                        all_documents=all_documents,
-                        retrieval_method=retrieval_method,
-                        exceptions=exceptions,
-                        document_ids_filter=document_ids_filter,
-                    )
-                )
-            concurrent.futures.wait(futures, timeout=30, return_when=concurrent.futures.ALL_COMPLETED)
+        for future, documents, search_exceptions in searches:
+            if future in not_done:
+                continue
+            all_documents.extend(documents)
+            exceptions.extend(search_exceptions)
 
         if exceptions:
             raise ValueError(";\n".join(exceptions))
 
         if retrieval_method == RetrievalMethod.HYBRID_SEARCH.value:
             data_post_processor = DataPostProcessor(
-                str(dataset.tenant_id), reranking_mode, reranking_model, weights, False
+                str(dataset.tenant_id), reranking_mode, reranking_model, weights, False, query_embeddings
             )
             all_documents = data_post_processor.invoke(
                 query=query,
@@ -117,6 +158,10 @@ class RetrievalService:
                 top_n=top_k,
             )
 
+        # partial results of a timed out retrieval aren't cached
+        if cache_entry is not None and not not_done:
+            cache_entry.save(all_documents)
+
         return all_documents
 
     @classmethod
@@ -187,6 +232,7 @@ class RetrievalService:
         retrieval_method: RetrievalMethod,
         exceptions: list,
         document_ids_filter: list[str] | None = None,
+        query_embeddings: QueryEmbeddings | None = None,
     ):
         with flask_app.app_context():
             try:
@@ -197,6 +243,7 @@ class RetrievalService:
                 vector = Vector(dataset=dataset)
                 documents = vector.search_by_vector(
                     query,
+                    query_embeddings=query_embeddings,
                     search_type="similarity_score_threshold",
                     top_k=top_k,
                     score_threshold=score_threshold,
@@ -300,6 +347,59 @@ class RetrievalService:
                 .all()
             }
 
+            # Batch query child chunks and segments keyed by index node id, so the number of
+            # queries doesn't grow with the number of retrieved documents
+            child_index_node_ids = set()
+            index_node_ids = set()
+            for document in documents:
+                dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+                if not dataset_document:
+                    continue
+                index_node_id = document.metadata.get("doc_id")
+                if not index_node_id:
+                    continue
+                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                    child_index_node_ids.add(index_node_id)
+                else:
+                    index_node_ids.add(index_node_id)
+
+            child_chunks_by_index_node_id = {}
+            parent_segments_by_id = {}
+            if child_index_node_ids:
+                child_chunk_stmt = select(ChildChunk).where(ChildChunk.index_node_id.in_(child_index_node_ids))
+                for child_chunk in db.session.scalars(child_chunk_stmt):
+                    child_chunks_by_index_node_id.setdefault(child_chunk.index_node_id, child_chunk)
+
+                parent_segment_ids = {child_chunk.segment_id for child_chunk in child_chunks_by_index_node_id.values()}
+                if parent_segment_ids:
+                    parent_segment_stmt = (
+                        select(DocumentSegment)
+                        .where(
+                            DocumentSegment.enabled == True,
+                            DocumentSegment.status == "completed",
+                            DocumentSegment.id.in_(parent_segment_ids),
+                        )
+                        .options(
+                            load_only(
+                                DocumentSegment.id,
+                                DocumentSegment.dataset_id,
+                                DocumentSegment.content,
+                                DocumentSegment.answer,
+                            )
+                        )
+                    )
+                    parent_segments_by_id = {segment.id: segment for segment in db.session.scalars(parent_segment_stmt)}
+
+            segments_by_index_node_id: dict[tuple[str, str], DocumentSegment] = {}
+            if index_node_ids:
+                document_segment_stmt = select(DocumentSegment).where(
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                    DocumentSegment.index_node_id.in_(index_node_ids),
+                )
+                for segment in db.session.scalars(document_segment_stmt):
+                    segments_by_index_node_id.setdefault((segment.dataset_id, segment.index_node_id), segment)
+
             records = []
             include_segment_ids = set()
             segment_child_map = {}
@@ -317,31 +417,14 @@ class RetrievalService:
                 if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
                     # Handle parent-child documents
                     child_index_node_id = document.metadata.get("doc_id")
-                    child_chunk_stmt = select(ChildChunk).where(ChildChunk.index_node_id == child_index_node_id)
-                    child_chunk = db.session.scalar(child_chunk_stmt)
+                    child_chunk = child_chunks_by_index_node_id.get(child_index_node_id)
 
                     if not child_chunk:
                         continue
 
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .where(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.id == child_chunk.segment_id,
-                        )
-                        .options(
-                            load_only(
-                                DocumentSegment.id,
-                                DocumentSegment.content,
-                                DocumentSegment.answer,
-                            )
-                        )
-                        .first()
-                    )
+                    segment = parent_segments_by_id.get(child_chunk.segment_id)
 
-                    if not segment:
+                    if not segment or segment.dataset_id != dataset_document.dataset_id:
                         continue
 
                     if segment.id not in include_segment_ids:
@@ -377,13 +460,7 @@ class RetrievalService:
                     index_node_id = document.metadata.get("doc_id")
                     if not index_node_id:
                         continue
-                    document_segment_stmt = select(DocumentSegment).where(
-                        DocumentSegment.dataset_id == dataset_document.dataset_id,
-                        DocumentSegment.enabled == True,
-                        DocumentSegment.status == "completed",
-                        DocumentSegment.index_node_id == index_node_id,
-                    )
-                    segment = db.session.scalar(document_segment_stmt)
+                    segment = segments_by_index_node_id.get((dataset_document.dataset_id, index_node_id))
 
                     if not segment:
                         continue
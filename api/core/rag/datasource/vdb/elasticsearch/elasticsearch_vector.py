@@ -11,7 +11,7 @@ from packaging.version import parse as parse_version
 from pydantic import BaseModel, model_validator
 
 from core.rag.datasource.vdb.field import Field
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -174,6 +174,17 @@ class ElasticSearchVector(BaseVector):
     def text_exists(self, id: str) -> bool:
         return bool(self._client.exists(index=self._collection_name, id=id))
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids or not self._client.indices.exists(index=self._collection_name):
+            return set()
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), EXISTING_IDS_BATCH_SIZE):
+            response = self._client.mget(
+                index=self._collection_name, ids=ids[i : i + EXISTING_IDS_BATCH_SIZE], source=False
+            )
+            existing_ids.update(doc["_id"] for doc in response["docs"] if doc.get("found"))
+        return existing_ids
+
     def delete_by_ids(self, ids: list[str]):
         if not ids:
             return
@@ -9,7 +9,7 @@ from pymilvus.milvus_client import IndexParams  # type: ignore
 
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -203,6 +203,23 @@ class MilvusVector(BaseVector):
 
         return len(result) > 0
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Return the IDs of the given texts that already exist in the collection.
+        """
+        if not ids or not self._client.has_collection(self._collection_name):
+            return set()
+
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), EXISTING_IDS_BATCH_SIZE):
+            result = self._client.query(
+                collection_name=self._collection_name,
+                filter=f'metadata["doc_id"] in {json.dumps(ids[i : i + EXISTING_IDS_BATCH_SIZE])}',
+                output_fields=[Field.METADATA_KEY.value],
+            )
+            existing_ids.update(item[Field.METADATA_KEY.value]["doc_id"] for item in result)
+        return existing_ids
+
     def field_exists(self, field: str) -> bool:
         """
         Check if a field exists in the collection.
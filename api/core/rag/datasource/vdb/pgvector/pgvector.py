@@ -11,7 +11,7 @@ import psycopg2.pool
 from pydantic import BaseModel, model_validator
 
 from configs import dify_config
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -138,6 +138,16 @@ class PGVector(BaseVector):
             cur.execute(f"SELECT id FROM {self.table_name} WHERE id = %s", (id,))
             return cur.fetchone() is not None
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        existing_ids: set[str] = set()
+        with self._get_cursor() as cur:
+            for i in range(0, len(ids), EXISTING_IDS_BATCH_SIZE):
+                cur.execute(
+                    f"SELECT id FROM {self.table_name} WHERE id IN %s", (tuple(ids[i : i + EXISTING_IDS_BATCH_SIZE]),)
+                )
+                existing_ids.update(str(record[0]) for record in cur)
+        return existing_ids
+
     def get_by_ids(self, ids: list[str]) -> list[Document]:
         with self._get_cursor() as cur:
             cur.execute(f"SELECT meta, text FROM {self.table_name} WHERE id IN %s", (tuple(ids),))
@@ -22,7 +22,7 @@ from sqlalchemy import select
 
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -342,6 +342,23 @@ class QdrantVector(BaseVector):
 
         return len(response) > 0
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        if not ids:
+            return set()
+        all_collection_name = [collection.name for collection in self._client.get_collections().collections]
+        if self._collection_name not in all_collection_name:
+            return set()
+        existing_ids: set[str] = set()
+        for i in range(0, len(ids), EXISTING_IDS_BATCH_SIZE):
+            response = self._client.retrieve(
+                collection_name=self._collection_name,
+                ids=ids[i : i + EXISTING_IDS_BATCH_SIZE],
+                with_payload=False,
+                with_vectors=False,
+            )
+            existing_ids.update(str(point.id) for point in response)
+        return existing_ids
+
     def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
         from qdrant_client.http import models
 
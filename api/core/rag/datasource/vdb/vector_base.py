@@ -5,6 +5,9 @@ from typing import Any
 
 from core.rag.models.document import Document
 
+# Max number of ids looked up by one bulk existence query
+EXISTING_IDS_BATCH_SIZE = 1000
+
 
 class BaseVector(ABC):
     def __init__(self, collection_name: str):
@@ -26,6 +29,15 @@ class BaseVector(ABC):
     def text_exists(self, id: str) -> bool:
         raise NotImplementedError
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        """
+        Return the subset of `ids` already stored in the collection.
+
+        Vector stores that can look up many ids in one request override this, the default
+        checks them one at a time with `text_exists`.
+        """
+        return {id for id in ids if self.text_exists(id)}
+
     @abstractmethod
     def delete_by_ids(self, ids: list[str]):
         raise NotImplementedError
@@ -50,14 +62,14 @@ class BaseVector(ABC):
         raise NotImplementedError
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata and "doc_id" in text.metadata:
-                doc_id = text.metadata["doc_id"]
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
-
-        return texts
+        existing_ids = self.existing_ids(self._get_uuids(texts))
+        if not existing_ids:
+            return texts
+        return [
+            text
+            for text in texts
+            if not (text.metadata and "doc_id" in text.metadata and text.metadata["doc_id"] in existing_ids)
+        ]
 
     def _get_uuids(self, texts: list[Document]) -> list[str]:
         return [text.metadata["doc_id"] for text in texts if text.metadata and "doc_id" in text.metadata]
@@ -1,17 +1,23 @@
 import logging
+import queue
+import threading
 import time
 from abc import ABC, abstractmethod
 from typing import Any
 
+from flask import current_app
+from opentelemetry.metrics import get_meter
 from sqlalchemy import select
 
 from configs import dify_config
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.retrieval_cache import invalidate_retrieval_cache
 from core.rag.datasource.vdb.vector_base import BaseVector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.cached_embedding import CacheEmbedding
 from core.rag.embedding.embedding_base import Embeddings
+from core.rag.embedding.query_embeddings import QueryEmbeddings
 from core.rag.models.document import Document
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
@@ -19,6 +25,15 @@ from models.dataset import Dataset, Whitelist
 
 logger = logging.getLogger(__name__)
 
+# Number of texts embedded and written to the vector store at a time by `Vector.create`
+VECTOR_CREATE_BATCH_SIZE = 1000
+
+_create_stage_duration = get_meter("vector_store").create_histogram(
+    "vector.create.stage.duration",
+    description="Time spent per batch in each stage of Vector.create",
+    unit="s",
+)
+
 
 class AbstractVectorFactory(ABC):
     @abstractmethod
@@ -184,37 +199,127 @@ class Vector:
         if texts:
             start = time.time()
             logger.info("start embedding %s texts %s", len(texts), start)
-            batch_size = 1000
-            total_batches = len(texts) + batch_size - 1
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i : i + batch_size]
-                batch_start = time.time()
-                logger.info("Processing batch %s/%s (%s texts)", i // batch_size + 1, total_batches, len(batch))
-                batch_embeddings = self._embeddings.embed_documents([document.page_content for document in batch])
-                logger.info(
-                    "Embedding batch %s/%s took %s s", i // batch_size + 1, total_batches, time.time() - batch_start
-                )
-                self._vector_processor.create(texts=batch, embeddings=batch_embeddings, **kwargs)
+            batches = [texts[i : i + VECTOR_CREATE_BATCH_SIZE] for i in range(0, len(texts), VECTOR_CREATE_BATCH_SIZE)]
+            pipeline_depth = dify_config.VECTOR_CREATE_PIPELINE_DEPTH
+            if pipeline_depth > 0 and len(batches) > 1:
+                self._create_pipelined(batches, pipeline_depth, **kwargs)
+            else:
+                for batch_number, batch in enumerate(batches, start=1):
+                    batch_embeddings = self._embed_batch(batch, batch_number, len(batches))
+                    self._write_batch(batch, batch_embeddings, batch_number, len(batches), **kwargs)
+            invalidate_retrieval_cache(self._dataset.id)
             logger.info("Embedding %s texts took %s s", len(texts), time.time() - start)
 
+    def _create_pipelined(self, batches: list[list[Document]], pipeline_depth: int, **kwargs):
+        """
+        Embed batches on a worker thread while the calling thread writes them to the vector store.
+
+        At most `pipeline_depth` embedded batches wait to be written, so a slow vector store
+        holds the embedding back instead of letting batches pile up in memory. Batches are
+        written in order from the calling thread, same as the sequential path.
+        """
+        flask_app = current_app._get_current_object()  # type: ignore
+        embedded_batches: queue.Queue[tuple[int, list[Document], list[list[float]]] | None] = queue.Queue(
+            maxsize=pipeline_depth
+        )
+        stopped = threading.Event()
+        errors: list[Exception] = []
+
+        def embed_batches():
+            with flask_app.app_context():
+                try:
+                    for batch_number, batch in enumerate(batches, start=1):
+                        if stopped.is_set():
+                            return
+                        batch_embeddings = self._embed_batch(batch, batch_number, len(batches))
+                        embedded_batches.put((batch_number, batch, batch_embeddings))
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    embedded_batches.put(None)
+
+        embed_thread = threading.Thread(target=embed_batches, name="vector-create-embed", daemon=True)
+        embed_thread.start()
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                item = embedded_batches.get()
+                _create_stage_duration.record(time.perf_counter() - wait_start, {"stage": "wait_embedding"})
+                if item is None:
+                    break
+                batch_number, batch, batch_embeddings = item
+                self._write_batch(batch, batch_embeddings, batch_number, len(batches), **kwargs)
+        finally:
+            stopped.set()
+            # unblock the worker if it is waiting for room in the queue, it puts at most one more item
+            while embed_thread.is_alive():
+                try:
+                    embedded_batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            embed_thread.join()
+
+        if errors:
+            raise errors[0]
+
+    def _embed_batch(self, batch: list[Document], batch_number: int, total_batches: int) -> list[list[float]]:
+        batch_start = time.perf_counter()
+        logger.info("Processing batch %s/%s (%s texts)", batch_number, total_batches, len(batch))
+        batch_embeddings = self._embeddings.embed_documents([document.page_content for document in batch])
+        elapsed = time.perf_counter() - batch_start
+        _create_stage_duration.record(elapsed, {"stage": "embed"})
+        logger.info("Embedding batch %s/%s took %s s", batch_number, total_batches, elapsed)
+        return batch_embeddings
+
+    def _write_batch(
+        self,
+        batch: list[Document],
+        batch_embeddings: list[list[float]],
+        batch_number: int,
+        total_batches: int,
+        **kwargs,
+    ):
+        write_start = time.perf_counter()
+        self._vector_processor.create(texts=batch, embeddings=batch_embeddings, **kwargs)
+        elapsed = time.perf_counter() - write_start
+        _create_stage_duration.record(elapsed, {"stage": "write"})
+        logger.info("Writing batch %s/%s took %s s", batch_number, total_batches, elapsed)
+
     def add_texts(self, documents: list[Document], **kwargs):
         if kwargs.get("duplicate_check", False):
             documents = self._filter_duplicate_texts(documents)
 
         embeddings = self._embeddings.embed_documents([document.page_content for document in documents])
         self._vector_processor.create(texts=documents, embeddings=embeddings, **kwargs)
+        invalidate_retrieval_cache(self._dataset.id)
 
     def text_exists(self, id: str) -> bool:
         return self._vector_processor.text_exists(id)
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        return self._vector_processor.existing_ids(ids)
+
     def delete_by_ids(self, ids: list[str]):
         self._vector_processor.delete_by_ids(ids)
+        invalidate_retrieval_cache(self._dataset.id)
 
     def delete_by_metadata_field(self, key: str, value: str):
         self._vector_processor.delete_by_metadata_field(key, value)
-
-    def search_by_vector(self, query: str, **kwargs: Any) -> list[Document]:
-        query_vector = self._embeddings.embed_query(query)
+        invalidate_retrieval_cache(self._dataset.id)
+
+    def search_by_vector(
+        self, query: str, query_embeddings: QueryEmbeddings | None = None, **kwargs: Any
+    ) -> list[Document]:
+        if query_embeddings is not None:
+            query_vector = query_embeddings.embed_query(
+                self._dataset.tenant_id,
+                self._dataset.embedding_model_provider,
+                self._dataset.embedding_model,
+                query,
+                self._embeddings.embed_query,
+            )
+        else:
+            query_vector = self._embeddings.embed_query(query)
         return self._vector_processor.search_by_vector(query_vector, **kwargs)
 
     def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
@@ -222,6 +327,7 @@ class Vector:
 
     def delete(self):
         self._vector_processor.delete()
+        invalidate_retrieval_cache(self._dataset.id)
         # delete collection redis cache
         if self._vector_processor.collection_name:
             collection_exist_cache_key = f"vector_indexing_{self._vector_processor.collection_name}"
@@ -239,16 +345,11 @@ class Vector:
         return CacheEmbedding(embedding_model)
 
     def _filter_duplicate_texts(self, texts: list[Document]) -> list[Document]:
-        for text in texts.copy():
-            if text.metadata is None:
-                continue
-            doc_id = text.metadata["doc_id"]
-            if doc_id:
-                exists_duplicate_node = self.text_exists(doc_id)
-                if exists_duplicate_node:
-                    texts.remove(text)
-
-        return texts
+        doc_ids = [text.metadata["doc_id"] for text in texts if text.metadata is not None and text.metadata["doc_id"]]
+        existing_ids = self.existing_ids(doc_ids) if doc_ids else set()
+        if not existing_ids:
+            return texts
+        return [text for text in texts if text.metadata is None or text.metadata["doc_id"] not in existing_ids]
 
     def __getattr__(self, name):
         if self._vector_processor is not None:
@@ -8,7 +8,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
-from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_base import EXISTING_IDS_BATCH_SIZE, BaseVector
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -164,6 +164,38 @@ class WeaviateVector(BaseVector):
 
         return True
 
+    def existing_ids(self, ids: list[str]) -> set[str]:
+        collection_name = self._collection_name
+        schema = self._default_schema(self._collection_name)
+
+        # check whether the index already exists
+        if not ids or not self._client.schema.contains(schema):
+            return set()
+        existing_ids: set[str] = set()
+        unique_ids = list(dict.fromkeys(ids))
+        for i in range(0, len(unique_ids), EXISTING_IDS_BATCH_SIZE):
+            batch_ids = unique_ids[i : i + EXISTING_IDS_BATCH_SIZE]
+            while batch_ids:
+                operands = [{"path": ["doc_id"], "operator": "Equal", "valueText": id} for id in batch_ids]
+                result = (
+                    self._client.query.get(collection_name, ["doc_id"])
+                    .with_where({"operator": "Or", "operands": operands})
+                    .with_limit(len(batch_ids))
+                    .do()
+                )
+
+                if "errors" in result:
+                    raise ValueError(f"Error during query: {result['errors']}")
+
+                entries = result["data"]["Get"][collection_name]
+                found_ids = {entry["doc_id"] for entry in entries}
+                existing_ids.update(found_ids)
+                if len(entries) < len(batch_ids):
+                    break
+                # objects sharing a doc_id can fill the limit, query again for the ids not found yet
+                batch_ids = [id for id in batch_ids if id not in found_ids]
+        return existing_ids
+
     def delete_by_ids(self, ids: list[str]):
         # check whether the index already exists
         schema = self._default_schema(self._collection_name)
@@ -1,8 +1,13 @@
 import base64
 import logging
+import threading
 from typing import Any, cast
 
 import numpy as np
+from cachetools import TTLCache
+from opentelemetry.metrics import get_meter
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
@@ -18,6 +23,61 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# Max number of hashes in one `IN (...)` lookup and rows in one bulk insert
+EMBEDDING_CACHE_BATCH_SIZE = 500
+
+_query_cache_counter = get_meter("embedding_cache").create_counter(
+    "embedding.query_cache.lookups",
+    description="Query embedding cache lookups by cache tier and result",
+    unit="{lookup}",
+)
+
+
+class QueryEmbeddingLocalCache:
+    """
+    Bounded, TTL-bounded per-process LRU cache of normalized query embeddings.
+
+    Sits in front of the Redis query embedding cache so hot queries skip the Redis
+    round-trips and the base64 decoding. Vectors are stored as read-only NumPy arrays.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache: TTLCache[str, np.ndarray] | None = TTLCache(maxsize=maxsize, ttl=ttl) if maxsize > 0 else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> np.ndarray | None:
+        if self._cache is None:
+            return None
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        _query_cache_counter.add(1, {"tier": "local", "result": "miss" if vector is None else "hit"})
+        return vector
+
+    def set(self, key: str, vector: np.ndarray):
+        if self._cache is None:
+            return
+        vector.flags.writeable = False
+        with self._lock:
+            self._cache[key] = vector
+
+    def clear(self):
+        if self._cache is None:
+            return
+        with self._lock:
+            self._cache.clear()
+
+
+query_embedding_local_cache = QueryEmbeddingLocalCache(
+    maxsize=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_SIZE,
+    ttl=dify_config.QUERY_EMBEDDING_LOCAL_CACHE_TTL,
+)
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, model_instance: ModelInstance, user: str | None = None):
@@ -28,18 +88,13 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(set(text_hashes))
         embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                # cache hits stay decoded arrays until the result is built
+                text_embeddings[i] = cached_embeddings[hash]
             else:
                 embedding_queue_indices.append(i)
 
@@ -80,11 +135,11 @@ class CacheEmbedding(Embeddings):
                             db.session.rollback()
                         except Exception:
                             logger.exception("Failed transform embedding")
-                cache_embeddings = []
+                cache_embeddings: dict[str, dict[str, Any]] = {}
                 try:
                     for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
                         text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
+                        hash = text_hashes[i]
                         if hash not in cache_embeddings:
                             embedding_cache = Embedding(
                                 model_name=self._model_instance.model,
@@ -92,8 +147,13 @@ class CacheEmbedding(Embeddings):
                                 provider_name=self._model_instance.provider,
                             )
                             embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
+                            cache_embeddings[hash] = {
+                                "model_name": embedding_cache.model_name,
+                                "hash": embedding_cache.hash,
+                                "provider_name": embedding_cache.provider_name,
+                                "embedding": embedding_cache.embedding,
+                            }
+                    self._save_cached_embeddings(list(cache_embeddings.values()))
                     db.session.commit()
                 except IntegrityError:
                     db.session.rollback()
@@ -102,18 +162,49 @@ class CacheEmbedding(Embeddings):
                 logger.exception("Failed to embed documents")
                 raise ex
 
-        return text_embeddings
+        return [embedding.tolist() if isinstance(embedding, np.ndarray) else embedding for embedding in text_embeddings]
+
+    def _get_cached_embeddings(self, hashes: set[str]) -> dict[str, np.ndarray]:
+        """Fetch cached document embeddings by text hash, one query per chunk of hashes."""
+        cached_embeddings: dict[str, np.ndarray] = {}
+        hash_list = list(hashes)
+        for i in range(0, len(hash_list), EMBEDDING_CACHE_BATCH_SIZE):
+            stmt = select(Embedding).where(
+                Embedding.model_name == self._model_instance.model,
+                Embedding.provider_name == self._model_instance.provider,
+                Embedding.hash.in_(hash_list[i : i + EMBEDDING_CACHE_BATCH_SIZE]),
+            )
+            for embedding in db.session.scalars(stmt):
+                cached_embeddings[embedding.hash] = embedding.get_embedding_array()
+        return cached_embeddings
+
+    def _save_cached_embeddings(self, rows: list[dict[str, Any]]):
+        """
+        Bulk insert document embeddings into the cache.
+
+        Rows that already exist (e.g. written by a concurrent indexing task) are skipped
+        instead of failing the whole batch.
+        """
+        for i in range(0, len(rows), EMBEDDING_CACHE_BATCH_SIZE):
+            stmt = insert(Embedding).values(rows[i : i + EMBEDDING_CACHE_BATCH_SIZE])
+            stmt = stmt.on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+            db.session.execute(stmt)
 
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
         # use doc embedding cache or store if not exists
         hash = helper.generate_text_hash(text)
         embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
+        local_embedding = query_embedding_local_cache.get(embedding_cache_key)
+        if local_embedding is not None:
+            return cast(list[float], local_embedding.tolist())
         embedding = redis_client.get(embedding_cache_key)
+        _query_cache_counter.add(1, {"tier": "redis", "result": "hit" if embedding else "miss"})
         if embedding:
             redis_client.expire(embedding_cache_key, 600)
             decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
-            return [float(x) for x in decoded_embedding]
+            query_embedding_local_cache.set(embedding_cache_key, decoded_embedding)
+            return cast(list[float], decoded_embedding.tolist())
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
@@ -138,6 +229,7 @@ class CacheEmbedding(Embeddings):
             # Transform to string
             encoded_str = encoded_vector.decode("utf-8")
             redis_client.setex(embedding_cache_key, 600, encoded_str)
+            query_embedding_local_cache.set(embedding_cache_key, embedding_vector)
         except Exception as ex:
             if dify_config.DEBUG:
                 logger.exception(
@@ -0,0 +1,76 @@
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+
+from opentelemetry.metrics import get_meter
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("retrieval")
+_query_embedding_calls = _meter.create_histogram(
+    "retrieval.query_embedding.calls",
+    description="Query embeddings computed per retrieval request",
+    unit="{call}",
+)
+_query_embedding_reuses = _meter.create_counter(
+    "retrieval.query_embedding.reuses",
+    description="Query embeddings served from the per-request memo instead of being embedded again",
+    unit="{call}",
+)
+
+
+class QueryEmbeddings:
+    """
+    Per-request memo of query embeddings, keyed by (tenant, provider, model, query).
+
+    One retrieval request searches several datasets in parallel threads and may rerank by
+    weighted score afterwards, and every step used to embed the same query again. Sharing
+    one instance across the request embeds each (model, query) pair once. Concurrent
+    callers asking for the same key wait for the first one instead of embedding in parallel.
+    """
+
+    def __init__(self):
+        self._vectors: dict[tuple[str, str, str, str], Future[list[float]]] = {}
+        self._lock = threading.Lock()
+        self.embed_calls = 0
+        self.reuses = 0
+
+    def embed_query(
+        self, tenant_id: str, provider: str, model: str, query: str, embed: Callable[[str], list[float]]
+    ) -> list[float]:
+        key = (tenant_id, provider, model, query)
+        with self._lock:
+            future = self._vectors.get(key)
+            owner = future is None
+            if future is None:
+                future = Future()
+                self._vectors[key] = future
+                self.embed_calls += 1
+            else:
+                self.reuses += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            future.set_result(embed(query))
+        except BaseException as e:
+            # do not cache failures, later callers retry the embedding
+            with self._lock:
+                self._vectors.pop(key, None)
+            future.set_exception(e)
+            raise
+        return future.result()
+
+    def record_metrics(self, retrieval_type: str):
+        attributes = {"retrieval_type": retrieval_type}
+        _query_embedding_calls.record(self.embed_calls, attributes)
+        if self.reuses:
+            _query_embedding_reuses.add(self.reuses, attributes)
+        logger.debug(
+            "%s retrieval embedded the query %d time(s) and reused it %d time(s)",
+            retrieval_type,
+            self.embed_calls,
+            self.reuses,
+        )
@@ -1,4 +1,3 @@
-import math
 from collections import Counter
 
 import numpy as np
@@ -7,15 +6,17 @@ from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.embedding.cached_embedding import CacheEmbedding
+from core.rag.embedding.query_embeddings import QueryEmbeddings
 from core.rag.models.document import Document
 from core.rag.rerank.entity.weight import VectorSetting, Weights
 from core.rag.rerank.rerank_base import BaseRerankRunner
 
 
 class WeightRerankRunner(BaseRerankRunner):
-    def __init__(self, tenant_id: str, weights: Weights):
+    def __init__(self, tenant_id: str, weights: Weights, query_embeddings: QueryEmbeddings | None = None):
         self.tenant_id = tenant_id
         self.weights = weights
+        self.query_embeddings = query_embeddings
 
     def run(
         self,
@@ -87,64 +88,46 @@ class WeightRerankRunner(BaseRerankRunner):
                 document.metadata["keywords"] = document_keywords
                 documents_keywords.append(document_keywords)
 
-        # Counter query keywords(TF)
-        query_keyword_counts = Counter(query_keywords)
-
-        # total documents
+        if not documents_keywords:
+            return []
+
+        # build the sparse term matrix once, as (row, column, count) triples over the documents' vocabulary
+        vocabulary: dict[str, int] = {}
+        rows = []
+        columns = []
+        counts = []
+        for row, document_keywords in enumerate(documents_keywords):
+            for keyword, count in Counter(document_keywords).items():
+                rows.append(row)
+                columns.append(vocabulary.setdefault(keyword, len(vocabulary)))
+                counts.append(count)
+        term_rows = np.array(rows, dtype=np.intp)
+        term_columns = np.array(columns, dtype=np.intp)
+        term_counts = np.array(counts, dtype=np.float64)
+
+        # IDF of every keyword, smoothed over all documents
         total_documents = len(documents)
+        doc_count_containing_keyword = np.bincount(term_columns, minlength=len(vocabulary))
+        keyword_idf = np.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
+
+        # query TF-IDF, keywords that no document contains have no IDF and do not count
+        query_tfidf = np.zeros(len(vocabulary), dtype=np.float64)
+        for keyword, count in Counter(query_keywords).items():
+            column = vocabulary.get(keyword)
+            if column is not None:
+                query_tfidf[column] = count * keyword_idf[column]
+
+        # cosine similarity of the query against every document TF-IDF row
+        documents_tfidf = term_counts * keyword_idf[term_columns]
+        numerators = np.bincount(
+            term_rows, weights=documents_tfidf * query_tfidf[term_columns], minlength=len(documents_keywords)
+        )
+        documents_norm = np.sqrt(np.bincount(term_rows, weights=documents_tfidf**2, minlength=len(documents_keywords)))
+        denominators = np.sqrt(np.dot(query_tfidf, query_tfidf)) * documents_norm
 
-        # calculate all documents' keywords IDF
-        all_keywords = set()
-        for document_keywords in documents_keywords:
-            all_keywords.update(document_keywords)
-
-        keyword_idf = {}
-        for keyword in all_keywords:
-            # calculate include query keywords' documents
-            doc_count_containing_keyword = sum(1 for doc_keywords in documents_keywords if keyword in doc_keywords)
-            # IDF
-            keyword_idf[keyword] = math.log((1 + total_documents) / (1 + doc_count_containing_keyword)) + 1
-
-        query_tfidf = {}
-
-        for keyword, count in query_keyword_counts.items():
-            tf = count
-            idf = keyword_idf.get(keyword, 0)
-            query_tfidf[keyword] = tf * idf
-
-        # calculate all documents' TF-IDF
-        documents_tfidf = []
-        for document_keywords in documents_keywords:
-            document_keyword_counts = Counter(document_keywords)
-            document_tfidf = {}
-            for keyword, count in document_keyword_counts.items():
-                tf = count
-                idf = keyword_idf.get(keyword, 0)
-                document_tfidf[keyword] = tf * idf
-            documents_tfidf.append(document_tfidf)
-
-        def cosine_similarity(vec1, vec2):
-            intersection = set(vec1.keys()) & set(vec2.keys())
-            numerator = sum(vec1[x] * vec2[x] for x in intersection)
-
-            sum1 = sum(vec1[x] ** 2 for x in vec1)
-            sum2 = sum(vec2[x] ** 2 for x in vec2)
-            denominator = math.sqrt(sum1) * math.sqrt(sum2)
-
-            if not denominator:
-                return 0.0
-            else:
-                return float(numerator) / denominator
-
-        similarities = []
-        for document_tfidf in documents_tfidf:
-            similarity = cosine_similarity(query_tfidf, document_tfidf)
-            similarities.append(similarity)
-
-        # for idx, similarity in enumerate(similarities):
-        #     print(f"Document {idx + 1} similarity: {similarity}")
-
-        return similarities
+        similarities = np.zeros(len(documents_keywords), dtype=np.float64)
+        np.divide(numerators, denominators, out=similarities, where=denominators != 0)
+        return similarities.tolist()
 
     def _calculate_cosine(
         self, tenant_id: str, query: str, documents: list[Document], vector_setting: VectorSetting
@@ -156,36 +139,46 @@ class WeightRerankRunner(BaseRerankRunner):
 
         :return:
         """
-        query_vector_scores = []
 
-        model_manager = ModelManager()
+        def embed_query(query: str) -> list[float]:
+            model_manager = ModelManager()
+            embedding_model = model_manager.get_model_instance(
+                tenant_id=tenant_id,
+                provider=vector_setting.embedding_provider_name,
+                model_type=ModelType.TEXT_EMBEDDING,
+                model=vector_setting.embedding_model_name,
+            )
+            return CacheEmbedding(embedding_model).embed_query(query)
 
-        embedding_model = model_manager.get_model_instance(
-            tenant_id=tenant_id,
-            provider=vector_setting.embedding_provider_name,
-            model_type=ModelType.TEXT_EMBEDDING,
-            model=vector_setting.embedding_model_name,
-        )
-        cache_embedding = CacheEmbedding(embedding_model)
-        query_vector = cache_embedding.embed_query(query)
-        for document in documents:
-            # calculate cosine similarity
+        # documents returned by vector search already carry their score, only the others need a cosine
+        query_vector_scores: list[float] = []
+        unscored_indexes = []
+        for index, document in enumerate(documents):
             if document.metadata and "score" in document.metadata:
                 query_vector_scores.append(document.metadata["score"])
             else:
-                # transform to NumPy
-                vec1 = np.array(query_vector)
-                vec2 = np.array(document.vector)
-
-                # calculate dot product
-                dot_product = np.dot(vec1, vec2)
-
-                # calculate norm
-                norm_vec1 = np.linalg.norm(vec1)
-                norm_vec2 = np.linalg.norm(vec2)
-
-                # calculate cosine similarity
-                cosine_sim = dot_product / (norm_vec1 * norm_vec2)
-                query_vector_scores.append(cosine_sim)
+                query_vector_scores.append(0.0)
+                unscored_indexes.append(index)
+
+        if unscored_indexes:
+            if self.query_embeddings is not None:
+                # reuse the vector computed by the embedding search of the same request
+                query_vector_list = self.query_embeddings.embed_query(
+                    tenant_id,
+                    vector_setting.embedding_provider_name,
+                    vector_setting.embedding_model_name,
+                    query,
+                    embed_query,
+                )
+            else:
+                query_vector_list = embed_query(query)
+            query_vector = np.asarray(query_vector_list, dtype=np.float64)
+            document_vectors = np.asarray([documents[index].vector for index in unscored_indexes], dtype=np.float64)
+            dot_products = document_vectors @ query_vector
+            norms = np.linalg.norm(document_vectors, axis=1) * np.linalg.norm(query_vector)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cosine_sims = dot_products / norms
+            for index, cosine_sim in zip(unscored_indexes, cosine_sims.tolist()):
+                query_vector_scores[index] = cosine_sim
 
         return query_vector_scores
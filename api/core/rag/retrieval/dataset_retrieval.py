@@ -35,6 +35,7 @@ from core.prompt.simple_prompt_transform import ModelMode
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
 from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.embedding.query_embeddings import QueryEmbeddings
 from core.rag.entities.citation_metadata import RetrievalSourceMetadata
 from core.rag.entities.context_entities import DocumentContext
 from core.rag.entities.metadata_entities import Condition, MetadataCondition
@@ -394,6 +395,7 @@ class DatasetRetrieval:
                     if score_threshold_enabled:
                         score_threshold = retrieval_model_config.get("score_threshold", 0.0)
 
+                    query_embeddings = QueryEmbeddings()
                     with measure_time() as timer:
                         results = RetrievalService.retrieve(
                             retrieval_method=retrieval_method,
@@ -405,7 +407,9 @@ class DatasetRetrieval:
                             reranking_mode=retrieval_model_config.get("reranking_mode", "reranking_model"),
                             weights=retrieval_model_config.get("weights", None),
                             document_ids_filter=document_ids_filter,
+                            query_embeddings=query_embeddings,
                         )
+                    query_embeddings.record_metrics("single")
                 sandbox_tag_result = self.sandbox_tag_retrieval(app_id, tenant_id)
                 dataset_queries = self._on_query(query, [dataset_id], app_id, user_from, user_id, sandbox_tag_result)
 
@@ -441,6 +445,8 @@ class DatasetRetrieval:
         threads = []
         all_documents: list[Document] = []
         dataset_ids = [dataset.id for dataset in available_datasets]
+        # embed the query once per embedding model for all datasets and the weighted rerank
+        query_embeddings = QueryEmbeddings()
         index_type_check = all(
             item.indexing_technique == available_datasets[0].indexing_technique for item in available_datasets
         )
@@ -494,6 +500,7 @@ class DatasetRetrieval:
                     "all_documents": all_documents,
                     "document_ids_filter": document_ids_filter,
                     "metadata_condition": metadata_condition,
+                    "query_embeddings": query_embeddings,
                 },
             )
             threads.append(retrieval_thread)
@@ -504,7 +511,9 @@ class DatasetRetrieval:
         with measure_time() as timer:
             if reranking_enable:
                 # do rerank for searched documents
-                data_post_processor = DataPostProcessor(tenant_id, reranking_mode, reranking_model, weights, False)
+                data_post_processor = DataPostProcessor(
+                    tenant_id, reranking_mode, reranking_model, weights, False, query_embeddings
+                )
 
                 all_documents = data_post_processor.invoke(
                     query=query, documents=all_documents, score_threshold=score_threshold, top_n=top_k
@@ -516,6 +525,7 @@ class DatasetRetrieval:
                     all_documents = self.calculate_vector_score(all_documents, top_k, score_threshold)
                 else:
                     all_documents = all_documents[:top_k] if top_k else all_documents
+        query_embeddings.record_metrics("multiple")
 
         sandbox_tag_result = self.sandbox_tag_retrieval(app_id, tenant_id)
         dataset_queries = self._on_query(query, dataset_ids, app_id, user_from, user_id, sandbox_tag_result)
@@ -615,6 +625,7 @@ class DatasetRetrieval:
         all_documents: list,
         document_ids_filter: list[str] | None = None,
         metadata_condition: MetadataCondition | None = None,
+        query_embeddings: QueryEmbeddings | None = None,
     ):
         with flask_app.app_context():
             dataset_stmt = select(Dataset).where(Dataset.id == dataset_id)
@@ -675,6 +686,7 @@ class DatasetRetrieval:
                             reranking_mode=retrieval_model.get("reranking_mode") or "reranking_model",
                             weights=retrieval_model.get("weights", None),
                             document_ids_filter=document_ids_filter,
+                            query_embeddings=query_embeddings,
                         )
 
                         all_documents.extend(documents)
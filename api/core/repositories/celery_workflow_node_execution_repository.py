@@ -6,12 +6,16 @@ providing improved performance by offloading database operations to background w
 """
 
 import logging
+import threading
+import time
 from collections.abc import Sequence
 from typing import Union
 
+from opentelemetry.metrics import get_meter
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
+from configs import dify_config
 from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution
 from core.workflow.repositories.workflow_node_execution_repository import (
     OrderConfig,
@@ -21,11 +25,23 @@ from libs.helper import extract_tenant_id
 from models import Account, CreatorUserRole, EndUser
 from models.workflow import WorkflowNodeExecutionTriggeredFrom
 from tasks.workflow_node_execution_tasks import (
-    save_workflow_node_execution_task,
+    save_workflow_node_executions_task,
 )
 
 logger = logging.getLogger(__name__)
 
+_meter = get_meter("workflow_node_execution")
+_flush_latency = _meter.create_histogram(
+    "workflow_node_execution.flush.latency",
+    description="Time taken to serialize and send a batch of node executions to the workers",
+    unit="s",
+)
+_flush_batch_size = _meter.create_histogram(
+    "workflow_node_execution.flush.batch_size",
+    description="Number of node executions sent in one batch",
+    unit="{execution}",
+)
+
 
 class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
     """
@@ -37,6 +53,9 @@ class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
 
     Key features:
     - Asynchronous save operations using Celery tasks
+    - Write-behind buffer that keeps only the latest state of each execution and sends
+      the buffered executions as one task, see `flush`. A timer sends the buffer at the latest
+      WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL seconds after its oldest save
     - In-memory cache for immediate reads
     - Support for multi-tenancy through tenant/app filtering
     - Automatic retry and error handling through Celery
@@ -50,6 +69,9 @@ class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
     _creator_user_role: CreatorUserRole
     _execution_cache: dict[str, WorkflowNodeExecution]
     _workflow_execution_mapping: dict[str, list[str]]
+    _pending_executions: dict[str, WorkflowNodeExecution]
+    _pending_lock: threading.Lock
+    _flush_timer: threading.Timer | None
 
     def __init__(
         self,
@@ -99,6 +121,12 @@ class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
         # Cache for mapping workflow_execution_ids to execution IDs for efficient retrieval
         self._workflow_execution_mapping = {}
 
+        # Executions saved since the last flush, keyed by ID so repeated saves collapse into one
+        self._pending_executions = {}
+        # The flush timer runs on its own thread
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+
         logger.info(
             "Initialized CeleryWorkflowNodeExecutionRepository for tenant %s, app %s, triggered_from %s",
             self._tenant_id,
@@ -110,8 +138,10 @@ class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
         """
         Save or update a WorkflowNodeExecution instance to cache and asynchronously to database.
 
-        This method stores the execution in cache immediately for fast reads and queues
-        the save operation as a Celery task without tracking the task status.
+        This method stores the execution in cache immediately for fast reads and buffers it.
+        The buffer is flushed once it holds WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE executions,
+        or by a timer WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL seconds after its oldest save, so an
+        execution that stays RUNNING is not held back until its node finishes.
 
         Args:
             execution: The WorkflowNodeExecution instance to save or update
@@ -127,27 +157,73 @@ class CeleryWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository):
                 if execution.id not in self._workflow_execution_mapping[execution.workflow_execution_id]:
                     self._workflow_execution_mapping[execution.workflow_execution_id].append(execution.id)
 
-            # Serialize execution for Celery task
-            execution_data = execution.model_dump()
-
-            # Queue the save operation as a Celery task (fire and forget)
-            save_workflow_node_execution_task.delay(
-                execution_data=execution_data,
-                tenant_id=self._tenant_id,
-                app_id=self._app_id or "",
-                triggered_from=self._triggered_from.value if self._triggered_from else "",
-                creator_user_id=self._creator_user_id,
-                creator_user_role=self._creator_user_role.value,
-            )
-
-            logger.debug("Cached and queued async save for workflow node execution: %s", execution.id)
+            # Buffer the execution, the buffered object is serialized at flush time so a
+            # later save of the same execution only replaces it
+            with self._pending_lock:
+                self._pending_executions[execution.id] = execution
+                pending_count = len(self._pending_executions)
+                if self._flush_timer is None and dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL > 0:
+                    self._flush_timer = threading.Timer(
+                        dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL, self._flush_on_timer
+                    )
+                    self._flush_timer.name = f"workflow_node_execution_flush_timer_{self._tenant_id}"
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+
+            logger.debug("Cached and buffered async save for workflow node execution: %s", execution.id)
 
         except Exception:
-            logger.exception("Failed to cache or queue save operation for node execution %s", execution.id)
-            # In case of Celery failure, we could implement a fallback to synchronous save
-            # For now, we'll re-raise the exception
+            logger.exception("Failed to cache save operation for node execution %s", execution.id)
             raise
 
+        if (
+            pending_count >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE
+            or dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL <= 0
+        ):
+            self.flush()
+
+    def flush(self):
+        """
+        Queue the buffered executions as a single Celery task that upserts them in bulk.
+
+        If queueing fails the executions stay buffered for the next flush and the error is re-raised.
+        """
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_executions:
+                return
+
+            executions = self._pending_executions
+            self._pending_executions = {}
+            start = time.perf_counter()
+            try:
+                # Queue the save operation as a Celery task (fire and forget)
+                save_workflow_node_executions_task.delay(
+                    executions_data=[execution.model_dump() for execution in executions.values()],
+                    tenant_id=self._tenant_id,
+                    app_id=self._app_id or "",
+                    triggered_from=self._triggered_from.value if self._triggered_from else "",
+                    creator_user_id=self._creator_user_id,
+                    creator_user_role=self._creator_user_role.value,
+                )
+            except Exception:
+                logger.exception("Failed to queue save operation for %d node executions", len(executions))
+                self._pending_executions = executions
+                raise
+
+            _flush_latency.record(time.perf_counter() - start)
+            _flush_batch_size.record(len(executions))
+            logger.debug("Queued async save for %d workflow node executions", len(executions))
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            # already logged, the executions stay buffered and the next save starts a new timer
+            pass
+
     def get_by_workflow_run(
         self,
         workflow_run_id: str,
@@ -3,11 +3,13 @@ SQLAlchemy implementation of the WorkflowNodeExecutionRepository.
 """
 
 import dataclasses
+import hashlib
 import json
 import logging
-from collections.abc import Callable, Mapping, Sequence
+import zlib
+from collections.abc import Callable, Iterator, Mapping, Sequence
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, TypeVar, Union
+from typing import Any, TypeVar, Union, cast, overload
 
 import psycopg2.errors
 from sqlalchemy import UnaryExpression, asc, desc, select
@@ -44,7 +46,7 @@ logger = logging.getLogger(__name__)
 @dataclasses.dataclass(frozen=True)
 class _InputsOutputsTruncationResult:
     truncated_value: Mapping[str, Any]
-    file: UploadFile
+    file: UploadFile | None
     offload: WorkflowNodeExecutionOffload
 
 
@@ -169,24 +171,27 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
 
         input_offload = _find_first(offload_data, _filter_by_offload_type(ExecutionOffLoadType.INPUTS))
         if input_offload is not None:
-            assert input_offload.file is not None
-            domain_model.inputs = self._load_file(input_offload.file)
+            domain_model.inputs = self._load_offload(input_offload)
             domain_model.set_truncated_inputs(inputs)
 
         outputs_offload = _find_first(offload_data, _filter_by_offload_type(ExecutionOffLoadType.OUTPUTS))
         if outputs_offload is not None:
-            assert outputs_offload.file is not None
-            domain_model.outputs = self._load_file(outputs_offload.file)
+            domain_model.outputs = self._load_offload(outputs_offload)
             domain_model.set_truncated_outputs(outputs)
 
         process_data_offload = _find_first(offload_data, _filter_by_offload_type(ExecutionOffLoadType.PROCESS_DATA))
         if process_data_offload is not None:
-            assert process_data_offload.file is not None
-            domain_model.process_data = self._load_file(process_data_offload.file)
+            domain_model.process_data = self._load_offload(process_data_offload)
             domain_model.set_truncated_process_data(process_data)
 
         return domain_model
 
+    def _load_offload(self, offload: WorkflowNodeExecutionOffload) -> Mapping[str, Any]:
+        if offload.blob_hash is not None:
+            return offload.load_blob(storage)
+        assert offload.file is not None
+        return self._load_file(offload.file)
+
     def _load_file(self, file: UploadFile) -> Mapping[str, Any]:
         content = storage.load(file.key)
         return json.loads(content)
@@ -285,6 +290,9 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
 
         converter = WorkflowRuntimeTypeConverter()
         json_encodable_value = converter.to_json_encodable(values)
+        if dify_config.WORKFLOW_NODE_EXECUTION_OFFLOAD_STORAGE == "blob":
+            return self._compress_and_store_blob(json_encodable_value, execution_id, type_)
+
         truncator = self._create_truncator()
         truncated_values, truncated = truncator.truncate_variable_mapping(json_encodable_value)
         if not truncated:
@@ -314,6 +322,51 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
             offload=offload,
         )
 
+    def _compress_and_store_blob(
+        self,
+        json_encodable_value: Mapping[str, Any],
+        execution_id: str,
+        type_: ExecutionOffLoadType,
+    ) -> _InputsOutputsTruncationResult | None:
+        """
+        Offload the value to a zlib-compressed blob if its serialized size exceeds
+        `WORKFLOW_NODE_EXECUTION_OFFLOAD_THRESHOLD`.
+
+        Blobs are addressed by the SHA-256 of their content within the tenant, so identical
+        values produced by different executions are only stored once. The row keeps a preview
+        truncated to the threshold.
+        """
+        threshold = dify_config.WORKFLOW_NODE_EXECUTION_OFFLOAD_THRESHOLD
+        content = _deterministic_json_dump(json_encodable_value).encode("utf-8")
+        if len(content) <= threshold:
+            return None
+
+        truncator = VariableTruncator(
+            max_size_bytes=threshold,
+            array_element_limit=dify_config.WORKFLOW_VARIABLE_TRUNCATION_ARRAY_LENGTH,
+            string_length_limit=dify_config.WORKFLOW_VARIABLE_TRUNCATION_STRING_LENGTH,
+        )
+        preview, _ = truncator.truncate_variable_mapping(json_encodable_value)
+
+        blob_hash = hashlib.sha256(content).hexdigest()
+        blob_key = WorkflowNodeExecutionOffload.blob_key(self._tenant_id, blob_hash)
+        if not storage.exists(blob_key):
+            storage.save(blob_key, zlib.compress(content))
+
+        offload = WorkflowNodeExecutionOffload(
+            id=uuidv7(),
+            tenant_id=self._tenant_id,
+            app_id=self._app_id,
+            node_execution_id=execution_id,
+            type_=type_,
+            blob_hash=blob_hash,
+        )
+        return _InputsOutputsTruncationResult(
+            truncated_value=preview,
+            file=None,
+            offload=offload,
+        )
+
     def save(self, execution: WorkflowNodeExecution) -> None:
         """
         Save or update a NodeExecution domain entity to the database.
@@ -535,7 +588,9 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         Retrieve all NodeExecution instances for a specific workflow run.
 
         This method always queries the database to ensure complete and ordered results,
-        but updates the cache with any retrieved executions.
+        but updates the cache with any retrieved executions. Executions are converted to
+        domain models on first access, so offloaded data is only loaded for the executions
+        that are actually read.
 
         Args:
             workflow_run_id: The workflow run ID
@@ -548,11 +603,51 @@ class SQLAlchemyWorkflowNodeExecutionRepository(WorkflowNodeExecutionRepository)
         """
         # Get the database models using the new method
         db_models = self.get_db_models_by_workflow_run(workflow_run_id, order_config, triggered_from)
+        return _LazyDomainModels(db_models, self._to_domain_model)
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            domain_models = executor.map(self._to_domain_model, db_models, timeout=30)
 
-        return list(domain_models)
+class _LazyDomainModels(Sequence[WorkflowNodeExecution]):
+    """
+    A sequence converting database models to domain models on first access.
+
+    Indexed reads convert one model, iterating converts the remaining ones in parallel.
+    """
+
+    def __init__(
+        self,
+        db_models: Sequence[WorkflowNodeExecutionModel],
+        convert: Callable[[WorkflowNodeExecutionModel], WorkflowNodeExecution],
+    ):
+        self._db_models = db_models
+        self._convert = convert
+        self._domain_models: list[WorkflowNodeExecution | None] = [None] * len(db_models)
+
+    def __len__(self) -> int:
+        return len(self._db_models)
+
+    @overload
+    def __getitem__(self, index: int) -> WorkflowNodeExecution: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[WorkflowNodeExecution]: ...
+
+    def __getitem__(self, index: int | slice) -> WorkflowNodeExecution | list[WorkflowNodeExecution]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        domain_model = self._domain_models[index]
+        if domain_model is None:
+            domain_model = self._convert(self._db_models[index])
+            self._domain_models[index] = domain_model
+        return domain_model
+
+    def __iter__(self) -> Iterator[WorkflowNodeExecution]:
+        missing = [i for i, domain_model in enumerate(self._domain_models) if domain_model is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                domain_models = executor.map(lambda i: self._convert(self._db_models[i]), missing, timeout=30)
+                for i, domain_model in zip(missing, domain_models):
+                    self._domain_models[i] = domain_model
+        return iter(cast(list[WorkflowNodeExecution], self._domain_models))
 
 
 def _deterministic_json_dump(value: Mapping[str, Any]) -> str:
@@ -247,6 +247,21 @@ class VariablePool(BaseModel):
                 continue
             self.add(selector, value)  # type: ignore
 
+    def snapshot(self) -> "VariablePool":
+        """
+        Create an isolated copy of the pool for running a sub-graph.
+
+        Stored variables are never mutated in place (updates always `add` a new
+        object), so only the lookup dictionaries are copied and the variables
+        themselves are shared with this pool. This is much cheaper than
+        `model_copy(deep=True)` for pools holding large values, while writes and
+        removals on either pool stay invisible to the other.
+        """
+        variable_dictionary: defaultdict[str, dict[str, VariableUnion]] = defaultdict(
+            dict, {node_id: dict(variables) for node_id, variables in self.variable_dictionary.items()}
+        )
+        return self.model_copy(update={"variable_dictionary": variable_dictionary})
+
     @classmethod
     def empty(cls) -> "VariablePool":
         """Create an empty variable pool."""
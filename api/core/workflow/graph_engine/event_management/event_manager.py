@@ -3,9 +3,8 @@ Unified event manager for collecting and emitting events.
 """
 
 import threading
-import time
+from collections import deque
 from collections.abc import Generator
-from contextlib import contextmanager
 from typing import final
 
 from core.workflow.graph_events import GraphEngineEvent, NodeRunSucceededEvent
@@ -14,64 +13,6 @@ from core.workflow.enums import NodeType
 from ..layers.base import GraphEngineLayer
 
 
-@final
-class ReadWriteLock:
-    """
-    A read-write lock implementation that allows multiple concurrent readers
-    but only one writer at a time.
-    """
-
-    def __init__(self) -> None:
-        self._read_ready = threading.Condition(threading.RLock())
-        self._readers = 0
-
-    def acquire_read(self) -> None:
-        """Acquire a read lock."""
-        _ = self._read_ready.acquire()
-        try:
-            self._readers += 1
-        finally:
-            self._read_ready.release()
-
-    def release_read(self) -> None:
-        """Release a read lock."""
-        _ = self._read_ready.acquire()
-        try:
-            self._readers -= 1
-            if self._readers == 0:
-                self._read_ready.notify_all()
-        finally:
-            self._read_ready.release()
-
-    def acquire_write(self) -> None:
-        """Acquire a write lock."""
-        _ = self._read_ready.acquire()
-        while self._readers > 0:
-            _ = self._read_ready.wait()
-
-    def release_write(self) -> None:
-        """Release a write lock."""
-        self._read_ready.release()
-
-    @contextmanager
-    def read_lock(self):
-        """Return a context manager for read locking."""
-        self.acquire_read()
-        try:
-            yield
-        finally:
-            self.release_read()
-
-    @contextmanager
-    def write_lock(self):
-        """Return a context manager for write locking."""
-        self.acquire_write()
-        try:
-            yield
-        finally:
-            self.release_write()
-
-
 @final
 class EventManager:
     """
@@ -84,8 +25,12 @@ class EventManager:
 
     def __init__(self) -> None:
         """Initialize the event manager."""
-        self._events: list[GraphEngineEvent] = []
-        self._lock = ReadWriteLock()
+        # Events collected but not yet handed to the consumer. Each take swaps
+        # in a fresh deque, so memory stays bounded by the backlog.
+        self._events: deque[GraphEngineEvent] = deque()
+        # Under gevent workers ``threading`` is monkey-patched, so this
+        # condition yields to the hub instead of blocking the OS thread.
+        self._condition = threading.Condition()
         self._layers: list[GraphEngineLayer] = []
         self._execution_complete = threading.Event()
 
@@ -102,39 +47,40 @@ class EventManager:
         """
         Thread-safe method to collect an event.
 
+        Wakes up the consumer waiting in ``emit_events``.
+
         Args:
             event: The event to collect
         """
-        with self._lock.write_lock():
+        with self._condition:
             self._events.append(event)
             self._notify_layers(event)
+            self._condition.notify_all()
 
-    def _get_new_events(self, start_index: int) -> list[GraphEngineEvent]:
+    def _take_pending_events(self) -> deque[GraphEngineEvent]:
         """
-        Get new events starting from a specific index.
+        Block until events are available or execution is complete, then
+        hand out every pending event.
 
-        Args:
-            start_index: The index to start from
+        The pending buffer is swapped out rather than sliced, so events are
+        never copied and consumed events are released immediately.
 
         Returns:
-            List of new events
+            Pending events in collection order, empty once execution is complete
+            and the backlog is drained
         """
-        with self._lock.read_lock():
-            return list(self._events[start_index:])
+        with self._condition:
+            while not self._events and not self._execution_complete.is_set():
+                _ = self._condition.wait()
 
-    def _event_count(self) -> int:
-        """
-        Get the current count of collected events.
-
-        Returns:
-            Number of collected events
-        """
-        with self._lock.read_lock():
-            return len(self._events)
+            pending, self._events = self._events, deque()
+            return pending
 
     def mark_complete(self) -> None:
         """Mark execution as complete to stop the event emission generator."""
-        self._execution_complete.set()
+        with self._condition:
+            self._execution_complete.set()
+            self._condition.notify_all()
 
     def emit_events(self) -> Generator[GraphEngineEvent, None, None]:
         """
@@ -143,16 +89,15 @@ class EventManager:
         Yields:
             GraphEngineEvent instances as they're processed
         """
-        yielded_count = 0
-
-        while not self._execution_complete.is_set() or yielded_count < self._event_count():
-            # Get new events since last yield
-            new_events = self._get_new_events(yielded_count)
+        while True:
+            new_events = self._take_pending_events()
+            if not new_events:
+                # Only returned empty when execution is complete and drained
+                break
 
             # Yield any new events
             for event in new_events:
                 yield event
-                yielded_count += 1
 
                 # Check if the event is a successful node run and it's a BUTTON_RESPONSE node
                 if (
@@ -174,10 +119,6 @@ class EventManager:
 
                     # Update the "answer" field with the button response
                     self._graph_runtime_state.outputs["answer"] = answer
-               
-            if not self._execution_complete.is_set() and not new_events:
-                time.sleep(0.001)
-
 
     def _notify_layers(self, event: GraphEngineEvent) -> None:
         """
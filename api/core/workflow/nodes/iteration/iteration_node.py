@@ -542,8 +542,8 @@ class IterationNode(Node):
             invoke_from=self.invoke_from.value,
             call_depth=self.workflow_call_depth,
         )
-        # Create a deep copy of the variable pool for each iteration
-        variable_pool_copy = self.graph_runtime_state.variable_pool.model_copy(deep=True)
+        # Create an isolated snapshot of the variable pool for each iteration
+        variable_pool_copy = self.graph_runtime_state.variable_pool.snapshot()
 
         # append iteration variable (item, index) to variable pool
         variable_pool_copy.add([self._node_id, "index"], index)
@@ -53,6 +53,15 @@ class WorkflowNodeExecutionRepository(Protocol):
         """
         ...
 
+    def flush(self):
+        """
+        Persist the saves an implementation may have buffered.
+
+        It's called when the workflow run ends. Implementations that persist on every save
+        don't need to do anything.
+        """
+        ...
+
     def get_by_workflow_run(
         self,
         workflow_run_id: str,
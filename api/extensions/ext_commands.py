@@ -15,6 +15,8 @@ def init_app(app: DifyApp):
         install_plugins,
         install_rag_pipeline_plugins,
         migrate_data_for_plugin,
+        migrate_embedding_cache_format,
+        migrate_keyword_table_to_postings,
         migrate_oss,
         old_metadata_migration,
         remove_orphaned_files_on_storage,
@@ -43,6 +45,8 @@ def init_app(app: DifyApp):
         extract_unique_plugins,
         install_plugins,
         old_metadata_migration,
+        migrate_embedding_cache_format,
+        migrate_keyword_table_to_postings,
         clear_free_plan_tenant_expired_logs,
         clear_orphaned_file_records,
         remove_orphaned_files_on_storage,
@@ -29,6 +29,8 @@ weighted_score_fields = {
     "vector_setting": fields.Nested(vector_setting_fields),
 }
 
+retrieval_cache_fields = {"enabled": fields.Boolean, "ttl": fields.Integer, "max_entries": fields.Integer}
+
 dataset_retrieval_model_fields = {
     "search_method": fields.String,
     "reranking_enable": fields.Boolean,
@@ -38,6 +40,7 @@ dataset_retrieval_model_fields = {
     "top_k": fields.Integer,
     "score_threshold_enabled": fields.Boolean,
     "score_threshold": fields.Float,
+    "retrieval_cache": fields.Nested(retrieval_cache_fields, allow_null=True),
 }
 external_retrieval_model_fields = {
     "top_k": fields.Integer,
@@ -48,6 +48,7 @@ from .model import (
     MessageChain,
     MessageFeedback,
     MessageFile,
+    MessageTokenCount,
     OperationLog,
     RecommendedApp,
     Site,
@@ -151,6 +152,7 @@ __all__ = [
     "MessageChain",
     "MessageFeedback",
     "MessageFile",
+    "MessageTokenCount",
     "OperationLog",
     "PinnedConversation",
     "Provider",
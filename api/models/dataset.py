@@ -12,6 +12,7 @@ from datetime import datetime
 from json import JSONDecodeError
 from typing import Any, cast
 
+import numpy as np
 import sqlalchemy as sa
 from sqlalchemy import DateTime, String, func, select
 from sqlalchemy.dialects.postgresql import JSONB
@@ -985,6 +986,23 @@ class DatasetKeywordTable(Base):
                 return None
 
 
+class DatasetKeywordPosting(Base):
+    """One keyword -> segment posting of a dataset's inverted keyword index."""
+
+    __tablename__ = "dataset_keyword_postings"
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("id", name="dataset_keyword_posting_pkey"),
+        sa.UniqueConstraint("dataset_id", "keyword", "index_node_id", name="dataset_keyword_posting_unique_idx"),
+        sa.Index("dataset_keyword_posting_node_idx", "dataset_id", "index_node_id"),
+    )
+
+    id = mapped_column(StringUUID, primary_key=True, server_default=sa.text("uuid_generate_v4()"))
+    dataset_id = mapped_column(StringUUID, nullable=False)
+    keyword = mapped_column(sa.Text, nullable=False)
+    index_node_id = mapped_column(String(255), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+
 class Embedding(Base):
     __tablename__ = "embeddings"
     __table_args__ = (
@@ -1002,11 +1020,38 @@ class Embedding(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.current_timestamp())
     provider_name = mapped_column(String(255), nullable=False, server_default=sa.text("''::character varying"))
 
-    def set_embedding(self, embedding_data: list[float]):
-        self.embedding = pickle.dumps(embedding_data, protocol=pickle.HIGHEST_PROTOCOL)
+    # Compact embedding format: 4-byte magic, 1-byte format version, 1-byte dtype code,
+    # followed by the raw little-endian vector. Rows without the magic are legacy pickles.
+    BINARY_MAGIC = b"DEMB"
+    BINARY_VERSION = 1
+    BINARY_HEADER_SIZE = 6
+    BINARY_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+
+    def set_embedding(self, embedding_data: list[float] | np.ndarray):
+        self.embedding = self.encode_embedding(embedding_data)
 
     def get_embedding(self) -> list[float]:
-        return cast(list[float], pickle.loads(self.embedding))  # noqa: S301
+        return cast(list[float], self.get_embedding_array().tolist())
+
+    def get_embedding_array(self) -> np.ndarray:
+        """Decode the stored embedding. Compact rows are decoded without copying the buffer."""
+        if not self.is_compact_embedding(self.embedding):
+            return np.asarray(pickle.loads(self.embedding), dtype=np.float64)  # noqa: S301
+        version, dtype_code = self.embedding[4], self.embedding[5]
+        if version != self.BINARY_VERSION or dtype_code not in self.BINARY_DTYPES:
+            raise ValueError(f"Unsupported embedding format version {version} with dtype code {dtype_code}")
+        return np.frombuffer(self.embedding, dtype=self.BINARY_DTYPES[dtype_code], offset=self.BINARY_HEADER_SIZE)
+
+    @classmethod
+    def is_compact_embedding(cls, data: bytes) -> bool:
+        return bytes(data[:4]) == cls.BINARY_MAGIC
+
+    @classmethod
+    def encode_embedding(cls, embedding_data: list[float] | np.ndarray) -> bytes:
+        dtype_code = 1 if dify_config.EMBEDDING_CACHE_STORAGE_DTYPE == "float16" else 0
+        vector = np.asarray(embedding_data, dtype=cls.BINARY_DTYPES[dtype_code])
+        header = cls.BINARY_MAGIC + bytes((cls.BINARY_VERSION, dtype_code))
+        return header + vector.tobytes()
 
 
 class DatasetCollectionBinding(Base):
@@ -1720,6 +1720,28 @@ class ApiRequest(Base):
     created_at = mapped_column(sa.DateTime, nullable=False, server_default=func.current_timestamp())
 
 
+class MessageTokenCount(Base):
+    """
+    Token counts of a message's query and answer as conversation memory, per tokenizer
+    (provider/model), so history selection does not re-tokenize old messages on every turn.
+    """
+
+    __tablename__ = "message_token_counts"
+    __table_args__ = (
+        sa.PrimaryKeyConstraint("id", name="message_token_count_pkey"),
+        sa.UniqueConstraint("message_id", "tokenizer", name="message_token_count_message_tokenizer_key"),
+        sa.Index("message_token_count_conversation_id_idx", "conversation_id"),
+    )
+
+    id = mapped_column(StringUUID, nullable=False, server_default=sa.text("uuid_generate_v4()"))
+    conversation_id = mapped_column(StringUUID, nullable=False)
+    message_id = mapped_column(StringUUID, nullable=False)
+    tokenizer: Mapped[str] = mapped_column(String(255), nullable=False)
+    query_tokens: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    answer_tokens: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    created_at = mapped_column(sa.DateTime, nullable=False, server_default=func.current_timestamp())
+
+
 class MessageChain(Base):
     __tablename__ = "message_chains"
     __table_args__ = (
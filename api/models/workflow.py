@@ -1,5 +1,6 @@
 import json
 import logging
+import zlib
 from collections.abc import Mapping, Sequence
 from datetime import datetime
 from enum import Enum, StrEnum
@@ -892,12 +893,15 @@ class WorkflowNodeExecutionModel(Base):  # This model is expected to have `offlo
         return self._get_offload_by_type(ExecutionOffLoadType.PROCESS_DATA) is not None
 
     @staticmethod
-    def _load_full_content(session: orm.Session, file_id: str, storage: Storage):
+    def _load_full_content(session: orm.Session, offload: "WorkflowNodeExecutionOffload", storage: Storage):
         from .model import UploadFile
 
-        stmt = sa.select(UploadFile).where(UploadFile.id == file_id)
+        if offload.blob_hash is not None:
+            return offload.load_blob(storage)
+
+        stmt = sa.select(UploadFile).where(UploadFile.id == offload.file_id)
         file = session.scalars(stmt).first()
-        assert file is not None, f"UploadFile with id {file_id} should exist but not"
+        assert file is not None, f"UploadFile with id {offload.file_id} should exist but not"
         content = storage.load(file.key)
         return json.loads(content)
 
@@ -906,21 +910,21 @@ class WorkflowNodeExecutionModel(Base):  # This model is expected to have `offlo
         if offload is None:
             return self.inputs_dict
 
-        return self._load_full_content(session, offload.file_id, storage)
+        return self._load_full_content(session, offload, storage)
 
     def load_full_outputs(self, session: orm.Session, storage: Storage) -> Mapping[str, Any] | None:
         offload: WorkflowNodeExecutionOffload | None = self._get_offload_by_type(ExecutionOffLoadType.OUTPUTS)
         if offload is None:
             return self.outputs_dict
 
-        return self._load_full_content(session, offload.file_id, storage)
+        return self._load_full_content(session, offload, storage)
 
     def load_full_process_data(self, session: orm.Session, storage: Storage) -> Mapping[str, Any] | None:
         offload: WorkflowNodeExecutionOffload | None = self._get_offload_by_type(ExecutionOffLoadType.PROCESS_DATA)
         if offload is None:
             return self.process_data_dict
 
-        return self._load_full_content(session, offload.file_id, storage)
+        return self._load_full_content(session, offload, storage)
 
 
 class WorkflowNodeExecutionOffload(Base):
@@ -977,7 +981,13 @@ class WorkflowNodeExecutionOffload(Base):
     # observability and system reliability.
 
     # `file_id` references to the offloaded storage object containing the data.
-    file_id: Mapped[str] = mapped_column(StringUUID, nullable=False)
+    # It is `None` for records stored as content-addressed blobs (see `blob_hash`).
+    file_id: Mapped[str | None] = mapped_column(StringUUID, nullable=True)
+
+    # `blob_hash` is the SHA-256 hex digest of the serialized data. When set, the data is stored
+    # zlib-compressed under `blob_key(tenant_id, blob_hash)`, shared by every record of the tenant
+    # holding the same content.
+    blob_hash: Mapped[str | None] = mapped_column(String(_HASH_COL_SIZE), nullable=True)
 
     execution: Mapped[WorkflowNodeExecutionModel] = orm.relationship(
         foreign_keys=[node_execution_id],
@@ -994,6 +1004,15 @@ class WorkflowNodeExecutionOffload(Base):
         primaryjoin="WorkflowNodeExecutionOffload.file_id == UploadFile.id",
     )
 
+    @staticmethod
+    def blob_key(tenant_id: str, blob_hash: str) -> str:
+        return f"workflow_node_execution_blobs/{tenant_id}/{blob_hash[:2]}/{blob_hash}.json.zlib"
+
+    def load_blob(self, storage: Storage) -> Any:
+        assert self.blob_hash is not None, "offload record is not stored as a blob"
+        content = storage.load(self.blob_key(self.tenant_id, self.blob_hash))
+        return json.loads(zlib.decompress(content))
+
 
 class WorkflowAppLogCreatedFrom(StrEnum):
     """
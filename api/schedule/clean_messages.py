@@ -17,6 +17,7 @@ from models.model import (
     MessageChain,
     MessageFeedback,
     MessageFile,
+    MessageTokenCount,
 )
 from models.web import SavedMessage
 from services.feature_service import FeatureService
@@ -80,6 +81,9 @@ def clean_messages():
                 db.session.query(MessageFile).where(MessageFile.message_id == message.id).delete(
                     synchronize_session=False
                 )
+                db.session.query(MessageTokenCount).where(MessageTokenCount.message_id == message.id).delete(
+                    synchronize_session=False
+                )
                 db.session.query(SavedMessage).where(SavedMessage.message_id == message.id).delete(
                     synchronize_session=False
                 )
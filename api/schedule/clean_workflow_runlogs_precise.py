@@ -16,6 +16,7 @@ from models.model import (
     MessageChain,
     MessageFeedback,
     MessageFile,
+    MessageTokenCount,
 )
 from models.workflow import ConversationVariable, WorkflowAppLog, WorkflowNodeExecutionModel, WorkflowRun
 
@@ -115,6 +116,10 @@ def _delete_batch_with_retry(workflow_run_ids: list[str], attempt_count: int) ->
                     synchronize_session=False
                 )
 
+                db.session.query(MessageTokenCount).where(MessageTokenCount.message_id.in_(message_id_list)).delete(
+                    synchronize_session=False
+                )
+
                 db.session.query(MessageAnnotation).where(MessageAnnotation.message_id.in_(message_id_list)).delete(
                     synchronize_session=False
                 )
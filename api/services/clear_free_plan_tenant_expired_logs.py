@@ -24,6 +24,7 @@ from models.model import (
     MessageChain,
     MessageFeedback,
     MessageFile,
+    MessageTokenCount,
 )
 from models.web import SavedMessage
 from models.workflow import WorkflowAppLog
@@ -52,6 +53,7 @@ class ClearFreePlanTenantExpiredLogs:
         related_tables = [
             (MessageFeedback, "message_feedbacks"),
             (MessageFile, "message_files"),
+            (MessageTokenCount, "message_token_counts"),
             (MessageAnnotation, "message_annotations"),
             (MessageChain, "message_chains"),
             (MessageAgentThought, "message_agent_thoughts"),
@@ -1,7 +1,7 @@
 from enum import StrEnum
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PositiveInt
 
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
 
@@ -96,6 +96,12 @@ class WeightModel(BaseModel):
     keyword_setting: WeightKeywordSetting | None = None
 
 
+class RetrievalCacheSetting(BaseModel):
+    enabled: bool = False
+    ttl: PositiveInt | None = None
+    max_entries: PositiveInt | None = None
+
+
 class RetrievalModel(BaseModel):
     search_method: RetrievalMethod
     reranking_enable: bool
@@ -105,6 +111,7 @@ class RetrievalModel(BaseModel):
     score_threshold_enabled: bool
     score_threshold: float | None = None
     weights: WeightModel | None = None
+    retrieval_cache: RetrievalCacheSetting | None = None
 
 
 class MetaDataConfig(BaseModel):
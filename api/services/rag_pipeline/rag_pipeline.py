@@ -462,6 +462,7 @@ class RagPipelineService:
             triggered_from=WorkflowNodeExecutionTriggeredFrom.SINGLE_STEP,
         )
         repository.save(workflow_node_execution)
+        repository.flush()
 
         # Convert node_execution to WorkflowNodeExecution after save
         workflow_node_execution_db_model = self._node_execution_service_repo.get_execution_by_id(
@@ -1,6 +1,6 @@
 import dataclasses
 from collections.abc import Mapping
-from typing import Any, Generic, TypeAlias, TypeVar, overload
+from typing import Any, Generic, TypeAlias, TypeVar
 
 from configs import dify_config
 from core.file.models import File
@@ -48,6 +48,19 @@ class _PartResult(Generic[_T]):
     truncated: bool
 
 
+@dataclasses.dataclass(frozen=True)
+class _Measured:
+    # Keeps the measured object alive, so that its `id` is not reused during the pass.
+    value: Any
+    size: int
+    # The smallest budget the value is known to fit in without being truncated.
+    budget: int
+
+
+# Sizes of the subtrees measured during one truncation pass, keyed by `id`.
+_SizeMemo: TypeAlias = dict[int, _Measured]
+
+
 class MaxDepthExceededError(Exception):
     pass
 
@@ -72,7 +85,10 @@ class VariableTruncator:
     This class implements intelligent truncation that prioritizes maintaining data structure
     integrity while ensuring the final size doesn't exceed specified limits.
 
-    Uses recursive size calculation to avoid repeated JSON serialization.
+    Values are measured while the truncated result is built, so each node is visited at most
+    once per call. Containers that fit in their budget are returned as-is instead of being copied,
+    and their sizes are memoized so that subtrees shared by several keys or elements are only
+    measured once.
     """
 
     def __init__(
@@ -113,16 +129,14 @@ class VariableTruncator:
         truncated_mapping: dict[str, Any] = {}
         length = len(v.items())
         used_size = 0
+        memo: _SizeMemo = {}
         for key, value in v.items():
             used_size += self.calculate_json_size(key)
             if used_size > budget:
                 truncated_mapping[key] = "..."
                 continue
             value_budget = (budget - used_size) // (length - len(truncated_mapping))
-            if isinstance(value, Segment):
-                part_result = self._truncate_segment(value, value_budget)
-            else:
-                part_result = self._truncate_json_primitives(value, value_budget)
+            part_result = self._truncate_value(value, value_budget, memo)
             is_truncated = is_truncated or part_result.truncated
             truncated_mapping[key] = part_result.value
             used_size += part_result.value_size
@@ -146,10 +160,11 @@ class VariableTruncator:
         return True
 
     def truncate(self, segment: Segment) -> TruncationResult:
+        memo: _SizeMemo = {}
         if isinstance(segment, StringSegment):
-            result = self._truncate_segment(segment, self._string_length_limit)
+            result = self._truncate_segment(segment, self._string_length_limit, memo)
         else:
-            result = self._truncate_segment(segment, self._max_size_bytes)
+            result = self._truncate_segment(segment, self._max_size_bytes, memo)
 
         if result.value_size > self._max_size_bytes:
             if isinstance(result.value, str):
@@ -162,39 +177,43 @@ class VariableTruncator:
                 json_str = json_str[: self._max_size_bytes] + "..."
             return TruncationResult(result=StringSegment(value=json_str), truncated=True)
 
-        return TruncationResult(
-            result=segment.model_copy(update={"value": result.value.value}), truncated=result.truncated
-        )
+        if not result.truncated:
+            return TruncationResult(result=segment, truncated=False)
+        return TruncationResult(result=segment.model_copy(update={"value": result.value.value}), truncated=True)
 
-    def _truncate_segment(self, segment: Segment, target_size: int) -> _PartResult[Segment]:
+    def _truncate_segment(self, segment: Segment, target_size: int, memo: _SizeMemo) -> _PartResult[Segment]:
         """
         Apply smart truncation to a variable value.
 
         Args:
-            value: The value to truncate (can be Segment or raw value)
+            segment: The segment to truncate
+            target_size: The size budget of the segment value
+            memo: Sizes of the subtrees already measured in this pass
 
         Returns:
-            TruncationResult with truncated data and truncation status
+            _PartResult with the truncated segment, its size and truncation status
         """
 
         if not VariableTruncator._segment_need_truncation(segment):
-            return _PartResult(segment, self.calculate_json_size(segment.value), False)
+            return _PartResult(segment, self._untruncated_json_size(segment.value, memo), False)
 
         result: _PartResult[Any]
         # Apply type-specific truncation with target size
         if isinstance(segment, ArraySegment):
-            result = self._truncate_array(segment.value, target_size)
+            result = self._truncate_array(segment.value, target_size, memo)
         elif isinstance(segment, StringSegment):
             result = self._truncate_string(segment.value, target_size)
         elif isinstance(segment, ObjectSegment):
-            result = self._truncate_object(segment.value, target_size)
+            result = self._truncate_object(segment.value, target_size, memo)
         else:
             raise AssertionError("this should be unreachable.")
 
+        if not result.truncated:
+            return _PartResult(segment, result.value_size, False)
         return _PartResult(
             value=segment.model_copy(update={"value": result.value}),
             value_size=result.value_size,
-            truncated=result.truncated,
+            truncated=True,
         )
 
     @staticmethod
@@ -239,32 +258,50 @@ class VariableTruncator:
         else:
             raise UnknownTypeError(f"got unknown type {type(value)}")
 
+    def _untruncated_json_size(self, value: Any, memo: _SizeMemo) -> int:
+        """`calculate_json_size` for values that are never truncated, measuring each `File` once."""
+        if isinstance(value, File):
+            measured = memo.get(id(value))
+            if measured is None:
+                measured = _Measured(value, self.calculate_json_size(value), 0)
+                memo[id(value)] = measured
+            return measured.size
+        if isinstance(value, list):
+            return 2 + max(len(value) - 1, 0) + sum(self._untruncated_json_size(item, memo) for item in value)
+        return self.calculate_json_size(value)
+
     def _truncate_string(self, value: str, target_size: int) -> _PartResult[str]:
-        if (size := self.calculate_json_size(value)) < target_size:
+        # Keep in sync with the string case of `calculate_json_size`.
+        if (size := len(value) + 2) < target_size:
             return _PartResult(value, size, False)
         if target_size < 5:
             return _PartResult("...", 5, True)
         truncated_size = min(self._string_length_limit, target_size - 5)
         truncated_value = value[:truncated_size] + "..."
-        return _PartResult(truncated_value, self.calculate_json_size(truncated_value), True)
+        return _PartResult(truncated_value, len(truncated_value) + 2, True)
 
-    def _truncate_array(self, value: list, target_size: int) -> _PartResult[list]:
+    def _truncate_array(self, value: list, target_size: int, memo: _SizeMemo | None = None) -> _PartResult[list]:
         """
         Truncate array with correct strategy:
         1. First limit to 20 items
         2. If still too large, truncate individual items
         """
+        if memo is None:
+            memo = {}
+        measured = memo.get(id(value))
+        if measured is not None and measured.budget <= target_size:
+            return _PartResult(value, measured.size, False)
 
         truncated_value: list[Any] = []
         truncated = False
-        used_size = self.calculate_json_size([])
+        used_size = 2  # "[]"
 
         target_length = self._array_element_limit
 
         for i, item in enumerate(value):
             # Dirty fix:
             # The output of `Start` node may contain list of `File` elements,
-            # causing `AssertionError` while invoking `_truncate_json_primitives`.
+            # causing `AssertionError` while invoking `_truncate_value`.
             #
             # This check ensures that `list[File]` are handled separately
             if isinstance(item, File):
@@ -276,13 +313,19 @@ class VariableTruncator:
                 used_size += 1  # Account for comma
 
             if used_size > target_size:
+                truncated = True
                 break
 
-            part_result = self._truncate_json_primitives(item, target_size - used_size)
+            part_result = self._truncate_value(item, target_size - used_size, memo)
             truncated_value.append(part_result.value)
             used_size += part_result.value_size
-            truncated = part_result.truncated
-        return _PartResult(truncated_value, used_size, truncated)
+            truncated = truncated or part_result.truncated
+
+        if truncated:
+            return _PartResult(truncated_value, used_size, True)
+        # Nothing was cut, so the array itself can be used instead of the copy.
+        memo[id(value)] = _Measured(value, used_size, target_size)
+        return _PartResult(value, used_size, False)
 
     @classmethod
     def _maybe_qa_structure(cls, m: Mapping[str, Any]) -> bool:
@@ -308,7 +351,9 @@ class VariableTruncator:
 
         return True
 
-    def _truncate_object(self, mapping: Mapping[str, Any], target_size: int) -> _PartResult[Mapping[str, Any]]:
+    def _truncate_object(
+        self, mapping: Mapping[str, Any], target_size: int, memo: _SizeMemo | None = None
+    ) -> _PartResult[Mapping[str, Any]]:
         """
         Truncate object with key preservation priority.
 
@@ -317,11 +362,16 @@ class VariableTruncator:
         2. If still too large, drop keys starting from the end
         """
         if not mapping:
-            return _PartResult(mapping, self.calculate_json_size(mapping), False)
+            return _PartResult(mapping, 2, False)
+        if memo is None:
+            memo = {}
+        measured = memo.get(id(mapping))
+        if measured is not None and measured.budget <= target_size:
+            return _PartResult(mapping, measured.size, False)
 
         truncated_obj = {}
         truncated = False
-        used_size = self.calculate_json_size({})
+        used_size = 2  # "{}"
 
         # Sort keys to ensure deterministic behavior
         sorted_keys = sorted(mapping.keys())
@@ -340,7 +390,7 @@ class VariableTruncator:
             # Calculate budget for this key-value pair
             # do not try to truncate keys, as we want to keep the structure of
             # object.
-            key_size = self.calculate_json_size(key) + 1  # +1 for ":"
+            key_size = (len(key) + 2 if isinstance(key, str) else self.calculate_json_size(key)) + 1  # +1 for ":"
             pair_size += key_size
             remaining_pairs = len(sorted_keys) - i
             value_budget = max(0, (target_size - pair_size - used_size) // remaining_pairs)
@@ -350,11 +400,7 @@ class VariableTruncator:
                 break
 
             # Truncate the value to fit within budget
-            value = mapping[key]
-            if isinstance(value, Segment):
-                value_result = self._truncate_segment(value, value_budget)
-            else:
-                value_result = self._truncate_json_primitives(mapping[key], value_budget)
+            value_result = self._truncate_value(mapping[key], value_budget, memo)
 
             truncated_obj[key] = value_result.value
             pair_size += value_result.value_size
@@ -363,40 +409,26 @@ class VariableTruncator:
             if value_result.truncated:
                 truncated = True
 
-        return _PartResult(truncated_obj, used_size, truncated)
-
-    @overload
-    def _truncate_json_primitives(self, val: str, target_size: int) -> _PartResult[str]: ...
+        if truncated:
+            return _PartResult(truncated_obj, used_size, True)
+        # Nothing was cut, so the object itself can be used instead of the copy.
+        memo[id(mapping)] = _Measured(mapping, used_size, target_size)
+        return _PartResult(mapping, used_size, False)
 
-    @overload
-    def _truncate_json_primitives(self, val: list, target_size: int) -> _PartResult[list]: ...
-
-    @overload
-    def _truncate_json_primitives(self, val: dict, target_size: int) -> _PartResult[dict]: ...
-
-    @overload
-    def _truncate_json_primitives(self, val: bool, target_size: int) -> _PartResult[bool]: ...  # type: ignore
-
-    @overload
-    def _truncate_json_primitives(self, val: int, target_size: int) -> _PartResult[int]: ...
-
-    @overload
-    def _truncate_json_primitives(self, val: float, target_size: int) -> _PartResult[float]: ...
-
-    @overload
-    def _truncate_json_primitives(self, val: None, target_size: int) -> _PartResult[None]: ...
-
-    def _truncate_json_primitives(
-        self, val: str | list | dict | bool | int | float | None, target_size: int
-    ) -> _PartResult[Any]:
-        """Truncate a value within an object to fit within budget."""
-        if isinstance(val, str):
-            return self._truncate_string(val, target_size)
-        elif isinstance(val, list):
-            return self._truncate_array(val, target_size)
-        elif isinstance(val, dict):
-            return self._truncate_object(val, target_size)
-        elif val is None or isinstance(val, (bool, int, float)):
-            return _PartResult(val, self.calculate_json_size(val), False)
+    def _truncate_value(self, value: Any, target_size: int, memo: _SizeMemo) -> _PartResult[Any]:
+        """Truncate a value within an object or array to fit within budget."""
+        # Checked from the most to the least common type, `Segment` checks are comparatively slow.
+        if isinstance(value, str):
+            return self._truncate_string(value, target_size)
+        elif isinstance(value, dict):
+            return self._truncate_object(value, target_size, memo)
+        elif isinstance(value, list):
+            return self._truncate_array(value, target_size, memo)
+        elif value is None or isinstance(value, (bool, int, float)):
+            return _PartResult(value, self.calculate_json_size(value), False)
+        elif isinstance(value, Segment):
+            return self._truncate_segment(value, target_size, memo)
+        elif isinstance(value, File):
+            return _PartResult(value, self._untruncated_json_size(value, memo), False)
         else:
             raise AssertionError("this statement should be unreachable.")
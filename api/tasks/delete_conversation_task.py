@@ -6,7 +6,7 @@ from celery import shared_task
 
 from extensions.ext_database import db
 from models import ConversationVariable
-from models.model import Message, MessageAnnotation, MessageFeedback
+from models.model import Message, MessageAnnotation, MessageFeedback, MessageTokenCount
 from models.tools import ToolConversationVariables, ToolFile
 from models.web import PinnedConversation
 
@@ -36,6 +36,10 @@ def delete_conversation_related_data(conversation_id: str):
             synchronize_session=False
         )
 
+        db.session.query(MessageTokenCount).where(MessageTokenCount.conversation_id == conversation_id).delete(
+            synchronize_session=False
+        )
+
         db.session.query(ToolConversationVariables).where(
             ToolConversationVariables.conversation_id == conversation_id
         ).delete(synchronize_session=False)
@@ -1,10 +1,11 @@
 import json
 import logging
+import zlib
 
 from celery import shared_task
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_BATCH_KEY_PREFIX, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -20,16 +21,43 @@ def process_trace_tasks(file_info):
     """
     Async process trace tasks
     Usage: process_trace_tasks.delay(tasks_data)
+
+    `file_info` either points to a single trace stored as a file, or, with `batch_id`, to a
+    batch of traces stored in Redis by the trace queue manager.
     """
     from core.ops.ops_trace_manager import OpsTraceManager
 
+    batch_id = file_info.get("batch_id")
+    if batch_id:
+        payload = redis_client.getdel(f"{OPS_TRACE_BATCH_KEY_PREFIX}{batch_id}")
+        if payload is None:
+            logger.warning("Trace batch %s not found, it may have expired", batch_id)
+            return
+        trace_instances = {}
+        for file_data in json.loads(zlib.decompress(payload)):
+            app_id = file_data.get("app_id")
+            try:
+                if app_id not in trace_instances:
+                    trace_instances[app_id] = OpsTraceManager.get_ops_trace_instance(app_id)
+                _trace(app_id, file_data, trace_instances[app_id])
+            except Exception:
+                logger.exception("Processing trace task of batch %s failed, app_id: %s", batch_id, app_id)
+        return
+
     app_id = file_info.get("app_id")
     file_id = file_info.get("file_id")
     file_path = f"{OPS_FILE_PATH}{app_id}/{file_id}.json"
     file_data = json.loads(storage.load(file_path))
+    trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+    try:
+        _trace(app_id, file_data, trace_instance)
+    finally:
+        storage.delete(file_path)
+
+
+def _trace(app_id, file_data, trace_instance):
     trace_info = file_data.get("trace_info")
     trace_info_type = file_data.get("trace_info_type")
-    trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
     if trace_info.get("message_data"):
         trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
@@ -51,5 +79,3 @@ def process_trace_tasks(file_info):
         failed_key = f"{OPS_TRACE_FAILED_KEY}_{app_id}"
         redis_client.incr(failed_key)
         logger.info("Processing trace tasks failed, app_id: %s", app_id)
-    finally:
-        storage.delete(file_path)
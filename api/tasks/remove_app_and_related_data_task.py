@@ -26,6 +26,7 @@ from models import (
     MessageChain,
     MessageFeedback,
     MessageFile,
+    MessageTokenCount,
     RecommendedApp,
     Site,
     TagBinding,
@@ -282,6 +283,9 @@ def _delete_app_messages(tenant_id: str, app_id: str):
             synchronize_session=False
         )
         db.session.query(MessageFile).where(MessageFile.message_id == message_id).delete(synchronize_session=False)
+        db.session.query(MessageTokenCount).where(MessageTokenCount.message_id == message_id).delete(
+            synchronize_session=False
+        )
         db.session.query(SavedMessage).where(SavedMessage.message_id == message_id).delete(synchronize_session=False)
         db.session.query(Message).where(Message.id == message_id).delete()
 
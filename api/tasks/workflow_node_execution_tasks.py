@@ -10,6 +10,7 @@ import logging
 
 from celery import shared_task
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import sessionmaker
 
 from core.workflow.entities.workflow_node_execution import (
@@ -22,6 +23,19 @@ from models.workflow import WorkflowNodeExecutionTriggeredFrom
 
 logger = logging.getLogger(__name__)
 
+_NODE_EXECUTION_COLUMNS = list(WorkflowNodeExecutionModel.__table__.columns)
+# the columns `_update_node_execution_from_domain` sets, the others are only written on insert
+_NODE_EXECUTION_UPDATE_COLUMNS = (
+    "inputs",
+    "process_data",
+    "outputs",
+    "execution_metadata",
+    "status",
+    "error",
+    "elapsed_time",
+    "finished_at",
+)
+
 
 @shared_task(queue="workflow_storage", bind=True, max_retries=3, default_retry_delay=60)
 def save_workflow_node_execution_task(
@@ -86,6 +100,66 @@ def save_workflow_node_execution_task(
         raise self.retry(exc=e, countdown=60 * (2**self.request.retries))
 
 
+@shared_task(queue="workflow_storage", bind=True, max_retries=3, default_retry_delay=60)
+def save_workflow_node_executions_task(
+    self,
+    executions_data: list[dict],
+    tenant_id: str,
+    app_id: str,
+    triggered_from: str,
+    creator_user_id: str,
+    creator_user_role: str,
+) -> bool:
+    """
+    Asynchronously save or update a batch of workflow node executions with a single upsert.
+
+    Args:
+        executions_data: Serialized WorkflowNodeExecution data, at most one entry per execution
+        tenant_id: Tenant ID for multi-tenancy
+        app_id: Application ID
+        triggered_from: Source of the execution trigger
+        creator_user_id: ID of the user who created the executions
+        creator_user_role: Role of the user who created the executions
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        rows = []
+        for execution_data in executions_data:
+            execution = WorkflowNodeExecution.model_validate(execution_data)
+            node_execution = _create_node_execution_from_domain(
+                execution=execution,
+                tenant_id=tenant_id,
+                app_id=app_id,
+                triggered_from=WorkflowNodeExecutionTriggeredFrom(triggered_from),
+                creator_user_id=creator_user_id,
+                creator_user_role=CreatorUserRole(creator_user_role),
+            )
+            rows.append({column.key: getattr(node_execution, column.key) for column in _NODE_EXECUTION_COLUMNS})
+        if not rows:
+            return True
+
+        stmt = insert(WorkflowNodeExecutionModel).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WorkflowNodeExecutionModel.id],
+            set_={column: stmt.excluded[column] for column in _NODE_EXECUTION_UPDATE_COLUMNS},
+        )
+
+        session_factory = sessionmaker(bind=db.engine, expire_on_commit=False)
+        with session_factory() as session:
+            session.execute(stmt)
+            session.commit()
+
+        logger.debug("Saved %d workflow node executions", len(rows))
+        return True
+
+    except Exception as e:
+        logger.exception("Failed to save %d workflow node executions", len(executions_data))
+        # Retry the task with exponential backoff
+        raise self.retry(exc=e, countdown=60 * (2**self.request.retries))
+
+
 def _create_node_execution_from_domain(
     execution: WorkflowNodeExecution,
     tenant_id: str,
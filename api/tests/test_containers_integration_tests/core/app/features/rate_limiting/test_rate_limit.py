@@ -0,0 +1,101 @@
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from core.app.features.rate_limiting.rate_limit import RateLimit
+from core.errors.error import AppInvokeQuotaExceededError
+from extensions.ext_redis import redis_client
+
+
+class TestRateLimitWithRedis:
+    """Load tests running the rate limit scripts on a real Redis."""
+
+    @pytest.fixture
+    def rate_limit(self, flask_app_with_containers):
+        client_id = str(uuid.uuid4())
+        rate_limit = RateLimit(client_id, 10)
+        yield rate_limit
+        redis_client.delete(rate_limit.active_requests_key, rate_limit.max_active_requests_key)
+        RateLimit._instance_dict.pop(client_id, None)
+
+    def test_burst_of_concurrent_requests_admits_exactly_the_limit(self, rate_limit):
+        barrier = threading.Barrier(200)
+        admitted = []
+        rejected = []
+
+        def try_enter():
+            barrier.wait()
+            try:
+                admitted.append(rate_limit.enter())
+            except AppInvokeQuotaExceededError:
+                rejected.append(1)
+
+        threads = [threading.Thread(target=try_enter) for _ in range(200)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(admitted) == 10
+        assert len(rejected) == 190
+        assert redis_client.zcard(rate_limit.active_requests_key) == 10
+
+        for request_id in admitted:
+            rate_limit.exit(request_id)
+        assert redis_client.zcard(rate_limit.active_requests_key) == 0
+
+    def test_in_flight_requests_never_exceed_the_limit_under_load(self, rate_limit):
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+        admitted = 0
+
+        def enter_and_exit():
+            nonlocal in_flight, peak, admitted
+            for _ in range(50):
+                try:
+                    request_id = rate_limit.enter()
+                except AppInvokeQuotaExceededError:
+                    continue
+                with lock:
+                    in_flight += 1
+                    admitted += 1
+                    peak = max(peak, in_flight)
+                time.sleep(0.001)
+                with lock:
+                    in_flight -= 1
+                rate_limit.exit(request_id)
+
+        threads = [threading.Thread(target=enter_and_exit) for _ in range(100)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert admitted > 0
+        assert peak <= 10
+        assert redis_client.zcard(rate_limit.active_requests_key) == 0
+
+    def test_timed_out_requests_are_expired_on_enter(self, rate_limit):
+        for _ in range(10):
+            rate_limit.enter()
+        with pytest.raises(AppInvokeQuotaExceededError):
+            rate_limit.enter()
+
+        with patch("time.time", return_value=time.time() + RateLimit._REQUEST_MAX_ALIVE_TIME + 1):
+            request_id = rate_limit.enter()
+
+        assert redis_client.zrange(rate_limit.active_requests_key, 0, -1) == [request_id.encode()]
+
+    def test_max_active_requests_is_shared_through_redis(self, rate_limit):
+        redis_client.set(rate_limit.max_active_requests_key, 2)
+
+        rate_limit.enter()
+        rate_limit.enter()
+        with pytest.raises(AppInvokeQuotaExceededError):
+            rate_limit.enter()
+
+        assert rate_limit.max_active_requests == 2
@@ -0,0 +1,104 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from configs import dify_config
+from core.app.apps import base_app_queue_manager
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
+from core.app.apps.task_stop_signal import TaskStopSignalSubscriber
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import QueuePingEvent, QueueTextChunkEvent, WorkflowQueueMessage
+
+
+class _QueueManager(AppQueueManager):
+    def _publish(self, event, pub_from: PublishFrom):
+        self._q.put(WorkflowQueueMessage(task_id=self._task_id, app_mode="advanced-chat", event=event))
+
+
+@pytest.fixture
+def queue_manager():
+    subscriber = TaskStopSignalSubscriber()
+    subscriber._thread = MagicMock()  # do not subscribe
+    subscriber._listening = True
+    with (
+        patch.object(base_app_queue_manager, "redis_client") as mock_redis,
+        patch.object(base_app_queue_manager, "task_stop_signals", subscriber),
+    ):
+        mock_redis.get.return_value = None
+        yield _QueueManager("task-1", "user-1", InvokeFrom.SERVICE_API)
+
+
+@pytest.fixture
+def coalesce(monkeypatch):
+    def configure(window_ms: int, max_bytes: int = 256):
+        monkeypatch.setattr(dify_config, "APP_STREAM_TEXT_COALESCE_WINDOW_MS", window_ms)
+        monkeypatch.setattr(dify_config, "APP_STREAM_TEXT_COALESCE_MAX_BYTES", max_bytes)
+
+    return configure
+
+
+def _listen(queue_manager: AppQueueManager) -> list:
+    queue_manager.stop_listen()
+    return [message.event for message in queue_manager.listen()]
+
+
+def test_text_chunks_are_not_coalesced_by_default(queue_manager, coalesce):
+    coalesce(0)
+    for text in ["a", "b", "c"]:
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+
+    assert [event.text for event in _listen(queue_manager)] == ["a", "b", "c"]
+
+
+def test_consecutive_text_chunks_are_merged_in_order(queue_manager, coalesce):
+    coalesce(20)
+    queue_manager.publish(QueueTextChunkEvent(text="Hel"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueTextChunkEvent(text="lo"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueuePingEvent(), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueTextChunkEvent(text=" wor"), PublishFrom.APPLICATION_MANAGER)
+    queue_manager.publish(QueueTextChunkEvent(text="ld"), PublishFrom.APPLICATION_MANAGER)
+
+    events = _listen(queue_manager)
+
+    assert [type(event) for event in events] == [QueueTextChunkEvent, QueuePingEvent, QueueTextChunkEvent]
+    assert events[0].text == "Hello"
+    assert events[2].text == " world"
+
+
+def test_text_chunks_from_different_sources_are_not_merged(queue_manager, coalesce):
+    coalesce(20)
+    queue_manager.publish(
+        QueueTextChunkEvent(text="a", from_variable_selector=["llm1", "text"]), PublishFrom.APPLICATION_MANAGER
+    )
+    queue_manager.publish(
+        QueueTextChunkEvent(text="b", from_variable_selector=["llm2", "text"]), PublishFrom.APPLICATION_MANAGER
+    )
+
+    assert [event.text for event in _listen(queue_manager)] == ["a", "b"]
+
+
+def test_merged_text_is_flushed_at_max_bytes(queue_manager, coalesce):
+    coalesce(1000, max_bytes=4)
+    for text in "abcdefghij":
+        queue_manager.publish(QueueTextChunkEvent(text=text), PublishFrom.APPLICATION_MANAGER)
+
+    assert [event.text for event in _listen(queue_manager)] == ["abcd", "efgh", "ij"]
+
+
+def test_merged_text_is_flushed_when_window_expires(queue_manager, coalesce):
+    coalesce(20)
+    queue_manager.publish(QueueTextChunkEvent(text="a"), PublishFrom.APPLICATION_MANAGER)
+
+    def publish_late():
+        time.sleep(0.2)
+        queue_manager.publish(QueueTextChunkEvent(text="b"), PublishFrom.APPLICATION_MANAGER)
+        queue_manager.stop_listen()
+
+    publisher = threading.Thread(target=publish_late)
+    publisher.start()
+    events = [message.event for message in queue_manager.listen()]
+    publisher.join()
+
+    assert [event.text for event in events] == ["a", "b"]
@@ -0,0 +1,115 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.app.apps import base_app_queue_manager, task_stop_signal
+from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
+from core.app.apps.task_stop_signal import TASK_STOP_SIGNAL_CHANNEL, TaskStopSignalSubscriber
+from core.app.entities.app_invoke_entities import InvokeFrom
+
+
+class FakePubSub:
+    def __init__(self, messages: list[dict], done: threading.Event):
+        self._messages = messages
+        self._done = done
+        self.channels: list[str] = []
+
+    def subscribe(self, channel: str):
+        self.channels.append(channel)
+
+    def listen(self):
+        yield from self._messages
+        self._done.set()
+        # keep the subscription open like a real connection would
+        threading.Event().wait()
+
+    def close(self):
+        pass
+
+
+class _QueueManager(AppQueueManager):
+    def _publish(self, event, pub_from: PublishFrom):
+        self._q.put(event)
+
+
+def test_subscriber_sets_events_of_registered_tasks():
+    done = threading.Event()
+    pubsub = FakePubSub(
+        [
+            {"type": "message", "data": b"task-1"},
+            {"type": "message", "data": b"unknown-task"},
+        ],
+        done,
+    )
+    subscriber = TaskStopSignalSubscriber()
+
+    with patch.object(task_stop_signal, "redis_client") as mock_redis:
+        mock_redis.pubsub.return_value = pubsub
+        stopped = subscriber.register("task-1")
+        running = subscriber.register("task-2")
+        assert done.wait(timeout=5)
+
+    assert pubsub.channels == [TASK_STOP_SIGNAL_CHANNEL]
+    assert stopped.is_set()
+    assert not running.is_set()
+    assert subscriber.listening
+
+
+def test_unregistered_tasks_are_not_notified():
+    subscriber = TaskStopSignalSubscriber()
+    subscriber._thread = MagicMock()  # do not subscribe
+    event = subscriber.register("task-1")
+    subscriber.unregister("task-1", event)
+
+    subscriber.notify("task-1")
+
+    assert not event.is_set()
+    assert subscriber._events == {}
+
+
+@pytest.fixture
+def mock_redis():
+    with patch.object(base_app_queue_manager, "redis_client") as mock_redis:
+        mock_redis.get.return_value = None
+        yield mock_redis
+
+
+@pytest.fixture
+def subscriber():
+    subscriber = TaskStopSignalSubscriber()
+    subscriber._thread = MagicMock()  # do not subscribe
+    with patch.object(base_app_queue_manager, "task_stop_signals", subscriber):
+        yield subscriber
+
+
+def test_stop_flag_is_only_polled_as_fallback_while_subscribed(mock_redis, subscriber):
+    subscriber._listening = True
+    queue_manager = _QueueManager("task-1", "user-1", InvokeFrom.SERVICE_API)
+
+    for _ in range(100):
+        assert not queue_manager._is_stopped()
+    assert mock_redis.get.call_count == 1
+
+    subscriber.notify("task-1")
+
+    assert queue_manager._is_stopped()
+    assert mock_redis.get.call_count == 1
+
+
+def test_stop_flag_is_polled_on_every_check_while_unsubscribed(mock_redis, subscriber):
+    queue_manager = _QueueManager("task-1", "user-1", InvokeFrom.SERVICE_API)
+
+    for _ in range(3):
+        assert not queue_manager._is_stopped()
+    assert mock_redis.get.call_count == 3
+
+    mock_redis.get.return_value = b"1"
+    assert queue_manager._is_stopped()
+
+
+def test_set_stop_flag_publishes_stop_signal(mock_redis):
+    AppQueueManager.set_stop_flag_no_user_check("task-1")
+
+    mock_redis.setex.assert_called_once_with("generate_task_stopped:task-1", 600, 1)
+    mock_redis.publish.assert_called_once_with(TASK_STOP_SIGNAL_CHANNEL, "task-1")
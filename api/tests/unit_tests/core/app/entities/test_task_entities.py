@@ -0,0 +1,54 @@
+from core.app.entities.task_entities import ANSWER_CHUNKS_JOIN_SIZE, EasyUITaskState, WorkflowTaskState
+from core.model_runtime.entities.llm_entities import LLMResult, LLMUsage
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+
+
+def test_workflow_task_state_joins_appended_answer():
+    task_state = WorkflowTaskState()
+    assert task_state.answer == ""
+
+    for text in ["Hello", ", ", "world"]:
+        task_state.append_answer(text)
+
+    assert task_state.answer == "Hello, world"
+    task_state.append_answer("!")
+    assert task_state.answer == "Hello, world!"
+
+
+def test_workflow_task_state_answer_can_be_replaced():
+    task_state = WorkflowTaskState()
+    task_state.append_answer("flagged")
+
+    task_state.answer = "preset response"
+    task_state.append_answer(".")
+
+    assert task_state.answer == "preset response."
+
+
+def test_workflow_task_state_joins_chunks_past_join_size():
+    task_state = WorkflowTaskState()
+
+    for i in range(ANSWER_CHUNKS_JOIN_SIZE * 2 + 1):
+        task_state.append_answer(str(i % 10))
+
+    assert len(task_state.answer_chunks) < ANSWER_CHUNKS_JOIN_SIZE
+    assert task_state.answer == "".join(str(i % 10) for i in range(ANSWER_CHUNKS_JOIN_SIZE * 2 + 1))
+
+
+def test_easy_ui_task_state_flushes_answer_into_llm_result():
+    task_state = EasyUITaskState(
+        llm_result=LLMResult(
+            model="gpt-4o",
+            prompt_messages=[],
+            message=AssistantPromptMessage(content=""),
+            usage=LLMUsage.empty_usage(),
+        )
+    )
+    task_state.append_answer("Hello")
+    task_state.append_answer(" world")
+    assert task_state.llm_result.message.content == ""
+
+    task_state.flush_answer()
+    task_state.flush_answer()
+
+    assert task_state.llm_result.message.content == "Hello world"
@@ -1,77 +1,74 @@
-import time
-from unittest.mock import MagicMock, patch
+import threading
+from unittest.mock import patch
 
 import pytest
 
-from core.app.features.rate_limiting.rate_limit import RateLimit
+from core.app.features.rate_limiting.rate_limit import _ENTER_SCRIPT, _FLUSH_SCRIPT, RateLimit
+
+
+class FakeRateLimitRedis:
+    """
+    In-memory Redis for rate limit tests.
+
+    Registered scripts are emulated in Python and run under a lock, so they are atomic like
+    scripts run by Redis.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.strings: dict[str, str] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.script_calls = 0
+
+    def register_script(self, script: str):
+        handlers = {_FLUSH_SCRIPT: self._flush, _ENTER_SCRIPT: self._enter}
+        handler = handlers[script]
+
+        def run(keys, args):
+            with self._lock:
+                self.script_calls += 1
+                return handler(keys, [str(arg) for arg in args])
+
+        return run
+
+    def zrem(self, key, *members):
+        with self._lock:
+            sorted_set = self.sorted_sets.get(key, {})
+            return sum(sorted_set.pop(member, None) is not None for member in members)
+
+    def _flush(self, keys, args):
+        active_key, max_key = keys
+        now, max_alive_time, local_max, use_local, _ = args
+        if use_local == "1" or max_key not in self.strings:
+            self.strings[max_key] = local_max
+        self._expire_requests(active_key, float(now) - float(max_alive_time))
+        return int(self.strings[max_key])
+
+    def _enter(self, keys, args):
+        active_key, max_key = keys
+        now, max_alive_time, request_id, local_max, _ = args
+        self.strings[max_key] = local_max
+        max_active_requests = int(local_max)
+        self._expire_requests(active_key, float(now) - float(max_alive_time))
+        sorted_set = self.sorted_sets.setdefault(active_key, {})
+        if len(sorted_set) >= max_active_requests:
+            return [0, max_active_requests]
+        sorted_set[request_id] = float(now)
+        return [1, max_active_requests]
+
+    def _expire_requests(self, key, max_score):
+        sorted_set = self.sorted_sets.get(key, {})
+        for member, score in list(sorted_set.items()):
+            if score <= max_score:
+                del sorted_set[member]
 
 
 @pytest.fixture
-def mock_redis():
-    """Mock Redis client with realistic behavior for rate limiting tests."""
-    mock_client = MagicMock()
-
-    # Redis data storage for simulation
-    mock_data = {}
-    mock_hashes = {}
-    mock_expiry = {}
-
-    def mock_setex(key, ttl, value):
-        mock_data[key] = str(value)
-        mock_expiry[key] = time.time() + ttl.total_seconds() if hasattr(ttl, "total_seconds") else time.time() + ttl
-        return True
-
-    def mock_get(key):
-        if key in mock_data and (key not in mock_expiry or time.time() < mock_expiry[key]):
-            return mock_data[key].encode("utf-8")
-        return None
-
-    def mock_exists(key):
-        return key in mock_data or key in mock_hashes
-
-    def mock_expire(key, ttl):
-        if key in mock_data or key in mock_hashes:
-            mock_expiry[key] = time.time() + ttl.total_seconds() if hasattr(ttl, "total_seconds") else time.time() + ttl
-        return True
-
-    def mock_hset(key, field, value):
-        if key not in mock_hashes:
-            mock_hashes[key] = {}
-        mock_hashes[key][field] = str(value).encode("utf-8")
-        return True
-
-    def mock_hgetall(key):
-        return mock_hashes.get(key, {})
-
-    def mock_hdel(key, *fields):
-        if key in mock_hashes:
-            count = 0
-            for field in fields:
-                if field in mock_hashes[key]:
-                    del mock_hashes[key][field]
-                    count += 1
-            return count
-        return 0
-
-    def mock_hlen(key):
-        return len(mock_hashes.get(key, {}))
-
-    # Configure mock methods
-    mock_client.setex = mock_setex
-    mock_client.get = mock_get
-    mock_client.exists = mock_exists
-    mock_client.expire = mock_expire
-    mock_client.hset = mock_hset
-    mock_client.hgetall = mock_hgetall
-    mock_client.hdel = mock_hdel
-    mock_client.hlen = mock_hlen
-
-    # Store references for test verification
-    mock_client._mock_data = mock_data
-    mock_client._mock_hashes = mock_hashes
-    mock_client._mock_expiry = mock_expiry
-
-    return mock_client
+def fake_redis():
+    """Patch redis_client with an in-memory Redis emulating the rate limit scripts."""
+    fake = FakeRateLimitRedis()
+    with patch("core.app.features.rate_limiting.rate_limit.redis_client", fake):
+        yield fake
 
 
 @pytest.fixture
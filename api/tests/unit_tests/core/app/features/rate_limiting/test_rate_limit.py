@@ -1,6 +1,5 @@
 import threading
 import time
-from datetime import timedelta
 from unittest.mock import patch
 
 import pytest
@@ -8,19 +7,15 @@ import pytest
 from core.app.features.rate_limiting.rate_limit import RateLimit
 from core.errors.error import AppInvokeQuotaExceededError
 
+ACTIVE_REQUESTS_KEY = "dify:rate_limit:{test_client}:active_requests"
+MAX_ACTIVE_REQUESTS_KEY = "dify:rate_limit:{test_client}:max_active_requests"
+
 
 class TestRateLimit:
     """Core rate limiting functionality tests."""
 
-    def test_should_return_same_instance_for_same_client_id(self, redis_patch):
+    def test_should_return_same_instance_for_same_client_id(self, fake_redis):
         """Test singleton behavior for same client ID."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         rate_limit1 = RateLimit("client1", 5)
         rate_limit2 = RateLimit("client1", 10)  # Second instance with different limit
 
@@ -29,15 +24,8 @@ class TestRateLimit:
         # This reflects the actual behavior where __init__ always sets max_active_requests
         assert rate_limit1.max_active_requests == 10
 
-    def test_should_create_different_instances_for_different_client_ids(self, redis_patch):
+    def test_should_create_different_instances_for_different_client_ids(self, fake_redis):
         """Test different instances for different client IDs."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         rate_limit1 = RateLimit("client1", 5)
         rate_limit2 = RateLimit("client2", 10)
 
@@ -45,21 +33,14 @@ class TestRateLimit:
         assert rate_limit1.client_id == "client1"
         assert rate_limit2.client_id == "client2"
 
-    def test_should_initialize_with_valid_parameters(self, redis_patch):
+    def test_should_initialize_with_valid_parameters(self, fake_redis):
         """Test normal initialization."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
 
         assert rate_limit.client_id == "test_client"
         assert rate_limit.max_active_requests == 5
         assert hasattr(rate_limit, "initialized")
-        redis_patch.setex.assert_called_once()
+        assert fake_redis.script_calls == 1
 
     def test_should_skip_initialization_if_disabled(self):
         """Test no initialization when rate limiting is disabled."""
@@ -68,21 +49,13 @@ class TestRateLimit:
         assert rate_limit.disabled()
         assert not hasattr(rate_limit, "initialized")
 
-    def test_should_skip_reinitialization_of_existing_instance(self, redis_patch):
+    def test_should_skip_reinitialization_of_existing_instance(self, fake_redis):
         """Test that existing instance doesn't reinitialize."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         RateLimit("client1", 5)
-        redis_patch.reset_mock()
-
         RateLimit("client1", 10)
 
-        redis_patch.setex.assert_not_called()
+        assert fake_redis.script_calls == 1
+        assert fake_redis.strings["dify:rate_limit:{client1}:max_active_requests"] == "5"
 
     def test_should_be_disabled_when_max_requests_is_zero_or_negative(self):
         """Test disabled state for zero or negative limits."""
@@ -92,166 +65,99 @@ class TestRateLimit:
         assert rate_limit_zero.disabled()
         assert rate_limit_negative.disabled()
 
-    def test_should_set_redis_keys_on_first_flush(self, redis_patch):
+    def test_should_set_redis_keys_on_first_flush(self, fake_redis):
         """Test Redis keys are set correctly on initial flush."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
 
-        expected_max_key = "dify:rate_limit:test_client:max_active_requests"
-        redis_patch.setex.assert_called_with(expected_max_key, timedelta(days=1), 5)
+        assert rate_limit.max_active_requests_key == MAX_ACTIVE_REQUESTS_KEY
+        assert rate_limit.active_requests_key == ACTIVE_REQUESTS_KEY
+        assert fake_redis.strings[MAX_ACTIVE_REQUESTS_KEY] == "5"
 
-    def test_should_sync_max_requests_from_redis_on_subsequent_flush(self, redis_patch):
+    def test_should_sync_max_requests_from_redis_on_subsequent_flush(self, fake_redis):
         """Test max requests syncs from Redis when key exists."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": True,
-                "get.return_value": b"10",
-                "expire.return_value": True,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
+        fake_redis.strings[MAX_ACTIVE_REQUESTS_KEY] = "10"
+
         rate_limit.flush_cache()
 
         assert rate_limit.max_active_requests == 10
 
     @patch("time.time")
-    def test_should_clean_timeout_requests_from_active_list(self, mock_time, redis_patch):
+    def test_should_clean_timeout_requests_from_active_list(self, mock_time, fake_redis):
         """Test cleanup of timed-out requests."""
         current_time = 1000.0
         mock_time.return_value = current_time
-
-        # Setup mock Redis with timed-out requests
-        timeout_requests = {
-            b"req1": str(current_time - 700).encode(),  # 700 seconds ago (timeout)
-            b"req2": str(current_time - 100).encode(),  # 100 seconds ago (active)
+        fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] = {
+            "req1": current_time - 700,  # 700 seconds ago (timeout)
+            "req2": current_time - 100,  # 100 seconds ago (active)
         }
 
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": True,
-                "get.return_value": b"5",
-                "expire.return_value": True,
-                "hgetall.return_value": timeout_requests,
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
-        redis_patch.reset_mock()  # Reset to avoid counting initialization calls
         rate_limit.flush_cache()
 
-        # Verify timeout request was cleaned up
-        redis_patch.hdel.assert_called_once()
-        call_args = redis_patch.hdel.call_args[0]
-        assert call_args[0] == "dify:rate_limit:test_client:active_requests"
-        assert b"req1" in call_args  # Timeout request should be removed
-        assert b"req2" not in call_args  # Active request should remain
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {"req2": current_time - 100}
 
 
 class TestRateLimitEnterExit:
     """Rate limiting enter/exit logic tests."""
 
-    def test_should_allow_request_within_limit(self, redis_patch):
+    def test_should_allow_request_within_limit(self, fake_redis):
         """Test allowing requests within the rate limit."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 2,
-                "hset.return_value": True,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         request_id = rate_limit.enter()
 
         assert request_id != RateLimit._UNLIMITED_REQUEST_ID
-        redis_patch.hset.assert_called_once()
+        assert request_id in fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY]
 
-    def test_should_generate_request_id_if_not_provided(self, redis_patch):
-        """Test auto-generation of request ID."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 0,
-                "hset.return_value": True,
-            }
-        )
+    def test_should_decide_admission_in_one_script_call(self, fake_redis):
+        """Test each admission decision is a single round-trip."""
+        rate_limit = RateLimit("test_client", 5)
+        calls = fake_redis.script_calls
 
+        rate_limit.enter()
+
+        assert fake_redis.script_calls == calls + 1
+
+    def test_should_generate_request_id_if_not_provided(self, fake_redis):
+        """Test auto-generation of request ID."""
         rate_limit = RateLimit("test_client", 5)
         request_id = rate_limit.enter()
 
         assert len(request_id) == 36  # UUID format
 
-    def test_should_use_provided_request_id(self, redis_patch):
+    def test_should_use_provided_request_id(self, fake_redis):
         """Test using provided request ID."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 0,
-                "hset.return_value": True,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         custom_id = "custom_request_123"
         request_id = rate_limit.enter(custom_id)
 
         assert request_id == custom_id
 
-    def test_should_remove_request_on_exit(self, redis_patch):
+    def test_should_remove_request_on_exit(self, fake_redis):
         """Test request removal on exit."""
-        redis_patch.configure_mock(
-            **{
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
-        rate_limit.exit("test_request_id")
+        request_id = rate_limit.enter()
 
-        redis_patch.hdel.assert_called_once_with("dify:rate_limit:test_client:active_requests", "test_request_id")
+        rate_limit.exit(request_id)
 
-    def test_should_raise_quota_exceeded_when_at_limit(self, redis_patch):
-        """Test quota exceeded error when at limit."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 5,  # At limit
-            }
-        )
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {}
 
+    def test_should_raise_quota_exceeded_when_at_limit(self, fake_redis):
+        """Test quota exceeded error when at limit."""
         rate_limit = RateLimit("test_client", 5)
+        for _ in range(5):
+            rate_limit.enter()
 
         with pytest.raises(AppInvokeQuotaExceededError) as exc_info:
             rate_limit.enter()
 
         assert "Too many requests" in str(exc_info.value)
         assert "test_client" in str(exc_info.value)
+        assert len(fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY]) == 5
 
-    def test_should_allow_request_after_previous_exit(self, redis_patch):
+    def test_should_allow_request_after_previous_exit(self, fake_redis):
         """Test allowing new request after previous exit."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 4,  # Under limit after exit
-                "hset.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
-
-        rate_limit = RateLimit("test_client", 5)
+        rate_limit = RateLimit("test_client", 1)
 
         request_id = rate_limit.enter()
         rate_limit.exit(request_id)
@@ -260,27 +166,29 @@ class TestRateLimitEnterExit:
         assert new_request_id is not None
 
     @patch("time.time")
-    def test_should_flush_cache_when_interval_exceeded(self, mock_time, redis_patch):
-        """Test cache flush when time interval exceeded."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.return_value": 0,
-            }
-        )
-
+    def test_should_expire_timed_out_requests_on_enter(self, mock_time, fake_redis):
+        """Test requests outliving the max alive time do not count against the limit."""
         mock_time.return_value = 1000.0
-        rate_limit = RateLimit("test_client", 5)
+        rate_limit = RateLimit("test_client", 1)
+        rate_limit.enter()
+
+        mock_time.return_value = 1000.0 + RateLimit._REQUEST_MAX_ALIVE_TIME + 1
+        request_id = rate_limit.enter()
 
-        # Advance time beyond flush interval
-        mock_time.return_value = 1400.0  # 400 seconds later
-        redis_patch.reset_mock()
+        assert list(fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY]) == [request_id]
 
+    def test_should_publish_local_max_requests_on_enter(self, fake_redis):
+        """Test a changed app limit replaces the published one on the next enter."""
+        RateLimit("test_client", 2)
+        assert fake_redis.strings[MAX_ACTIVE_REQUESTS_KEY] == "2"
+
+        rate_limit = RateLimit("test_client", 1)
         rate_limit.enter()
+        with pytest.raises(AppInvokeQuotaExceededError):
+            rate_limit.enter()
 
-        # Should have called setex again due to cache flush
-        redis_patch.setex.assert_called()
+        assert rate_limit.max_active_requests == 1
+        assert fake_redis.strings[MAX_ACTIVE_REQUESTS_KEY] == "1"
 
     def test_should_return_unlimited_id_when_disabled(self):
         """Test unlimited ID return when rate limiting disabled."""
@@ -294,31 +202,23 @@ class TestRateLimitEnterExit:
         rate_limit = RateLimit("test_client", 0)
         rate_limit.exit(RateLimit._UNLIMITED_REQUEST_ID)
 
-        redis_patch.hdel.assert_not_called()
+        redis_patch.zrem.assert_not_called()
 
 
 class TestRateLimitGenerator:
     """Rate limit generator wrapper tests."""
 
-    def test_should_wrap_generator_and_iterate_normally(self, redis_patch, sample_generator):
+    def test_should_wrap_generator_and_iterate_normally(self, fake_redis, sample_generator):
         """Test normal generator iteration with rate limit wrapper."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         generator = sample_generator()
-        request_id = "test_request"
+        request_id = rate_limit.enter()
 
         wrapped_gen = rate_limit.generate(generator, request_id)
         result = list(wrapped_gen)
 
         assert result == ["item1", "item2", "item3"]
-        redis_patch.hdel.assert_called_once_with("dify:rate_limit:test_client:active_requests", request_id)
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {}
 
     def test_should_handle_mapping_input_directly(self, sample_mapping):
         """Test direct return of mapping input."""
@@ -327,55 +227,32 @@ class TestRateLimitGenerator:
 
         assert result is sample_mapping
 
-    def test_should_cleanup_on_exception_during_iteration(self, redis_patch, sample_generator):
+    def test_should_cleanup_on_exception_during_iteration(self, fake_redis, sample_generator):
         """Test cleanup when exception occurs during iteration."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         generator = sample_generator(raise_error=True)
-        request_id = "test_request"
+        request_id = rate_limit.enter()
 
         wrapped_gen = rate_limit.generate(generator, request_id)
 
         with pytest.raises(ValueError):
             list(wrapped_gen)
 
-        redis_patch.hdel.assert_called_once_with("dify:rate_limit:test_client:active_requests", request_id)
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {}
 
-    def test_should_cleanup_on_explicit_close(self, redis_patch, sample_generator):
+    def test_should_cleanup_on_explicit_close(self, fake_redis, sample_generator):
         """Test cleanup on explicit generator close."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         generator = sample_generator()
-        request_id = "test_request"
+        request_id = rate_limit.enter()
 
         wrapped_gen = rate_limit.generate(generator, request_id)
         wrapped_gen.close()
 
-        redis_patch.hdel.assert_called_once()
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {}
 
-    def test_should_handle_generator_without_close_method(self, redis_patch):
+    def test_should_handle_generator_without_close_method(self, fake_redis):
         """Test handling generator without close method."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
 
         # Create a generator-like object without close method
         class SimpleGenerator:
@@ -395,22 +272,15 @@ class TestRateLimitGenerator:
 
         rate_limit = RateLimit("test_client", 5)
         generator = SimpleGenerator()
+        request_id = rate_limit.enter()
 
-        wrapped_gen = rate_limit.generate(generator, "test_request")
+        wrapped_gen = rate_limit.generate(generator, request_id)
         wrapped_gen.close()  # Should not raise error
 
-        redis_patch.hdel.assert_called_once()
+        assert fake_redis.sorted_sets[ACTIVE_REQUESTS_KEY] == {}
 
-    def test_should_prevent_iteration_after_close(self, redis_patch, sample_generator):
+    def test_should_prevent_iteration_after_close(self, fake_redis, sample_generator):
         """Test StopIteration after generator is closed."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hdel.return_value": 1,
-            }
-        )
-
         rate_limit = RateLimit("test_client", 5)
         generator = sample_generator()
 
@@ -424,15 +294,8 @@ class TestRateLimitGenerator:
 class TestRateLimitConcurrency:
     """Concurrent access safety tests."""
 
-    def test_should_handle_concurrent_instance_creation(self, redis_patch):
+    def test_should_handle_concurrent_instance_creation(self, fake_redis):
         """Test thread-safe singleton instance creation."""
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-            }
-        )
-
         instances = []
         errors = []
 
@@ -453,117 +316,63 @@ class TestRateLimitConcurrency:
         assert len(errors) == 0
         assert len({id(inst) for inst in instances}) == 1  # All same instance
 
-    def test_should_handle_concurrent_enter_requests(self, redis_patch):
-        """Test concurrent enter requests handling."""
-        # Setup mock to simulate realistic Redis behavior
-        request_count = 0
-
-        def mock_hlen(key):
-            nonlocal request_count
-            return request_count
-
-        def mock_hset(key, field, value):
-            nonlocal request_count
-            request_count += 1
-            return True
-
-        redis_patch.configure_mock(
-            **{
-                "exists.return_value": False,
-                "setex.return_value": True,
-                "hlen.side_effect": mock_hlen,
-                "hset.side_effect": mock_hset,
-            }
-        )
-
-        rate_limit = RateLimit("concurrent_client", 3)
+    def test_should_not_over_admit_concurrent_enter_requests(self, fake_redis):
+        """Test a burst of concurrent requests admits exactly the limit."""
+        rate_limit = RateLimit("concurrent_client", 10)
+        barrier = threading.Barrier(100)
         results = []
         errors = []
 
         def try_enter():
+            barrier.wait()
             try:
-                request_id = rate_limit.enter()
-                results.append(request_id)
+                results.append(rate_limit.enter())
             except AppInvokeQuotaExceededError as e:
                 errors.append(e)
 
-        threads = [threading.Thread(target=try_enter) for _ in range(5)]
+        threads = [threading.Thread(target=try_enter) for _ in range(100)]
 
         for t in threads:
             t.start()
         for t in threads:
             t.join()
 
-        # Should have some successful requests and some quota exceeded
-        assert len(results) + len(errors) == 5
-        assert len(errors) > 0  # Some should be rejected
-
-    @patch("time.time")
-    def test_should_maintain_accurate_count_under_load(self, mock_time, redis_patch):
-        """Test accurate count maintenance under concurrent load."""
-        mock_time.return_value = 1000.0
-
-        # Use real mock_redis fixture for better simulation
-        mock_client = self._create_mock_redis()
-        redis_patch.configure_mock(**mock_client)
+        assert len(results) == 10
+        assert len(errors) == 90
+        assert len(fake_redis.sorted_sets["dify:rate_limit:{concurrent_client}:active_requests"]) == 10
 
+    def test_should_never_exceed_limit_under_load(self, fake_redis):
+        """Test the number of in-flight requests never exceeds the limit under sustained load."""
         rate_limit = RateLimit("load_test_client", 10)
-        active_requests = []
+        lock = threading.Lock()
+        in_flight = 0
+        peak = 0
+        admitted = 0
 
         def enter_and_exit():
-            try:
-                request_id = rate_limit.enter()
-                active_requests.append(request_id)
-                time.sleep(0.01)  # Simulate some work
+            nonlocal in_flight, peak, admitted
+            for _ in range(20):
+                try:
+                    request_id = rate_limit.enter()
+                except AppInvokeQuotaExceededError:
+                    continue
+                with lock:
+                    in_flight += 1
+                    admitted += 1
+                    peak = max(peak, in_flight)
+                time.sleep(0.001)  # Simulate some work
+                with lock:
+                    in_flight -= 1
                 rate_limit.exit(request_id)
-                active_requests.remove(request_id)
-            except AppInvokeQuotaExceededError:
-                pass  # Expected under load
 
-        threads = [threading.Thread(target=enter_and_exit) for _ in range(20)]
+        threads = [threading.Thread(target=enter_and_exit) for _ in range(50)]
 
         for t in threads:
             t.start()
         for t in threads:
             t.join()
 
+        assert admitted > 0
+        assert peak <= 10
         # All requests should have been cleaned up
-        assert len(active_requests) == 0
-
-    def _create_mock_redis(self):
-        """Create a thread-safe mock Redis for concurrency tests."""
-        import threading
-
-        lock = threading.Lock()
-        data = {}
-        hashes = {}
-
-        def mock_hlen(key):
-            with lock:
-                return len(hashes.get(key, {}))
-
-        def mock_hset(key, field, value):
-            with lock:
-                if key not in hashes:
-                    hashes[key] = {}
-                hashes[key][field] = str(value).encode("utf-8")
-                return True
-
-        def mock_hdel(key, *fields):
-            with lock:
-                if key in hashes:
-                    count = 0
-                    for field in fields:
-                        if field in hashes[key]:
-                            del hashes[key][field]
-                            count += 1
-                    return count
-                return 0
-
-        return {
-            "exists.return_value": False,
-            "setex.return_value": True,
-            "hlen.side_effect": mock_hlen,
-            "hset.side_effect": mock_hset,
-            "hdel.side_effect": mock_hdel,
-        }
+        assert fake_redis.sorted_sets["dify:rate_limit:{load_test_client}:active_requests"] == {}
@@ -0,0 +1,197 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from constants import UUID_NIL
+from core.memory import token_buffer_memory
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, UserPromptMessage
+from models.enums import MessageStatus
+from models.model import AppMode, Message, MessageFile
+
+TOKENIZER = "openai/gpt-4o"
+
+
+def _build_messages(count: int) -> dict[str, MagicMock]:
+    """Messages of a conversation, the query and the answer are 10 tokens each."""
+    messages = {}
+    for i in range(count):
+        message = MagicMock()
+        message.id = f"message-{i}"
+        message.parent_message_id = f"message-{i - 1}" if i else UUID_NIL
+        message.query = f"question {i} " + "q " * 8
+        message.answer = f"answer {i} " + "a " * 8
+        message.answer_tokens = 10
+        message.status = MessageStatus.NORMAL
+        messages[message.id] = message
+    return messages
+
+
+def _rows(messages: dict[str, MagicMock], stored: set[str]) -> list[SimpleNamespace]:
+    """History query rows, newest first."""
+    return [
+        SimpleNamespace(
+            id=message.id,
+            parent_message_id=message.parent_message_id,
+            answer=message.answer[:1],
+            answer_tokens=message.answer_tokens,
+            stored_query_tokens=10 if message.id in stored else None,
+            stored_answer_tokens=10 if message.id in stored else None,
+        )
+        for message in reversed(messages.values())
+    ]
+
+
+def _count_tokens(prompt_messages) -> int:
+    return sum(len(prompt_message.content.split()) for prompt_message in prompt_messages)
+
+
+class FakeSession:
+    def __init__(self, messages: dict[str, MagicMock], stored: set[str]):
+        self.messages = messages
+        self.rows = _rows(messages, stored)
+        self.loaded_message_ids: list[str] = []
+        self.message_queries = 0
+        self.file_queries = 0
+
+    def execute(self, stmt):
+        return MagicMock(all=MagicMock(return_value=self.rows))
+
+    def get_one(self, model, message_id):
+        assert model is Message
+        self.loaded_message_ids.append(message_id)
+        return self.messages[message_id]
+
+    def scalars(self, stmt):
+        entity = stmt.column_descriptions[0]["entity"]
+        if entity is MessageFile:
+            self.file_queries += 1
+            return MagicMock(all=MagicMock(return_value=[]))
+        assert entity is Message
+        self.message_queries += 1
+        message_ids = next(iter(stmt.compile().params.values()))
+        self.loaded_message_ids.extend(message_ids)
+        return [self.messages[message_id] for message_id in message_ids]
+
+
+@pytest.fixture
+def memory():
+    conversation = MagicMock()
+    conversation.id = "conversation-1"
+    conversation.mode = AppMode.CHAT
+    model_instance = MagicMock()
+    model_instance.provider = "openai"
+    model_instance.model = "gpt-4o"
+    model_instance.get_llm_num_tokens.side_effect = _count_tokens
+    return TokenBufferMemory(conversation=conversation, model_instance=model_instance)
+
+
+@pytest.fixture
+def mock_session_factory():
+    with patch.object(token_buffer_memory, "Session") as mock_session_factory:
+        yield mock_session_factory
+
+
+def _get_history(memory, session: FakeSession, max_token_limit: int):
+    with patch.object(token_buffer_memory, "db") as mock_db:
+        mock_db.session = session
+        return memory.get_history_prompt_messages(max_token_limit=max_token_limit)
+
+
+def test_stored_counts_select_history_without_tokenizer_calls(memory, mock_session_factory):
+    messages = _build_messages(50)
+    session = FakeSession(messages, stored=set(messages))
+
+    prompt_messages = _get_history(memory, session, max_token_limit=70)
+
+    # 3 messages fit, the answer of the 4th newest one fits on its own
+    assert [prompt_message.content.split()[:2] for prompt_message in prompt_messages] == [
+        ["answer", "46"],
+        ["question", "47"],
+        ["answer", "47"],
+        ["question", "48"],
+        ["answer", "48"],
+        ["question", "49"],
+        ["answer", "49"],
+    ]
+    assert isinstance(prompt_messages[0], AssistantPromptMessage)
+    assert isinstance(prompt_messages[1], UserPromptMessage)
+    memory.model_instance.get_llm_num_tokens.assert_not_called()
+    # only the selected messages are loaded, with one query, and built
+    assert session.message_queries == 1
+    assert sorted(session.loaded_message_ids) == ["message-46", "message-47", "message-48", "message-49"]
+    assert session.file_queries == 4
+    mock_session_factory.assert_not_called()
+
+
+def test_legacy_messages_are_counted_once_and_stored(memory, mock_session_factory):
+    messages = _build_messages(50)
+    session = FakeSession(messages, stored={f"message-{i}" for i in range(48)})
+
+    prompt_messages = _get_history(memory, session, max_token_limit=60)
+
+    assert len(prompt_messages) == 6
+    # query and answer of the 2 messages without stored counts
+    assert memory.model_instance.get_llm_num_tokens.call_count == 4
+    assert session.message_queries == 1
+    assert sorted(session.loaded_message_ids) == ["message-47", "message-48", "message-49"]
+
+    db_session = mock_session_factory.return_value.__enter__.return_value
+    db_session.execute.assert_called_once()
+    db_session.commit.assert_called_once()
+    params = db_session.execute.call_args.args[0].compile().params
+    assert sorted(value for key, value in params.items() if key.startswith("message_id")) == [
+        "message-48",
+        "message-49",
+    ]
+    assert {value for key, value in params.items() if key.startswith("tokenizer")} == {TOKENIZER}
+
+
+def test_counts_of_unfinished_or_failed_messages_are_not_stored(memory, mock_session_factory):
+    messages = _build_messages(5)
+    # an older sibling still being generated, and a failed message with a partial answer
+    messages["message-3"].answer = ""
+    messages["message-2"].status = MessageStatus.ERROR
+    session = FakeSession(messages, stored={"message-0"})
+
+    _get_history(memory, session, max_token_limit=10000)
+
+    db_session = mock_session_factory.return_value.__enter__.return_value
+    params = db_session.execute.call_args.args[0].compile().params
+    assert sorted(value for key, value in params.items() if key.startswith("message_id")) == [
+        "message-1",
+        "message-4",
+    ]
+
+
+def test_keeps_all_messages_within_token_limit(memory, mock_session_factory):
+    messages = _build_messages(50)
+    session = FakeSession(messages, stored=set(messages))
+
+    prompt_messages = _get_history(memory, session, max_token_limit=10000)
+
+    assert len(prompt_messages) == 100
+    assert prompt_messages[0].content.startswith("question 0 ")
+
+
+def test_keeps_newest_answer_when_it_exceeds_token_limit(memory, mock_session_factory):
+    messages = _build_messages(50)
+    session = FakeSession(messages, stored=set(messages))
+
+    prompt_messages = _get_history(memory, session, max_token_limit=5)
+
+    assert len(prompt_messages) == 1
+    assert isinstance(prompt_messages[0], AssistantPromptMessage)
+    assert prompt_messages[0].content.startswith("answer 49 ")
+
+
+def test_skips_newest_message_without_answer(memory, mock_session_factory):
+    messages = _build_messages(3)
+    messages["message-2"].answer = ""
+    messages["message-2"].answer_tokens = 0
+    session = FakeSession(messages, stored=set(messages))
+
+    prompt_messages = _get_history(memory, session, max_token_limit=10000)
+
+    assert [prompt_message.content.split()[1] for prompt_message in prompt_messages] == ["0", "0", "1", "1"]
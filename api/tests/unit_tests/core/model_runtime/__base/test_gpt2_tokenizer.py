@@ -0,0 +1,85 @@
+from unittest.mock import patch
+
+import pytest
+
+from core.model_runtime.model_providers.__base.tokenizers import gpt2_tokenizer
+from core.model_runtime.model_providers.__base.tokenizers.gpt2_tokenizer import GPT2Tokenizer
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded: list[str] = []
+        self.batches: list[list[str]] = []
+
+    def encode(self, text: str) -> list[str]:
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_batch(self, texts: list[str], num_threads: int = 8) -> list[list[str]]:
+        self.batches.append(texts)
+        return [text.split() for text in texts]
+
+
+class FakeTransformersEncoder:
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode(self, text: str) -> list[str]:
+        self.encoded.append(text)
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def clear_token_count_cache():
+    gpt2_tokenizer._token_count_cache.clear()
+    yield
+    gpt2_tokenizer._token_count_cache.clear()
+
+
+@pytest.fixture
+def encoder():
+    encoder = FakeEncoder()
+    with patch.object(GPT2Tokenizer, "get_encoder", return_value=encoder):
+        yield encoder
+
+
+def test_get_num_tokens_caches_counts(encoder):
+    assert GPT2Tokenizer.get_num_tokens("hello big world") == 3
+    assert GPT2Tokenizer.get_num_tokens("hello big world") == 3
+    assert GPT2Tokenizer.get_num_tokens("hello") == 1
+
+    assert encoder.encoded == ["hello big world", "hello"]
+
+
+def test_get_num_tokens_batch_encodes_only_uncached_texts_once(encoder):
+    GPT2Tokenizer.get_num_tokens("a b")
+
+    with patch.object(gpt2_tokenizer, "BATCH_ENCODE_MIN_SIZE", 2):
+        counts = GPT2Tokenizer.get_num_tokens_batch(["a b", "c d e", "", "c d e", "f"])
+
+    assert counts == [2, 3, 0, 3, 1]
+    assert encoder.batches == [["c d e", "", "f"]]
+    assert GPT2Tokenizer.get_num_tokens_batch(["f", "a b"]) == [1, 2]
+    assert len(encoder.batches) == 1
+
+
+def test_get_num_tokens_batch_encodes_small_batches_inline(encoder):
+    assert GPT2Tokenizer.get_num_tokens_batch(["a b", "c"]) == [2, 1]
+
+    assert encoder.batches == []
+    assert encoder.encoded == ["a b", "c"]
+
+
+def test_get_num_tokens_batch_without_batch_encoding():
+    encoder = FakeTransformersEncoder()
+    with patch.object(GPT2Tokenizer, "get_encoder", return_value=encoder):
+        assert GPT2Tokenizer.get_num_tokens_batch(["a b", "c"]) == [2, 1]
+
+    assert encoder.encoded == ["a b", "c"]
+
+
+def test_token_count_cache_is_bounded(encoder):
+    with patch.object(gpt2_tokenizer, "_token_count_cache", gpt2_tokenizer.LRUCache(maxsize=2)) as cache:
+        GPT2Tokenizer.get_num_tokens_batch(["a", "b", "c"])
+
+        assert len(cache) == 2
@@ -0,0 +1,132 @@
+import queue
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+from pydantic import BaseModel
+
+from core.ops import ops_trace_manager
+from core.ops.ops_trace_manager import TraceQueueManager
+from tasks import ops_trace_task
+from tasks.ops_trace_task import process_trace_tasks
+
+
+class FakeTraceInfo(BaseModel):
+    name: str
+    start_time: datetime
+
+
+def _trace_task(app_id: str | None, name: str) -> MagicMock:
+    task = MagicMock()
+    task.app_id = app_id
+    task.execute.return_value = FakeTraceInfo(name=name, start_time=datetime(2024, 1, 1))
+    return task
+
+
+def _trace_queue_manager() -> TraceQueueManager:
+    manager = TraceQueueManager.__new__(TraceQueueManager)
+    manager.app_id = "app-1"
+    manager.user_id = "user-1"
+    manager.trace_instance = MagicMock()
+    manager.flask_app = MagicMock()
+    return manager
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+
+    def setex(self, key, ttl, value):
+        self.values[key] = value
+
+    def getdel(self, key):
+        return self.values.pop(key, None)
+
+
+def test_batch_is_handed_over_as_one_redis_entry_and_one_celery_task():
+    redis = FakeRedis()
+    manager = _trace_queue_manager()
+    tasks = [
+        _trace_task("app-1", "a"),
+        _trace_task(None, "skipped"),
+        _trace_task("app-2", "b"),
+        _trace_task("app-1", "c"),
+    ]
+
+    with (
+        patch.object(ops_trace_manager, "redis_client", redis),
+        patch.object(ops_trace_manager, "process_trace_tasks") as mock_process,
+    ):
+        manager.send_batch_to_celery(tasks)
+
+    assert len(redis.values) == 1
+    mock_process.delay.assert_called_once()
+    batch_info = mock_process.delay.call_args.args[0]
+
+    trace_instances = {"app-1": MagicMock(), "app-2": MagicMock()}
+    with (
+        patch.object(ops_trace_task, "redis_client", redis),
+        patch.object(
+            ops_trace_manager.OpsTraceManager, "get_ops_trace_instance", side_effect=trace_instances.get
+        ) as mock_get_instance,
+    ):
+        process_trace_tasks(batch_info)
+
+    assert redis.values == {}
+    assert [call.args[0]["name"] for call in trace_instances["app-1"].trace.call_args_list] == ["a", "c"]
+    assert [call.args[0]["name"] for call in trace_instances["app-2"].trace.call_args_list] == ["b"]
+    assert mock_get_instance.call_count == 2
+
+
+def test_failing_trace_task_does_not_drop_the_batch():
+    redis = FakeRedis()
+    manager = _trace_queue_manager()
+    failing = _trace_task("app-1", "failing")
+    failing.execute.side_effect = ValueError("boom")
+
+    with (
+        patch.object(ops_trace_manager, "redis_client", redis),
+        patch.object(ops_trace_manager, "process_trace_tasks") as mock_process,
+    ):
+        manager.send_batch_to_celery([failing, _trace_task("app-1", "ok")])
+
+    trace_instance = MagicMock()
+    with (
+        patch.object(ops_trace_task, "redis_client", redis),
+        patch.object(ops_trace_manager.OpsTraceManager, "get_ops_trace_instance", return_value=trace_instance),
+    ):
+        process_trace_tasks(mock_process.delay.call_args.args[0])
+
+    assert [call.args[0]["name"] for call in trace_instance.trace.call_args_list] == ["ok"]
+
+
+def test_trace_task_is_dropped_when_queue_is_full():
+    manager = _trace_queue_manager()
+    bounded_queue: queue.Queue = queue.Queue(maxsize=1)
+
+    with (
+        patch.object(ops_trace_manager, "trace_manager_queue", bounded_queue),
+        patch.object(ops_trace_manager, "_dropped_trace_tasks") as mock_dropped,
+        patch.object(TraceQueueManager, "start_timer"),
+    ):
+        manager.add_trace_task(_trace_task(None, "a"))
+        manager.add_trace_task(_trace_task(None, "b"))
+
+    assert bounded_queue.qsize() == 1
+    mock_dropped.add.assert_called_once_with(1)
+
+
+def test_run_drains_the_queue_in_batches():
+    manager = _trace_queue_manager()
+    pending: queue.Queue = queue.Queue()
+    for i in range(5):
+        pending.put(_trace_task("app-1", str(i)))
+
+    with (
+        patch.object(ops_trace_manager, "trace_manager_queue", pending),
+        patch.object(ops_trace_manager, "trace_manager_batch_size", 2),
+        patch.object(TraceQueueManager, "send_to_celery") as mock_send,
+    ):
+        manager.run()
+
+    assert [len(call.args[0]) for call in mock_send.call_args_list] == [2, 2, 1]
+    assert pending.empty()
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock, patch
+
+from core.rag.datasource.keyword.jieba import jieba_inverted_index
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.keyword.keyword_type import KeyWordType
+from core.rag.models.document import Document
+from models.dataset import DocumentSegment
+
+
+def _build_keyword() -> JiebaInvertedIndex:
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    dataset.keyword_number = 10
+    return JiebaInvertedIndex(dataset)
+
+
+def test_keyword_factory_returns_inverted_index():
+    assert Keyword.get_keyword_factory(KeyWordType.JIEBA_INVERTED_INDEX) is JiebaInvertedIndex
+
+
+def test_add_texts_inserts_one_posting_per_keyword_and_segment():
+    keyword = _build_keyword()
+    texts = [
+        Document(page_content="a", metadata={"doc_id": "node-1"}),
+        Document(page_content="b", metadata={"doc_id": "node-2"}),
+    ]
+
+    with (
+        patch.object(jieba_inverted_index, "db") as mock_db,
+        patch.object(JiebaInvertedIndex, "_update_segment_keywords") as mock_update_segment_keywords,
+    ):
+        keyword.add_texts(texts, keywords_list=[["apple", "banana", "apple"], ["banana"]])
+
+    assert mock_update_segment_keywords.call_count == 2
+    mock_db.session.execute.assert_called_once()
+    insert_stmt = mock_db.session.execute.call_args.args[0]
+    inserted_rows = [{column.key: value for column, value in row.items()} for row in insert_stmt._multi_values[0]]
+    rows = {(row["keyword"], row["index_node_id"]) for row in inserted_rows}
+    assert rows == {
+        ("apple", "node-1"),
+        ("banana", "node-1"),
+        ("banana", "node-2"),
+    }
+    assert all(row["dataset_id"] == "dataset-1" for row in inserted_rows)
+
+
+def test_search_loads_segments_in_one_query_and_keeps_ranking():
+    keyword = _build_keyword()
+    segments = [
+        DocumentSegment(
+            index_node_id=node_id, index_node_hash="hash", content=node_id, document_id="doc", dataset_id="dataset-1"
+        )
+        for node_id in ("node-1", "node-2")
+    ]
+
+    with (
+        patch.object(jieba_inverted_index, "db") as mock_db,
+        patch.object(JiebaInvertedIndex, "_retrieve_ids_by_keywords", return_value=["node-2", "node-3", "node-1"]),
+    ):
+        mock_db.session.scalars.return_value = segments
+
+        documents = keyword.search("query", top_k=3)
+
+    mock_db.session.scalars.assert_called_once()
+    assert [document.metadata["doc_id"] for document in documents] == ["node-2", "node-1"]
+
+
+def test_delete_by_ids_with_empty_ids_is_noop():
+    keyword = _build_keyword()
+
+    with patch.object(jieba_inverted_index, "db") as mock_db:
+        keyword.delete_by_ids([])
+
+    mock_db.session.execute.assert_not_called()
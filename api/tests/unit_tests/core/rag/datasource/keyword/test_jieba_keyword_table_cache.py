@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.datasource.keyword.jieba import jieba
+from core.rag.datasource.keyword.jieba.jieba import Jieba
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch.object(jieba, "redis_client", redis):
+        yield redis
+
+
+@pytest.fixture(autouse=True)
+def clear_keyword_table_cache():
+    jieba._keyword_table_cache.clear()
+    yield
+    jieba._keyword_table_cache.clear()
+
+
+def _build_keyword(dataset_id: str = "dataset-1") -> Jieba:
+    dataset = MagicMock()
+    dataset.id = dataset_id
+    dataset.keyword_number = 10
+    return Jieba(dataset)
+
+
+def test_cached_keyword_table_is_parsed_once_per_version(fake_redis):
+    keyword = _build_keyword()
+    table = {"apple": {"node-1"}}
+
+    with patch.object(Jieba, "_get_dataset_keyword_table", return_value=table) as mock_get_table:
+        assert keyword._get_cached_dataset_keyword_table() is table
+        assert _build_keyword()._get_cached_dataset_keyword_table() is table
+
+    mock_get_table.assert_called_once()
+
+
+def test_saving_keyword_table_invalidates_cached_copy(fake_redis):
+    keyword = _build_keyword()
+    old_table = {"apple": {"node-1"}}
+    new_table = {"apple": {"node-1"}, "banana": {"node-2"}}
+
+    with patch.object(Jieba, "_get_dataset_keyword_table", return_value=old_table):
+        assert keyword._get_cached_dataset_keyword_table() is old_table
+
+    keyword.dataset.dataset_keyword_table.data_source_type = "database"
+    with patch.object(jieba, "db"):
+        keyword._save_dataset_keyword_table(new_table)
+
+    with patch.object(Jieba, "_get_dataset_keyword_table", return_value=new_table) as mock_get_table:
+        assert keyword._get_cached_dataset_keyword_table() is new_table
+
+    mock_get_table.assert_called_once()
+
+
+def test_keyword_table_is_not_cached_without_version(fake_redis):
+    keyword = _build_keyword()
+    fake_redis.set = MagicMock()
+
+    with patch.object(Jieba, "_get_dataset_keyword_table", return_value={"apple": {"node-1"}}) as mock_get_table:
+        keyword._get_cached_dataset_keyword_table()
+        keyword._get_cached_dataset_keyword_table()
+
+    assert mock_get_table.call_count == 2
+    assert len(jieba._keyword_table_cache) == 0
+
+
+def test_text_exists_and_retrieve_ids_use_cached_table(fake_redis):
+    keyword = _build_keyword()
+    table = {"apple": {"node-1", "node-2"}, "banana": {"node-2"}}
+
+    with patch.object(Jieba, "_get_dataset_keyword_table", return_value=table):
+        assert keyword.text_exists("node-2")
+        assert not keyword.text_exists("node-3")
+
+    with patch.object(jieba.JiebaKeywordTableHandler, "extract_keywords", return_value={"apple", "banana"}):
+        assert keyword._retrieve_ids_by_query(table, "apple banana", k=2) == ["node-2", "node-1"]
@@ -0,0 +1,192 @@
+import operator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.datasource import retrieval_cache
+from core.rag.datasource.retrieval_cache import get_retrieval_cache_entry, invalidate_retrieval_cache
+from core.rag.models.document import Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[str, bytes]] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode()
+        return True
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value.encode()
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.hashes.get(key, {}).pop(field, None)
+
+    def zadd(self, key, mapping):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def zpopmin(self, key, count):
+        members = self.sorted_sets.get(key, {})
+        popped = sorted(members.items(), key=operator.itemgetter(1))[:count]
+        for member, _ in popped:
+            del members[member]
+        return popped
+
+    def ttl(self, key):
+        return self.ttls.get(key, -1)
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch.object(retrieval_cache, "redis_client", redis):
+        yield redis
+
+
+def _build_dataset(cache_setting: dict | None = None) -> MagicMock:
+    dataset = MagicMock()
+    dataset.id = "dataset-1"
+    dataset.retrieval_model = {"search_method": "semantic_search", "retrieval_cache": cache_setting}
+    return dataset
+
+
+def _documents() -> list[Document]:
+    return [
+        Document(page_content="first", metadata={"doc_id": "node-1", "document_id": "doc-1", "score": 0.9}),
+        Document(page_content="second", metadata={"doc_id": "node-2", "document_id": "doc-1"}),
+    ]
+
+
+def _patch_nodes(segments: list[DocumentSegment], child_chunks: list[ChildChunk] | None = None):
+    mock_db = patch.object(retrieval_cache, "db").start()
+    mock_db.session.scalars.side_effect = [segments, child_chunks or []]
+    return mock_db
+
+
+def test_cache_is_disabled_unless_the_dataset_enables_it(fake_redis):
+    assert get_retrieval_cache_entry(_build_dataset(), "query", top_k=4) is None
+    assert get_retrieval_cache_entry(_build_dataset({"enabled": False}), "query", top_k=4) is None
+
+
+def test_saved_result_is_loaded_back_from_segments_in_order(fake_redis):
+    dataset = _build_dataset({"enabled": True, "ttl": 60})
+    entry = get_retrieval_cache_entry(dataset, "query", top_k=4)
+    assert entry is not None
+    assert entry.load() is None
+
+    entry.save(_documents())
+    assert list(fake_redis.ttls.values()) == [60, 60]
+
+    segments = [
+        DocumentSegment(index_node_id=node_id, index_node_hash=f"hash-{node_id}", content=content, document_id="doc-1")
+        for node_id, content in (("node-2", "second"), ("node-1", "first"))
+    ]
+    for segment in segments:
+        segment.dataset_id = "dataset-1"
+    with patch.object(retrieval_cache, "db") as mock_db:
+        mock_db.session.scalars.return_value = segments
+        documents = get_retrieval_cache_entry(dataset, "  query ", top_k=4).load()
+
+    assert documents is not None
+    assert [(document.page_content, document.metadata) for document in documents] == [
+        (
+            "first",
+            {
+                "doc_id": "node-1",
+                "doc_hash": "hash-node-1",
+                "document_id": "doc-1",
+                "dataset_id": "dataset-1",
+                "score": 0.9,
+            },
+        ),
+        ("second", {"doc_id": "node-2", "doc_hash": "hash-node-2", "document_id": "doc-1", "dataset_id": "dataset-1"}),
+    ]
+    mock_db.session.scalars.assert_called_once()
+
+
+def test_child_chunks_are_loaded_for_ids_without_segment(fake_redis):
+    dataset = _build_dataset({"enabled": True})
+    get_retrieval_cache_entry(dataset, "query").save(
+        [Document(page_content="child", metadata={"doc_id": "child-1", "score": 0.5})]
+    )
+    child_chunk = ChildChunk(
+        index_node_id="child-1", index_node_hash="hash", content="child", document_id="doc-1", dataset_id="dataset-1"
+    )
+
+    with patch.object(retrieval_cache, "db") as mock_db:
+        mock_db.session.scalars.side_effect = [[], [child_chunk]]
+        documents = get_retrieval_cache_entry(dataset, "query").load()
+
+    assert documents is not None
+    assert [document.page_content for document in documents] == ["child"]
+
+
+def test_entry_of_deleted_segment_is_a_miss(fake_redis):
+    dataset = _build_dataset({"enabled": True})
+    get_retrieval_cache_entry(dataset, "query").save(_documents())
+
+    with patch.object(retrieval_cache, "db") as mock_db:
+        mock_db.session.scalars.return_value = []
+        assert get_retrieval_cache_entry(dataset, "query").load() is None
+
+
+def test_invalidation_starts_a_new_version(fake_redis):
+    dataset = _build_dataset({"enabled": True})
+    entry = get_retrieval_cache_entry(dataset, "query", top_k=4)
+    entry.save(_documents())
+
+    invalidate_retrieval_cache(dataset.id)
+
+    new_entry = get_retrieval_cache_entry(dataset, "query", top_k=4)
+    assert new_entry.entries_key != entry.entries_key
+    assert new_entry.load() is None
+
+
+def test_key_depends_on_retrieval_config_and_normalized_query(fake_redis):
+    dataset = _build_dataset({"enabled": True})
+
+    field = get_retrieval_cache_entry(dataset, "what is  dify", top_k=4).field
+    assert get_retrieval_cache_entry(dataset, " what is dify\n", top_k=4).field == field
+    assert get_retrieval_cache_entry(dataset, "what is dify", top_k=8).field != field
+    assert get_retrieval_cache_entry(dataset, "what is rag", top_k=4).field != field
+
+
+def test_save_evicts_oldest_entries_at_max_entries(fake_redis):
+    dataset = _build_dataset({"enabled": True, "max_entries": 2})
+    entries = [get_retrieval_cache_entry(dataset, query) for query in ("a", "b", "c")]
+    for now, entry in enumerate(entries):
+        with patch.object(retrieval_cache.time, "time", return_value=float(now)):
+            entry.save(_documents())
+
+    (cached,) = fake_redis.hashes.values()
+    assert set(cached) == {entries[1].field, entries[2].field}
+    (order,) = fake_redis.sorted_sets.values()
+    assert set(order) == {entries[1].field, entries[2].field}
+
+
+def test_results_without_segment_ids_are_not_cached(fake_redis):
+    dataset = _build_dataset({"enabled": True})
+    get_retrieval_cache_entry(dataset, "query").save(
+        [Document(page_content="external", metadata={"doc_id": "x"}, provider="external")]
+    )
+
+    assert fake_redis.hashes == {}
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
+
+
+def test_submit_returns_result_and_exceptions():
+    executor = RetrievalExecutor(max_workers=2)
+
+    def fail():
+        raise ValueError("search failed")
+
+    assert executor.submit("tenant-1", lambda a, b=0: a + b, 1, b=2).result(timeout=5) == 3
+    with pytest.raises(ValueError, match="search failed"):
+        executor.submit("tenant-1", fail).result(timeout=5)
+
+
+def test_concurrency_is_capped_by_max_workers():
+    executor = RetrievalExecutor(max_workers=3)
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+
+    def search():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    futures = [executor.submit(f"tenant-{i % 2}", search) for i in range(12)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert max_running == 3
+    assert len(executor._workers) == 3
+
+
+def _block(started: threading.Event, release: threading.Event):
+    started.set()
+    release.wait()
+
+
+def test_idle_workers_serve_tenants_in_turn():
+    executor = RetrievalExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    blocker = executor.submit("tenant-a", _block, started, release)
+    assert started.wait(timeout=5)
+    futures = [executor.submit("tenant-a", order.append, f"a{i}") for i in range(3)]
+    futures += [executor.submit("tenant-b", order.append, f"b{i}") for i in range(2)]
+    release.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+
+    assert order == ["a0", "b0", "a1", "b1", "a2"]
+
+
+def test_cancel_skips_pending_searches():
+    executor = RetrievalExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    ran = []
+
+    running = executor.submit("tenant-1", _block, started, release)
+    assert started.wait(timeout=5)
+    pending = executor.submit("tenant-1", ran.append, "pending")
+
+    assert executor.cancel([running, pending]) == 1
+    release.set()
+    running.result(timeout=5)
+    executor.submit("tenant-1", ran.append, "after").result(timeout=5)
+
+    assert pending.cancelled()
+    assert ran == ["after"]
@@ -0,0 +1,128 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.datasource import retrieval_service
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_methods import RetrievalMethod
+from models.dataset import ChildChunk, DocumentSegment
+from models.dataset import Document as DatasetDocument
+
+
+def _build_fixture(top_k: int):
+    paragraph_document = DatasetDocument(id="doc-paragraph", dataset_id="dataset-1", doc_form=IndexType.PARAGRAPH_INDEX)
+    parent_child_document = DatasetDocument(
+        id="doc-parent-child", dataset_id="dataset-2", doc_form=IndexType.PARENT_CHILD_INDEX
+    )
+
+    documents = []
+    segments = []
+    child_chunks = []
+    parent_segments = []
+    for i in range(top_k):
+        documents.append(
+            Document(
+                page_content=f"paragraph {i}",
+                metadata={"document_id": paragraph_document.id, "doc_id": f"node-{i}", "score": 0.5},
+            )
+        )
+        segments.append(
+            DocumentSegment(
+                id=f"segment-{i}", dataset_id="dataset-1", index_node_id=f"node-{i}", content=f"paragraph {i}"
+            )
+        )
+
+        # Two child chunks per parent segment
+        documents.append(
+            Document(
+                page_content=f"child {i}",
+                metadata={"document_id": parent_child_document.id, "doc_id": f"child-node-{i}", "score": i / top_k},
+            )
+        )
+        child_chunks.append(
+            ChildChunk(
+                id=f"child-{i}",
+                index_node_id=f"child-node-{i}",
+                segment_id=f"parent-{i // 2}",
+                content=f"child {i}",
+                position=i,
+            )
+        )
+        if i % 2 == 0:
+            parent_segments.append(DocumentSegment(id=f"parent-{i // 2}", dataset_id="dataset-2", content="parent"))
+
+    return documents, [paragraph_document, parent_child_document], child_chunks, parent_segments, segments
+
+
+@pytest.mark.parametrize("top_k", [2, 20])
+def test_format_retrieval_documents_uses_constant_number_of_queries(top_k: int):
+    documents, dataset_documents, child_chunks, parent_segments, segments = _build_fixture(top_k)
+
+    with patch.object(retrieval_service, "db") as mock_db:
+        mock_db.session.query.return_value.where.return_value.options.return_value.all.return_value = dataset_documents
+        mock_db.session.scalars.side_effect = [child_chunks, parent_segments, segments]
+        mock_db.session.scalar = MagicMock()
+
+        result = RetrievalService.format_retrieval_documents(documents)
+
+    assert mock_db.session.query.call_count == 1
+    assert mock_db.session.scalars.call_count == 3
+    mock_db.session.scalar.assert_not_called()
+
+    paragraph_results = [r for r in result if r.segment.dataset_id == "dataset-1"]
+    parent_results = [r for r in result if r.segment.dataset_id == "dataset-2"]
+    assert [r.segment.id for r in paragraph_results] == [f"segment-{i}" for i in range(top_k)]
+    assert [r.segment.id for r in parent_results] == [f"parent-{i}" for i in range(top_k // 2)]
+    for i, parent_result in enumerate(parent_results):
+        assert parent_result.child_chunks is not None
+        assert [chunk.id for chunk in parent_result.child_chunks] == [f"child-{2 * i}", f"child-{2 * i + 1}"]
+        assert parent_result.score == (2 * i + 1) / top_k
+
+
+def test_format_retrieval_documents_skips_segments_from_other_datasets():
+    documents = [Document(page_content="a", metadata={"document_id": "doc-1", "doc_id": "node-1", "score": 0.9})]
+    dataset_document = DatasetDocument(id="doc-1", dataset_id="dataset-1", doc_form=IndexType.PARAGRAPH_INDEX)
+    foreign_segment = DocumentSegment(id="segment-1", dataset_id="dataset-2", index_node_id="node-1", content="a")
+
+    with patch.object(retrieval_service, "db") as mock_db:
+        mock_db.session.query.return_value.where.return_value.options.return_value.all.return_value = [dataset_document]
+        mock_db.session.scalars.side_effect = [[foreign_segment]]
+
+        assert RetrievalService.format_retrieval_documents(documents) == []
+
+
+def test_retrieve_merges_results_of_all_searches():
+    def search(all_documents, **kwargs):
+        all_documents.append(Document(page_content="hit", metadata={"doc_id": "hit"}))
+
+    with (
+        patch.object(RetrievalService, "_get_dataset", return_value=MagicMock(tenant_id="tenant-1")),
+        patch.object(RetrievalService, "embedding_search", side_effect=search),
+        patch.object(RetrievalService, "full_text_index_search", side_effect=search),
+        patch.object(retrieval_service, "DataPostProcessor") as mock_post_processor,
+    ):
+        mock_post_processor.return_value.invoke.side_effect = lambda documents, **kwargs: documents
+        documents = RetrievalService.retrieve(RetrievalMethod.HYBRID_SEARCH, "dataset-1", "query", top_k=4)
+
+    assert [document.page_content for document in documents] == ["hit", "hit"]
+
+
+def test_retrieve_cancels_searches_after_timeout_and_drops_late_results():
+    release = threading.Event()
+
+    def slow_search(all_documents, **kwargs):
+        release.wait(timeout=5)
+        all_documents.append(Document(page_content="late", metadata={"doc_id": "late"}))
+
+    with (
+        patch.object(RetrievalService, "_get_dataset", return_value=MagicMock(tenant_id="tenant-1")),
+        patch.object(RetrievalService, "keyword_search", side_effect=slow_search),
+        patch.object(retrieval_service, "RETRIEVAL_TIMEOUT", 0.1),
+    ):
+        documents = RetrievalService.retrieve(RetrievalMethod.KEYWORD_SEARCH, "dataset-1", "query", top_k=4)
+        release.set()
+
+    assert documents == []
@@ -0,0 +1,60 @@
+from typing import Any
+
+from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.models.document import Document
+
+
+class InMemoryVector(BaseVector):
+    def __init__(self, ids: set[str]):
+        super().__init__("collection")
+        self.ids = ids
+        self.text_exists_calls = 0
+
+    def get_type(self) -> str:
+        return "in_memory"
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        pass
+
+    def add_texts(self, documents: list[Document], embeddings: list[list[float]], **kwargs):
+        pass
+
+    def text_exists(self, id: str) -> bool:
+        self.text_exists_calls += 1
+        return id in self.ids
+
+    def delete_by_ids(self, ids: list[str]):
+        pass
+
+    def delete_by_metadata_field(self, key: str, value: str):
+        pass
+
+    def search_by_vector(self, query_vector: list[float], **kwargs: Any) -> list[Document]:
+        return []
+
+    def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
+        return []
+
+    def delete(self):
+        pass
+
+
+def test_existing_ids_falls_back_to_text_exists():
+    vector = InMemoryVector({"node-1", "node-2"})
+
+    assert vector.existing_ids(["node-1", "node-3", "node-2"]) == {"node-1", "node-2"}
+    assert vector.text_exists_calls == 3
+
+
+def test_filter_duplicate_texts_keeps_order_and_texts_without_doc_id():
+    vector = InMemoryVector({"node-1"})
+    texts = [
+        Document(page_content="a", metadata={"doc_id": "node-0"}),
+        Document(page_content="b", metadata={"doc_id": "node-1"}),
+        Document(page_content="c", metadata={}),
+        Document(page_content="d", metadata={"doc_id": "node-2"}),
+    ]
+
+    filtered = vector._filter_duplicate_texts(texts)
+
+    assert [text.page_content for text in filtered] == ["a", "c", "d"]
@@ -0,0 +1,161 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.rag.datasource.vdb import vector_factory
+from core.rag.datasource.vdb.vector_factory import VECTOR_CREATE_BATCH_SIZE, Vector
+from core.rag.models.document import Document
+
+
+class RecordingVectorProcessor:
+    def __init__(self, write_delay: float = 0.0, fail_on_batch: int | None = None):
+        self.write_delay = write_delay
+        self.fail_on_batch = fail_on_batch
+        self.writes: list[tuple[list[str], list[list[float]], dict]] = []
+
+    def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+        if self.fail_on_batch is not None and len(self.writes) + 1 == self.fail_on_batch:
+            raise RuntimeError("vector store unavailable")
+        time.sleep(self.write_delay)
+        self.writes.append(([text.page_content for text in texts], embeddings, kwargs))
+
+
+class RecordingEmbeddings:
+    def __init__(self, processor: RecordingVectorProcessor, embed_delay: float = 0.0, fail_on_batch=None):
+        self.processor = processor
+        self.embed_delay = embed_delay
+        self.fail_on_batch = fail_on_batch
+        self.embedded_batches = 0
+        self.max_batches_ahead = 0
+        self.lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with self.lock:
+            self.embedded_batches += 1
+            batch_number = self.embedded_batches
+            self.max_batches_ahead = max(self.max_batches_ahead, batch_number - len(self.processor.writes))
+        if self.fail_on_batch == batch_number:
+            raise ValueError("embedding model unavailable")
+        time.sleep(self.embed_delay)
+        return [[float(len(text))] for text in texts]
+
+
+def _build_vector(processor: RecordingVectorProcessor, embeddings: RecordingEmbeddings) -> Vector:
+    vector = Vector.__new__(Vector)
+    vector._dataset = MagicMock(id="dataset-1")
+    vector._embeddings = embeddings  # type: ignore[assignment]
+    vector._vector_processor = processor  # type: ignore[assignment]
+    return vector
+
+
+def test_add_texts_with_duplicate_check_looks_up_ids_in_bulk():
+    processor = MagicMock()
+    processor.existing_ids.return_value = {"node-1", "node-3"}
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = lambda texts: [[1.0] for _ in texts]
+    vector = _build_vector(processor, embeddings)
+
+    vector.add_texts(_texts(5), duplicate_check=True)
+
+    processor.existing_ids.assert_called_once_with(["node-0", "node-1", "node-2", "node-3", "node-4"])
+    processor.text_exists.assert_not_called()
+    written = processor.create.call_args.kwargs["texts"]
+    assert [text.metadata["doc_id"] for text in written] == ["node-0", "node-2", "node-4"]
+
+
+def _texts(count: int) -> list[Document]:
+    return [Document(page_content=f"text-{i}", metadata={"doc_id": f"node-{i}"}) for i in range(count)]
+
+
+@pytest.mark.parametrize("pipeline_depth", [0, 1, 3])
+def test_create_writes_same_batches_in_order(pipeline_depth):
+    texts = _texts(VECTOR_CREATE_BATCH_SIZE * 3 + 10)
+    processor = RecordingVectorProcessor()
+    vector = _build_vector(processor, RecordingEmbeddings(processor))
+
+    with patch.object(vector_factory.dify_config, "VECTOR_CREATE_PIPELINE_DEPTH", pipeline_depth):
+        vector.create(texts=texts, duplicate_check=True)
+
+    assert [len(contents) for contents, _, _ in processor.writes] == [1000, 1000, 1000, 10]
+    assert [content for contents, _, _ in processor.writes for content in contents] == [
+        text.page_content for text in texts
+    ]
+    assert [embedding for _, embeddings, _ in processor.writes for embedding in embeddings] == [
+        [float(len(text.page_content))] for text in texts
+    ]
+    assert all(kwargs == {"duplicate_check": True} for _, _, kwargs in processor.writes)
+
+
+def test_pipelined_create_bounds_embedding_ahead_of_writes():
+    processor = RecordingVectorProcessor(write_delay=0.02)
+    embeddings = RecordingEmbeddings(processor)
+    vector = _build_vector(processor, embeddings)
+
+    with patch.object(vector_factory.dify_config, "VECTOR_CREATE_PIPELINE_DEPTH", 1):
+        vector.create(texts=_texts(VECTOR_CREATE_BATCH_SIZE * 6))
+
+    assert len(processor.writes) == 6
+    # one batch being written, one waiting in the queue and one being embedded
+    assert embeddings.max_batches_ahead <= 3
+
+
+def test_pipelined_create_overlaps_embedding_and_writing():
+    writing = threading.Event()
+    second_batch_embedded = threading.Event()
+    embedded_while_writing: list[bool] = []
+
+    class BlockingVectorProcessor(RecordingVectorProcessor):
+        def create(self, texts: list[Document], embeddings: list[list[float]], **kwargs):
+            writing.set()
+            if not self.writes:
+                # only returns early if the second batch is embedded while the first one is written
+                second_batch_embedded.wait(timeout=5)
+            super().create(texts, embeddings, **kwargs)
+            writing.clear()
+
+    class ObservingEmbeddings(RecordingEmbeddings):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            result = super().embed_documents(texts)
+            if self.embedded_batches == 2:
+                embedded_while_writing.append(writing.wait(timeout=5))
+                second_batch_embedded.set()
+            return result
+
+    processor = BlockingVectorProcessor()
+    vector = _build_vector(processor, ObservingEmbeddings(processor))
+
+    with patch.object(vector_factory.dify_config, "VECTOR_CREATE_PIPELINE_DEPTH", 1):
+        vector.create(texts=_texts(VECTOR_CREATE_BATCH_SIZE * 4))
+
+    assert embedded_while_writing == [True]
+    assert len(processor.writes) == 4
+
+
+def test_pipelined_create_raises_embedding_errors():
+    processor = RecordingVectorProcessor()
+    vector = _build_vector(processor, RecordingEmbeddings(processor, fail_on_batch=2))
+
+    with (
+        patch.object(vector_factory.dify_config, "VECTOR_CREATE_PIPELINE_DEPTH", 1),
+        pytest.raises(ValueError, match="embedding model unavailable"),
+    ):
+        vector.create(texts=_texts(VECTOR_CREATE_BATCH_SIZE * 3))
+
+    assert len(processor.writes) == 1
+
+
+def test_pipelined_create_stops_embedding_when_write_fails():
+    processor = RecordingVectorProcessor(fail_on_batch=1)
+    embeddings = RecordingEmbeddings(processor, embed_delay=0.01)
+    embeddings.embed_documents = MagicMock(wraps=embeddings.embed_documents)  # type: ignore[method-assign]
+    vector = _build_vector(processor, embeddings)
+
+    with (
+        patch.object(vector_factory.dify_config, "VECTOR_CREATE_PIPELINE_DEPTH", 1),
+        pytest.raises(RuntimeError, match="vector store unavailable"),
+    ):
+        vector.create(texts=_texts(VECTOR_CREATE_BATCH_SIZE * 10))
+
+    assert embeddings.embed_documents.call_count < 10
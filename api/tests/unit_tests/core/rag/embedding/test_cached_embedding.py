@@ -0,0 +1,125 @@
+import base64
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from core.rag.embedding import cached_embedding
+from core.rag.embedding.cached_embedding import CacheEmbedding, QueryEmbeddingLocalCache
+from libs import helper
+from models.dataset import Embedding
+
+
+def _build_cache_embedding() -> CacheEmbedding:
+    model_instance = MagicMock()
+    model_instance.model = "text-embedding"
+    model_instance.provider = "openai"
+    model_instance.model_type_instance.get_model_schema.return_value = None
+    return CacheEmbedding(model_instance)
+
+
+def _cached_row(text: str, vector: list[float]) -> Embedding:
+    row = Embedding(model_name="text-embedding", hash=helper.generate_text_hash(text), provider_name="openai")
+    row.set_embedding(vector)
+    return row
+
+
+def test_embed_documents_looks_up_cache_in_chunks():
+    cache_embedding = _build_cache_embedding()
+    texts = [f"text-{i}" for i in range(5)]
+
+    with (
+        patch.object(cached_embedding, "db") as mock_db,
+        patch.object(cached_embedding, "EMBEDDING_CACHE_BATCH_SIZE", 2),
+    ):
+        mock_db.session.scalars.side_effect = [
+            [_cached_row(text, [float(i), 0.0]) for i, text in enumerate(texts) if i < 2],
+            [_cached_row(text, [float(i), 0.0]) for i, text in enumerate(texts) if 2 <= i < 4],
+            [_cached_row(texts[4], [4.0, 0.0])],
+        ]
+
+        result = cache_embedding.embed_documents(texts)
+
+    assert mock_db.session.scalars.call_count == 3
+    assert result == [[float(i), 0.0] for i in range(5)]
+    cache_embedding._model_instance.invoke_text_embedding.assert_not_called()
+    mock_db.session.execute.assert_not_called()
+
+
+def test_embed_documents_returns_cache_hits_as_lists_decoded_once():
+    cache_embedding = _build_cache_embedding()
+
+    with (
+        patch.object(cached_embedding, "db") as mock_db,
+        patch.object(Embedding, "get_embedding", side_effect=AssertionError("decoded through a list")),
+    ):
+        mock_db.session.scalars.return_value = [_cached_row("cached", [0.25, 0.5])]
+
+        result = cache_embedding.embed_documents(["cached", "cached"])
+
+    assert result == [[0.25, 0.5], [0.25, 0.5]]
+    assert all(type(vector) is list and type(vector[0]) is float for vector in result)
+
+
+def test_embed_documents_bulk_inserts_missing_embeddings_once_per_hash():
+    cache_embedding = _build_cache_embedding()
+    cache_embedding._model_instance.invoke_text_embedding.return_value = MagicMock(
+        embeddings=[[3.0, 4.0], [3.0, 4.0], [0.0, 2.0]]
+    )
+    texts = ["duplicate", "duplicate", "other", "cached"]
+
+    with patch.object(cached_embedding, "db") as mock_db:
+        mock_db.session.scalars.return_value = [_cached_row("cached", [1.0, 0.0])]
+
+        result = cache_embedding.embed_documents(texts)
+
+    assert result == [[0.6, 0.8], [0.6, 0.8], [0.0, 1.0], [1.0, 0.0]]
+    assert mock_db.session.scalars.call_count == 1
+    assert mock_db.session.execute.call_count == 1
+    insert_stmt = mock_db.session.execute.call_args.args[0]
+    assert len(insert_stmt._multi_values[0]) == 2
+    mock_db.session.commit.assert_called_once()
+
+
+def test_embed_query_serves_repeated_queries_from_local_cache():
+    cache_embedding = _build_cache_embedding()
+    cache_embedding._model_instance.invoke_text_embedding.return_value = MagicMock(embeddings=[[3.0, 4.0]])
+    local_cache = QueryEmbeddingLocalCache(maxsize=8, ttl=60)
+
+    with (
+        patch.object(cached_embedding, "redis_client") as mock_redis,
+        patch.object(cached_embedding, "query_embedding_local_cache", local_cache),
+    ):
+        mock_redis.get.return_value = None
+
+        first = cache_embedding.embed_query("hello")
+        second = cache_embedding.embed_query("hello")
+
+    assert first == second == [0.6, 0.8]
+    assert mock_redis.get.call_count == 1
+    cache_embedding._model_instance.invoke_text_embedding.assert_called_once()
+    assert (local_cache.hits, local_cache.misses) == (1, 1)
+
+
+def test_embed_query_fills_local_cache_from_redis():
+    cache_embedding = _build_cache_embedding()
+    local_cache = QueryEmbeddingLocalCache(maxsize=8, ttl=60)
+    encoded = base64.b64encode(np.array([0.6, 0.8]).tobytes())
+
+    with (
+        patch.object(cached_embedding, "redis_client") as mock_redis,
+        patch.object(cached_embedding, "query_embedding_local_cache", local_cache),
+    ):
+        mock_redis.get.return_value = encoded
+
+        assert cache_embedding.embed_query("hello") == [0.6, 0.8]
+        assert cache_embedding.embed_query("hello") == [0.6, 0.8]
+
+    assert mock_redis.get.call_count == 1
+    cache_embedding._model_instance.invoke_text_embedding.assert_not_called()
+
+
+def test_local_cache_disabled_when_size_is_zero():
+    local_cache = QueryEmbeddingLocalCache(maxsize=0, ttl=60)
+    local_cache.set("key", np.array([1.0]))
+
+    assert local_cache.get("key") is None
@@ -0,0 +1,65 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.embedding.query_embeddings import QueryEmbeddings
+
+
+def test_same_model_and_query_is_embedded_once():
+    query_embeddings = QueryEmbeddings()
+    embed = MagicMock(return_value=[0.1, 0.2])
+
+    first = query_embeddings.embed_query("tenant-1", "provider", "model", "query", embed)
+    second = query_embeddings.embed_query("tenant-1", "provider", "model", "query", embed)
+
+    assert first == second == [0.1, 0.2]
+    embed.assert_called_once_with("query")
+    assert query_embeddings.embed_calls == 1
+    assert query_embeddings.reuses == 1
+
+
+def test_different_models_are_embedded_separately():
+    query_embeddings = QueryEmbeddings()
+    embed = MagicMock(side_effect=[[0.1], [0.2]])
+
+    assert query_embeddings.embed_query("tenant-1", "provider", "model-a", "query", embed) == [0.1]
+    assert query_embeddings.embed_query("tenant-1", "provider", "model-b", "query", embed) == [0.2]
+    assert query_embeddings.embed_calls == 2
+
+
+def test_concurrent_callers_wait_for_the_first_embedding():
+    query_embeddings = QueryEmbeddings()
+    calls = []
+
+    def embed(query: str) -> list[float]:
+        calls.append(query)
+        time.sleep(0.05)
+        return [1.0]
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(query_embeddings.embed_query("tenant-1", "provider", "model", "q", embed))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["q"]
+    assert results == [[1.0]] * 8
+
+
+def test_failed_embedding_is_not_cached():
+    query_embeddings = QueryEmbeddings()
+    embed = MagicMock(side_effect=[ValueError("model unavailable"), [0.3]])
+
+    with pytest.raises(ValueError):
+        query_embeddings.embed_query("tenant-1", "provider", "model", "query", embed)
+
+    assert query_embeddings.embed_query("tenant-1", "provider", "model", "query", embed) == [0.3]
+    assert embed.call_count == 2
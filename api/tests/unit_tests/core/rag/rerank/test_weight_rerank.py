@@ -0,0 +1,162 @@
+import math
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from core.rag.embedding.query_embeddings import QueryEmbeddings
+from core.rag.models.document import Document
+from core.rag.rerank import weight_rerank
+from core.rag.rerank.entity.weight import KeywordSetting, VectorSetting, Weights
+from core.rag.rerank.weight_rerank import WeightRerankRunner
+
+
+def _reference_keyword_scores(query_keywords, documents_keywords, total_documents):
+    """Per-document dict based TF-IDF cosine, as WeightRerankRunner computed it before vectorization."""
+    all_keywords = set()
+    for document_keywords in documents_keywords:
+        all_keywords.update(document_keywords)
+    keyword_idf = {
+        keyword: math.log((1 + total_documents) / (1 + sum(1 for doc in documents_keywords if keyword in doc))) + 1
+        for keyword in all_keywords
+    }
+    query_tfidf = {keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(query_keywords).items()}
+
+    similarities = []
+    for document_keywords in documents_keywords:
+        document_tfidf = {
+            keyword: count * keyword_idf.get(keyword, 0) for keyword, count in Counter(document_keywords).items()
+        }
+        numerator = sum(query_tfidf[x] * document_tfidf[x] for x in set(query_tfidf) & set(document_tfidf))
+        denominator = math.sqrt(sum(v**2 for v in query_tfidf.values())) * math.sqrt(
+            sum(v**2 for v in document_tfidf.values())
+        )
+        similarities.append(float(numerator) / denominator if denominator else 0.0)
+    return similarities
+
+
+def _build_runner() -> WeightRerankRunner:
+    weights = Weights(
+        vector_setting=VectorSetting(
+            vector_weight=0.7, embedding_provider_name="provider", embedding_model_name="model"
+        ),
+        keyword_setting=KeywordSetting(keyword_weight=0.3),
+    )
+    return WeightRerankRunner("tenant-1", weights)
+
+
+def _patch_keywords(keywords_by_text: dict[str, list[str]]):
+    return patch.object(
+        weight_rerank.JiebaKeywordTableHandler,
+        "extract_keywords",
+        lambda self, text, max_keywords_per_chunk=10: keywords_by_text[text],
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_keyword_scores_match_reference_implementation(seed):
+    rng = np.random.default_rng(seed)
+    vocabulary = [f"kw{i}" for i in range(30)]
+    keywords_by_text = {"query": [vocabulary[i] for i in rng.integers(0, 30, size=6)]}
+    documents = []
+    for i in range(40):
+        text = f"doc-{i}"
+        keywords_by_text[text] = [vocabulary[i] for i in rng.integers(0, 30, size=rng.integers(0, 13))]
+        documents.append(Document(page_content=text, metadata={"doc_id": text}))
+
+    with _patch_keywords(keywords_by_text):
+        scores = _build_runner()._calculate_keyword_score("query", documents)
+
+    expected = _reference_keyword_scores(
+        keywords_by_text["query"], [keywords_by_text[document.page_content] for document in documents], len(documents)
+    )
+    assert scores == pytest.approx(expected, rel=1e-12, abs=1e-15)
+    assert documents[0].metadata["keywords"] == keywords_by_text["doc-0"]
+
+
+def test_keyword_scores_are_zero_without_matching_keywords():
+    keywords_by_text = {"query": ["missing"], "doc-1": ["apple"], "doc-2": []}
+    documents = [Document(page_content=text, metadata={"doc_id": text}) for text in ("doc-1", "doc-2")]
+
+    with _patch_keywords(keywords_by_text):
+        scores = _build_runner()._calculate_keyword_score("query", documents)
+
+    assert scores == [0.0, 0.0]
+
+
+def test_cosine_scores_match_pairwise_numpy_and_keep_existing_scores():
+    rng = np.random.default_rng(0)
+    query_vector = rng.normal(size=16).tolist()
+    documents = [Document(page_content=f"doc-{i}", vector=rng.normal(size=16).tolist(), metadata={}) for i in range(8)]
+    documents[3].metadata["score"] = 0.42
+
+    with (
+        patch.object(weight_rerank, "ModelManager"),
+        patch.object(weight_rerank, "CacheEmbedding") as mock_cache_embedding,
+    ):
+        mock_cache_embedding.return_value.embed_query.return_value = query_vector
+        runner = _build_runner()
+        scores = runner._calculate_cosine("tenant-1", "query", documents, runner.weights.vector_setting)
+
+    for document, score in zip(documents, scores):
+        if document.metadata.get("score") is not None:
+            assert score == 0.42
+        else:
+            vec1 = np.array(query_vector)
+            vec2 = np.array(document.vector)
+            expected = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
+            assert score == pytest.approx(expected, rel=1e-12)
+
+
+def test_cosine_scores_reuse_query_vector_of_the_request():
+    query_embeddings = QueryEmbeddings()
+    query_embeddings.embed_query("tenant-1", "provider", "model", "query", lambda query: [1.0, 0.0])
+    documents = [Document(page_content="doc-1", vector=[1.0, 0.0], metadata={})]
+
+    with (
+        patch.object(weight_rerank, "ModelManager") as mock_model_manager,
+        patch.object(weight_rerank, "CacheEmbedding") as mock_cache_embedding,
+    ):
+        runner = WeightRerankRunner("tenant-1", _build_runner().weights, query_embeddings)
+        scores = runner._calculate_cosine("tenant-1", "query", documents, runner.weights.vector_setting)
+
+    assert scores == [pytest.approx(1.0)]
+    mock_model_manager.assert_not_called()
+    mock_cache_embedding.assert_not_called()
+    assert query_embeddings.reuses == 1
+
+
+def test_cosine_scores_skip_embedding_when_all_documents_are_scored():
+    documents = [Document(page_content="doc-1", vector=[1.0, 0.0], metadata={"score": 0.5})]
+
+    with (
+        patch.object(weight_rerank, "ModelManager") as mock_model_manager,
+        patch.object(weight_rerank, "CacheEmbedding") as mock_cache_embedding,
+    ):
+        runner = _build_runner()
+        scores = runner._calculate_cosine("tenant-1", "query", documents, runner.weights.vector_setting)
+
+    assert scores == [0.5]
+    mock_model_manager.assert_not_called()
+    mock_cache_embedding.assert_not_called()
+
+
+def test_run_combines_weighted_scores_in_order():
+    keywords_by_text = {"query": ["apple"], "doc-1": ["apple"], "doc-2": ["banana"]}
+    documents = [
+        Document(page_content="doc-1", vector=[1.0, 0.0], metadata={"doc_id": "doc-1"}),
+        Document(page_content="doc-2", vector=[0.0, 1.0], metadata={"doc_id": "doc-2"}),
+    ]
+
+    with (
+        _patch_keywords(keywords_by_text),
+        patch.object(weight_rerank, "ModelManager", MagicMock()),
+        patch.object(weight_rerank, "CacheEmbedding") as mock_cache_embedding,
+    ):
+        mock_cache_embedding.return_value.embed_query.return_value = [0.0, 1.0]
+        reranked = _build_runner().run("query", documents)
+
+    assert [document.metadata["doc_id"] for document in reranked] == ["doc-2", "doc-1"]
+    assert reranked[0].metadata["score"] == pytest.approx(0.7)
+    assert reranked[1].metadata["score"] == pytest.approx(0.3)
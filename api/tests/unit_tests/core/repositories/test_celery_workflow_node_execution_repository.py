@@ -5,11 +5,13 @@ These tests verify the Celery-based asynchronous storage functionality
 for workflow node execution data.
 """
 
+import threading
 from unittest.mock import Mock, patch
 from uuid import uuid4
 
 import pytest
 
+from configs import dify_config
 from core.repositories.celery_workflow_node_execution_repository import CeleryWorkflowNodeExecutionRepository
 from core.workflow.entities.workflow_node_execution import (
     WorkflowNodeExecution,
@@ -22,6 +24,12 @@ from models import Account, EndUser
 from models.workflow import WorkflowNodeExecutionTriggeredFrom
 
 
+@pytest.fixture(autouse=True)
+def long_flush_interval(monkeypatch):
+    """Keep the flush timer from firing after a test has finished."""
+    monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 60)
+
+
 @pytest.fixture
 def mock_session_factory():
     """Mock SQLAlchemy session factory."""
@@ -128,11 +136,11 @@ class TestCeleryWorkflowNodeExecutionRepository:
                 triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
             )
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_save_caches_and_queues_celery_task(
         self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution
     ):
-        """Test that save operation caches execution and queues a Celery task."""
+        """Test that save operation caches execution and queues a Celery task on flush."""
         repo = CeleryWorkflowNodeExecutionRepository(
             session_factory=mock_session_factory,
             user=mock_account,
@@ -141,12 +149,14 @@ class TestCeleryWorkflowNodeExecutionRepository:
         )
 
         repo.save(sample_workflow_node_execution)
+        mock_task.delay.assert_not_called()
+        repo.flush()
 
         # Verify Celery task was queued with correct parameters
         mock_task.delay.assert_called_once()
         call_args = mock_task.delay.call_args[1]
 
-        assert call_args["execution_data"] == sample_workflow_node_execution.model_dump()
+        assert call_args["executions_data"] == [sample_workflow_node_execution.model_dump()]
         assert call_args["tenant_id"] == mock_account.current_tenant_id
         assert call_args["app_id"] == "test-app"
         assert call_args["triggered_from"] == WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value
@@ -163,7 +173,7 @@ class TestCeleryWorkflowNodeExecutionRepository:
             in repo._workflow_execution_mapping[sample_workflow_node_execution.workflow_execution_id]
         )
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_save_handles_celery_failure(
         self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution
     ):
@@ -177,10 +187,16 @@ class TestCeleryWorkflowNodeExecutionRepository:
             triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
         )
 
+        repo.save(sample_workflow_node_execution)
         with pytest.raises(Exception, match="Celery is down"):
-            repo.save(sample_workflow_node_execution)
+            repo.flush()
+
+        # The execution stays buffered for the next flush
+        mock_task.delay.side_effect = None
+        repo.flush()
+        assert mock_task.delay.call_args[1]["executions_data"] == [sample_workflow_node_execution.model_dump()]
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_get_by_workflow_run_from_cache(
         self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution
     ):
@@ -219,7 +235,7 @@ class TestCeleryWorkflowNodeExecutionRepository:
         # Should return empty list since nothing in cache
         assert len(result) == 0
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_cache_operations(self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution):
         """Test cache operations work correctly."""
         repo = CeleryWorkflowNodeExecutionRepository(
@@ -240,7 +256,7 @@ class TestCeleryWorkflowNodeExecutionRepository:
         assert len(result) == 1
         assert result[0].id == sample_workflow_node_execution.id
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_multiple_executions_same_workflow(self, mock_task, mock_session_factory, mock_account):
         """Test multiple executions for the same workflow."""
         repo = CeleryWorkflowNodeExecutionRepository(
@@ -291,7 +307,7 @@ class TestCeleryWorkflowNodeExecutionRepository:
         result = repo.get_by_workflow_run(workflow_run_id)
         assert len(result) == 2
 
-    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_execution_task")
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
     def test_ordering_functionality(self, mock_task, mock_session_factory, mock_account):
         """Test ordering functionality works correctly."""
         repo = CeleryWorkflowNodeExecutionRepository(
@@ -347,3 +363,108 @@ class TestCeleryWorkflowNodeExecutionRepository:
         assert len(result) == 2
         assert result[0].index == 2
         assert result[1].index == 1
+
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
+    def test_saves_of_same_execution_are_collapsed(
+        self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution
+    ):
+        """Test that repeated saves of one execution are sent once with the latest state."""
+        repo = CeleryWorkflowNodeExecutionRepository(
+            session_factory=mock_session_factory,
+            user=mock_account,
+            app_id="test-app",
+            triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        )
+
+        repo.save(sample_workflow_node_execution)
+        sample_workflow_node_execution.status = WorkflowNodeExecutionStatus.SUCCEEDED
+        sample_workflow_node_execution.outputs = {"output1": "value1"}
+        repo.save(sample_workflow_node_execution)
+        repo.flush()
+        repo.flush()
+
+        mock_task.delay.assert_called_once()
+        executions_data = mock_task.delay.call_args[1]["executions_data"]
+        assert len(executions_data) == 1
+        assert executions_data[0]["status"] == WorkflowNodeExecutionStatus.SUCCEEDED
+        assert executions_data[0]["outputs"] == {"output1": "value1"}
+
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
+    def test_buffer_is_flushed_at_batch_size(self, mock_task, mock_session_factory, mock_account, monkeypatch):
+        """Test that the buffer is flushed once it holds the configured number of executions."""
+        monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE", 3)
+        monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 60)
+        repo = CeleryWorkflowNodeExecutionRepository(
+            session_factory=mock_session_factory,
+            user=mock_account,
+            app_id="test-app",
+            triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        )
+
+        workflow_run_id = str(uuid4())
+        for index in range(7):
+            repo.save(
+                WorkflowNodeExecution(
+                    id=str(uuid4()),
+                    workflow_id=str(uuid4()),
+                    workflow_execution_id=workflow_run_id,
+                    index=index,
+                    node_id=f"node{index}",
+                    node_type=NodeType.LLM,
+                    title=f"Node {index}",
+                    status=WorkflowNodeExecutionStatus.RUNNING,
+                    created_at=naive_utc_now(),
+                )
+            )
+        repo.flush()
+
+        batch_sizes = [len(call.kwargs["executions_data"]) for call in mock_task.delay.call_args_list]
+        assert batch_sizes == [3, 3, 1]
+
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
+    def test_save_is_sent_immediately_without_interval(
+        self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution, monkeypatch
+    ):
+        """Test that every save is sent right away when the interval is 0."""
+        monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 0)
+        repo = CeleryWorkflowNodeExecutionRepository(
+            session_factory=mock_session_factory,
+            user=mock_account,
+            app_id="test-app",
+            triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        )
+
+        repo.save(sample_workflow_node_execution)
+
+        mock_task.delay.assert_called_once()
+
+    @patch("core.repositories.celery_workflow_node_execution_repository.save_workflow_node_executions_task")
+    def test_buffer_is_flushed_by_timer_without_further_saves(
+        self, mock_task, mock_session_factory, mock_account, sample_workflow_node_execution, monkeypatch
+    ):
+        """Test that a RUNNING save is sent after the interval even if no other save follows."""
+        monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 0.05)
+        sent = threading.Event()
+        mock_task.delay.side_effect = lambda **kwargs: sent.set()
+        repo = CeleryWorkflowNodeExecutionRepository(
+            session_factory=mock_session_factory,
+            user=mock_account,
+            app_id="test-app",
+            triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        )
+
+        repo.save(sample_workflow_node_execution)
+
+        assert sent.wait(timeout=5)
+        executions_data = mock_task.delay.call_args[1]["executions_data"]
+        assert executions_data == [sample_workflow_node_execution.model_dump()]
+        assert repo._flush_timer is None
+
+        # an explicit flush cancels the pending timer
+        monkeypatch.setattr(dify_config, "WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL", 60)
+        repo.save(sample_workflow_node_execution)
+        timer = repo._flush_timer
+        repo.flush()
+        assert timer is not None
+        assert not timer.is_alive() or timer.finished.is_set()
+        assert mock_task.delay.call_count == 2
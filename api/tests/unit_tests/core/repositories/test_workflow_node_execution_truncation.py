@@ -6,13 +6,15 @@ in the SQLAlchemyWorkflowNodeExecutionRepository.
 """
 
 import json
+import zlib
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import Any
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from sqlalchemy import Engine
 
+from configs import dify_config
 from core.repositories.sqlalchemy_workflow_node_execution_repository import (
     SQLAlchemyWorkflowNodeExecutionRepository,
 )
@@ -165,6 +167,104 @@ class TestSQLAlchemyWorkflowNodeExecutionRepositoryTruncation:
         assert domain_model.get_truncated_outputs() is None
 
 
+class TestSQLAlchemyWorkflowNodeExecutionRepositoryBlobOffload:
+    """Test offloading to content-addressed blobs in SQLAlchemyWorkflowNodeExecutionRepository."""
+
+    _THRESHOLD = 1024
+
+    def create_repository(self) -> SQLAlchemyWorkflowNodeExecutionRepository:
+        return SQLAlchemyWorkflowNodeExecutionRepository(
+            session_factory=MagicMock(spec=Engine),
+            user=mock_user(),
+            app_id="test-app-id",
+            triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN,
+        )
+
+    def _patch_blob_mode(self):
+        return (
+            patch.object(dify_config, "WORKFLOW_NODE_EXECUTION_OFFLOAD_STORAGE", "blob"),
+            patch.object(dify_config, "WORKFLOW_NODE_EXECUTION_OFFLOAD_THRESHOLD", self._THRESHOLD),
+        )
+
+    def test_small_values_are_not_offloaded(self):
+        repo = self.create_repository()
+        storage_patch = patch("core.repositories.sqlalchemy_workflow_node_execution_repository.storage")
+        mode_patch, threshold_patch = self._patch_blob_mode()
+        with mode_patch, threshold_patch, storage_patch as mock_storage:
+            result = repo._truncate_and_upload({"data": "small"}, "exec-id", ExecutionOffLoadType.INPUTS)
+
+        assert result is None
+        mock_storage.save.assert_not_called()
+
+    def test_large_values_are_stored_once_per_content(self):
+        repo = self.create_repository()
+        value = {"data": "x" * (self._THRESHOLD * 4)}
+        stored: dict[str, bytes] = {}
+        storage_patch = patch("core.repositories.sqlalchemy_workflow_node_execution_repository.storage")
+        mode_patch, threshold_patch = self._patch_blob_mode()
+        with mode_patch, threshold_patch, storage_patch as mock_storage:
+            mock_storage.exists.side_effect = lambda key: key in stored
+            mock_storage.save.side_effect = stored.__setitem__
+            first = repo._truncate_and_upload(value, "exec-1", ExecutionOffLoadType.INPUTS)
+            second = repo._truncate_and_upload(value, "exec-2", ExecutionOffLoadType.INPUTS)
+
+        assert first is not None
+        assert second is not None
+        assert first.file is None
+        assert first.offload.file_id is None
+        assert first.offload.blob_hash is not None
+        assert first.offload.blob_hash == second.offload.blob_hash
+        assert first.offload.node_execution_id == "exec-1"
+        assert second.offload.node_execution_id == "exec-2"
+        assert first.truncated_value["data"].endswith("...")
+        assert len(json.dumps(first.truncated_value)) < len(json.dumps(value))
+
+        mock_storage.save.assert_called_once()
+        (key, content), _ = mock_storage.save.call_args
+        assert key == WorkflowNodeExecutionOffload.blob_key("test-tenant-id", first.offload.blob_hash)
+        assert json.loads(zlib.decompress(content)) == value
+
+    def test_to_domain_model_loads_blob(self):
+        repo = self.create_repository()
+        full_outputs = {"data": "x" * (self._THRESHOLD * 4)}
+        preview = {"data": "xxx..."}
+
+        db_model = WorkflowNodeExecutionModel()
+        db_model.id = "test-id"
+        db_model.node_execution_id = "node-exec-id"
+        db_model.workflow_id = "workflow-id"
+        db_model.workflow_run_id = "run-id"
+        db_model.index = 1
+        db_model.predecessor_node_id = None
+        db_model.node_id = "node-id"
+        db_model.node_type = NodeType.LLM.value
+        db_model.title = "Test Node"
+        db_model.inputs = None
+        db_model.process_data = None
+        db_model.outputs = json.dumps(preview)
+        db_model.status = WorkflowNodeExecutionStatus.SUCCEEDED.value
+        db_model.error = None
+        db_model.elapsed_time = 1.0
+        db_model.execution_metadata = "{}"
+        db_model.created_at = datetime.now(UTC)
+        db_model.finished_at = None
+        db_model.offload_data = [
+            WorkflowNodeExecutionOffload(
+                tenant_id="test-tenant-id",
+                type_=ExecutionOffLoadType.OUTPUTS,
+                blob_hash="ab" * 32,
+            )
+        ]
+
+        with patch("core.repositories.sqlalchemy_workflow_node_execution_repository.storage") as mock_storage:
+            mock_storage.load.return_value = zlib.compress(json.dumps(full_outputs).encode())
+            domain_model = repo._to_domain_model(db_model)
+
+        mock_storage.load.assert_called_once_with(WorkflowNodeExecutionOffload.blob_key("test-tenant-id", "ab" * 32))
+        assert domain_model.outputs == full_outputs
+        assert domain_model.get_truncated_outputs() == preview
+
+
 class TestWorkflowNodeExecutionModelTruncatedProperties:
     """Test the truncated properties on WorkflowNodeExecutionModel."""
 
@@ -111,3 +111,40 @@ class TestVariablePoolGetAndNestedAttribute:
         assert segment_false is not None
         assert isinstance(segment_false, BooleanSegment)
         assert segment_false.value is False
+
+
+class TestVariablePoolSnapshot:
+    def test_snapshot_shares_variables_with_parent(self):
+        pool = VariablePool.empty()
+        pool.add(("node1", "text"), "hello")
+
+        snapshot = pool.snapshot()
+
+        assert snapshot.get(("node1", "text")) is pool.get(("node1", "text"))
+
+    def test_snapshot_writes_do_not_leak_to_parent(self):
+        pool = VariablePool.empty()
+        pool.add(("node1", "text"), "hello")
+
+        snapshot = pool.snapshot()
+        snapshot.add(("node1", "text"), "changed")
+        snapshot.add(("node2", "new"), 1)
+        snapshot.remove(("node1",))
+
+        segment = pool.get(("node1", "text"))
+        assert segment is not None
+        assert segment.value == "hello"
+        assert pool.get(("node2", "new")) is None
+
+    def test_parent_writes_do_not_leak_to_snapshot(self):
+        pool = VariablePool.empty()
+        pool.add(("node1", "text"), "hello")
+
+        snapshot = pool.snapshot()
+        pool.add(("node1", "text"), "changed")
+        pool.add(("node1", "other"), "value")
+
+        segment = snapshot.get(("node1", "text"))
+        assert segment is not None
+        assert segment.value == "hello"
+        assert snapshot.get(("node1", "other")) is None
@@ -0,0 +1,50 @@
+"""Tests for graph engine event manager delivery."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from core.workflow.graph_engine.event_management.event_manager import EventManager
+from core.workflow.graph_events import GraphRunStartedEvent
+
+
+def test_emit_events_yields_collected_events_in_order_and_stops_on_complete() -> None:
+    event_manager = EventManager()
+    events = [GraphRunStartedEvent() for _ in range(3)]
+    for event in events:
+        event_manager.collect(event)
+    event_manager.mark_complete()
+
+    assert list(event_manager.emit_events()) == events
+
+
+def test_emit_events_wakes_up_on_collect_from_another_thread() -> None:
+    event_manager = EventManager()
+    produced = [GraphRunStartedEvent() for _ in range(50)]
+
+    def produce() -> None:
+        for event in produced:
+            event_manager.collect(event)
+            time.sleep(0.001)
+        event_manager.mark_complete()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    consumed = list(event_manager.emit_events())
+    producer.join()
+
+    assert consumed == produced
+
+
+def test_consumed_events_are_released() -> None:
+    event_manager = EventManager()
+    event_manager.collect(GraphRunStartedEvent())
+
+    generator = event_manager.emit_events()
+    next(generator)
+
+    assert len(event_manager._events) == 0  # type: ignore[attr-defined]
+
+    event_manager.mark_complete()
+    assert list(generator) == []
@@ -237,6 +237,9 @@ def test_handle_workflow_run_success(workflow_cycle_manager, mock_workflow_execu
     assert result.total_steps == 5
     assert result.finished_at is not None
 
+    # Verify buffered node executions are persisted when the run ends
+    workflow_cycle_manager._workflow_node_execution_repository.flush.assert_called_once()
+
 
 def test_handle_workflow_run_failed(workflow_cycle_manager, mock_workflow_execution_repository):
     """Test handle_workflow_run_failed method"""
@@ -0,0 +1,42 @@
+import pickle
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from models.dataset import Embedding
+
+
+def test_set_embedding_uses_compact_float32_format():
+    embedding = Embedding(model_name="model", hash="hash", provider_name="provider")
+    embedding.set_embedding([0.1, 0.2, 0.3])
+
+    assert Embedding.is_compact_embedding(embedding.embedding)
+    assert len(embedding.embedding) == Embedding.BINARY_HEADER_SIZE + 3 * 4
+    assert embedding.get_embedding_array().dtype == np.float32
+    assert embedding.get_embedding() == pytest.approx([0.1, 0.2, 0.3])
+
+
+def test_set_embedding_with_float16_storage():
+    embedding = Embedding(model_name="model", hash="hash", provider_name="provider")
+    with patch("models.dataset.dify_config.EMBEDDING_CACHE_STORAGE_DTYPE", "float16"):
+        embedding.set_embedding([0.25, 0.5])
+
+    assert len(embedding.embedding) == Embedding.BINARY_HEADER_SIZE + 2 * 2
+    assert embedding.get_embedding() == [0.25, 0.5]
+
+
+def test_get_embedding_reads_legacy_pickle_rows():
+    embedding = Embedding(model_name="model", hash="hash", provider_name="provider")
+    embedding.embedding = pickle.dumps([0.1, 0.2, 0.3], protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert not Embedding.is_compact_embedding(embedding.embedding)
+    assert embedding.get_embedding() == [0.1, 0.2, 0.3]
+
+
+def test_get_embedding_rejects_unknown_format_version():
+    embedding = Embedding(model_name="model", hash="hash", provider_name="provider")
+    embedding.embedding = Embedding.BINARY_MAGIC + bytes((99, 0)) + np.zeros(2, dtype="<f4").tobytes()
+
+    with pytest.raises(ValueError):
+        embedding.get_embedding()
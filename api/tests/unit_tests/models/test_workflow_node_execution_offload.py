@@ -142,9 +142,9 @@ class TestWorkflowNodeExecutionModel:
 
         with pytest.MonkeyPatch.context() as mp:
             # Mock the _load_full_content method
-            def mock_load_full_content(session, file_id, storage):
+            def mock_load_full_content(session, offload, storage):
                 assert session == mock_session
-                assert file_id == "file-id"
+                assert offload is process_data_offload
                 assert storage == mock_storage
                 return full_process_data
 
@@ -154,6 +154,36 @@ class TestWorkflowNodeExecutionModel:
 
             assert result == full_process_data
 
+    def test_load_full_process_data_with_blob(self):
+        """Test load_full_process_data when process_data is stored as a compressed blob."""
+        import json
+        import zlib
+
+        from models.enums import ExecutionOffLoadType
+
+        execution = WorkflowNodeExecutionModel()
+
+        process_data_offload = WorkflowNodeExecutionOffload()
+        process_data_offload.type_ = ExecutionOffLoadType.PROCESS_DATA
+        process_data_offload.tenant_id = "tenant-id"
+        process_data_offload.blob_hash = "ab" * 32
+
+        execution.offload_data = [process_data_offload]
+        execution.process_data = '{"truncated": "data"}'
+
+        full_process_data = {"full": "data", "large_field": "x" * 10000}
+        mock_session = Mock()
+        mock_storage = Mock()
+        mock_storage.load.return_value = zlib.compress(json.dumps(full_process_data).encode())
+
+        result = execution.load_full_process_data(mock_session, mock_storage)
+
+        assert result == full_process_data
+        mock_storage.load.assert_called_once_with(
+            WorkflowNodeExecutionOffload.blob_key("tenant-id", process_data_offload.blob_hash)
+        )
+        mock_session.scalars.assert_not_called()
+
     def test_consistency_with_inputs_outputs_truncation(self):
         """Test that process_data truncation behaves consistently with inputs/outputs."""
         from models.enums import ExecutionOffLoadType
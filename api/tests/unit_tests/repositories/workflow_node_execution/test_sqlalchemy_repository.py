@@ -3,6 +3,7 @@ Unit tests for the SQLAlchemy implementation of WorkflowNodeExecutionRepository.
 """
 
 import json
+import threading
 import uuid
 from datetime import datetime
 from decimal import Decimal
@@ -14,6 +15,7 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from core.model_runtime.utils.encoders import jsonable_encoder
 from core.repositories import SQLAlchemyWorkflowNodeExecutionRepository
+from core.repositories.sqlalchemy_workflow_node_execution_repository import _LazyDomainModels
 from core.workflow.entities import (
     WorkflowNodeExecution,
 )
@@ -213,11 +215,33 @@ def test_get_by_workflow_run(repository, session, mocker: MockerFixture):
     mock_select.assert_called_once()
     session_obj.scalars.assert_called_once_with(mock_stmt)
     mock_WorkflowNodeExecutionModel.preload_offload_data_and_files.assert_called_once_with(mock_stmt)
-    # Assert _to_domain_model was called with the mock execution
-    repository._to_domain_model.assert_called_once_with(mock_execution)
-    # Assert the result contains our mock domain model
+    # Assert domain models are converted lazily, once per execution
     assert len(result) == 1
+    repository._to_domain_model.assert_not_called()
     assert result[0] is mock_domain_model
+    assert list(result) == [mock_domain_model]
+    repository._to_domain_model.assert_called_once_with(mock_execution)
+
+
+def test_lazy_domain_models_iteration_converts_remaining_models_in_parallel():
+    """Test iterating converts only the models not read yet, on worker threads."""
+    db_models = [f"db-model-{i}" for i in range(4)]
+    converted_on: list[tuple[str, str]] = []
+
+    def convert(db_model):
+        converted_on.append((db_model, threading.current_thread().name))
+        return f"domain-{db_model}"
+
+    domain_models = _LazyDomainModels(db_models, convert)  # type: ignore[arg-type]
+    assert domain_models[1] == "domain-db-model-1"
+
+    assert list(domain_models) == [f"domain-db-model-{i}" for i in range(4)]
+    assert list(domain_models) == [f"domain-db-model-{i}" for i in range(4)]
+    # each model is converted once, the ones not read yet on the worker threads
+    main_thread = threading.current_thread().name
+    assert converted_on[0] == ("db-model-1", main_thread)
+    assert sorted(db_model for db_model, _ in converted_on[1:]) == ["db-model-0", "db-model-2", "db-model-3"]
+    assert all(thread != main_thread for _, thread in converted_on[1:])
 
 
 def test_to_db_model(repository):
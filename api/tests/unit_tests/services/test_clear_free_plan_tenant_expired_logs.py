@@ -74,9 +74,9 @@ class TestClearFreePlanTenantExpiredLogs:
 
             ClearFreePlanTenantExpiredLogs._clear_message_related_tables(mock_session, "tenant-123", sample_message_ids)
 
-            # Should call to_dict on each record (called once per table, so 7 times total)
+            # Should call to_dict on each record (called once per table, so 8 times total)
             for record in sample_records:
-                assert record.to_dict.call_count == 7
+                assert record.to_dict.call_count == 8
 
             # Should save backup data
             assert mock_storage.save.call_count > 0
@@ -109,6 +109,7 @@ class TestClearFreePlanTenantExpiredLogs:
                 [],
                 [],
                 [],
+                [],
             ]
 
             ClearFreePlanTenantExpiredLogs._clear_message_related_tables(mock_session, "tenant-123", sample_message_ids)
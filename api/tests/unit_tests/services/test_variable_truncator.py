@@ -300,6 +300,62 @@ class TestObjectTruncation:
         assert isinstance(result.value, dict)
 
 
+class TestSinglePassTruncation:
+    """Test that values are measured while they are truncated, without extra copies or walks."""
+
+    def test_untruncated_containers_are_not_copied(self):
+        truncator = VariableTruncator()
+        obj = {"b": [1, 2, {"c": "d"}], "a": "value"}
+
+        result = truncator._truncate_object(obj, 1000)
+
+        assert result.truncated is False
+        assert result.value is obj
+        assert result.value_size == VariableTruncator.calculate_json_size(obj)
+
+    def test_shared_subtrees_are_measured_once(self, monkeypatch):
+        truncator = VariableTruncator()
+        shared = [{"content": "chunk", "score": 0.5}]
+        calls = []
+        original = VariableTruncator._truncate_string
+
+        def counting_truncate_string(self, value, target_size):
+            calls.append(value)
+            return original(self, value, target_size)
+
+        monkeypatch.setattr(VariableTruncator, "_truncate_string", counting_truncate_string)
+        result, truncated = truncator.truncate_variable_mapping({"a": shared, "b": shared})
+
+        assert truncated is False
+        assert result["a"] is shared
+        assert result["b"] is shared
+        assert calls == ["chunk"]
+
+    def test_array_truncated_when_earlier_item_truncated(self):
+        truncator = VariableTruncator(string_length_limit=10)
+
+        result = truncator._truncate_array(["x" * 100, "y"], 50)
+
+        assert result.truncated is True
+        assert result.value == ["x" * 10 + "...", "y"]
+
+    def test_array_truncated_when_budget_exhausted(self):
+        truncator = VariableTruncator()
+
+        result = truncator._truncate_array(["x" * 20, "y", "z"], 20)
+
+        assert result.truncated is True
+        assert len(result.value) < 3
+
+    def test_file_in_object_is_kept(self, file):
+        truncator = VariableTruncator()
+
+        result = truncator._truncate_object({"file": file}, 100_000)
+
+        assert result.truncated is False
+        assert result.value == {"file": file}
+
+
 class TestSegmentBasedTruncation:
     """Test the main truncate method that works with Segments."""
 
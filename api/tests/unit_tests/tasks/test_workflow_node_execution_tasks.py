@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from core.workflow.entities.workflow_node_execution import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+from core.workflow.enums import NodeType
+from libs.datetime_utils import naive_utc_now
+from models import CreatorUserRole
+from models.workflow import WorkflowNodeExecutionTriggeredFrom
+from tasks.workflow_node_execution_tasks import save_workflow_node_executions_task
+
+
+def _execution_data(index: int) -> dict:
+    return WorkflowNodeExecution(
+        id=str(uuid4()),
+        workflow_id=str(uuid4()),
+        workflow_execution_id=str(uuid4()),
+        index=index,
+        node_id=f"node{index}",
+        node_type=NodeType.LLM,
+        title=f"Node {index}",
+        inputs={"query": "hello"},
+        status=WorkflowNodeExecutionStatus.SUCCEEDED,
+        created_at=naive_utc_now(),
+    ).model_dump()
+
+
+@patch("tasks.workflow_node_execution_tasks.sessionmaker")
+@patch("tasks.workflow_node_execution_tasks.db")
+def test_save_workflow_node_executions_task_upserts_batch(mock_db, mock_sessionmaker):
+    session = MagicMock()
+    mock_sessionmaker.return_value.return_value.__enter__.return_value = session
+    executions_data = [_execution_data(1), _execution_data(2)]
+
+    assert save_workflow_node_executions_task(
+        executions_data=executions_data,
+        tenant_id=str(uuid4()),
+        app_id=str(uuid4()),
+        triggered_from=WorkflowNodeExecutionTriggeredFrom.WORKFLOW_RUN.value,
+        creator_user_id=str(uuid4()),
+        creator_user_role=CreatorUserRole.ACCOUNT.value,
+    )
+
+    session.execute.assert_called_once()
+    session.commit.assert_called_once()
+    stmt = session.execute.call_args[0][0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("INSERT INTO workflow_node_executions")
+    assert "ON CONFLICT (id) DO UPDATE SET" in sql
+    assert "status = excluded.status" in sql
+    assert "created_by = excluded" not in sql
+    assert {executions_data[0]["id"], executions_data[1]["id"]} <= set(compiled.params.values())